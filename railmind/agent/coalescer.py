@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+
+from railmind.operators.logger import get_logger
+from railmind.operators.rewrite_gate import REFERENTIAL_PATTERN, normalize_query
+
+
+class RequestCoalescer:
+    """
+    单飞 (single-flight) 请求合并 --> 规范化后相同的查询同时在途时只执行一次工作流，其余请求等待同一个结果
+
+    - 只合并不依赖会话记忆的查询: 查询中没有指代表达（它/这趟...），或该会话还没有任何记忆
+    - 共享执行在独立任务中运行，发起请求的客户端断开不会取消其他等待者
+    - 各会话的短期记忆由调用方分别写入
+    """
+
+    def __init__(self):
+        self.logger = get_logger(name="RequestCoalescer")
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "executions": 0, "coalesced": 0, "uncoalescable": 0}
+
+    @staticmethod
+    def key(query: str) -> str:
+        return normalize_query(query).lower()
+
+    @staticmethod
+    def coalescable(query: str, memory_context: Optional[Dict[str, Any]]) -> bool:
+        has_memory = bool(memory_context and (memory_context.get("short_term") or memory_context.get("long_term")))
+        return not has_memory or not REFERENTIAL_PATTERN.search(query.strip())
+
+    def record_uncoalescable(self):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["uncoalescable"] += 1
+
+    def inflight(self, query: str) -> Optional[asyncio.Task]:
+        return self._inflight.get(self.key(query))
+
+    async def run(self, query: str, execute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """返回 (结果, 是否复用了其他请求的执行)"""
+        key = self.key(query)
+        task = self._inflight.get(key)
+        if task is not None:
+            return await self.join(task), True
+        task = asyncio.ensure_future(execute())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["executions"] += 1
+        return await asyncio.shield(task), False
+
+    async def join(self, task: asyncio.Task) -> Any:
+        """等待在途的共享执行"""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["coalesced"] += 1
+        self.logger.info("Coalesced with an in-flight execution.")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待者都已断开时避免 "exception was never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.warning(f"Shared execution failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self._stats["requests"]
+            return {
+                **self._stats,
+                "inflight": len(self._inflight),
+                "coalescing_ratio": self._stats["coalesced"] / requests if requests else 0.0,
+            }
@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from railmind.operators.logger import get_logger
+from railmind.function_call.station_resolver import StationResolver
+
+
+def query_signature(sub_query: Dict[str, Any]) -> str:
+    """槽位抽象后的查询签名: 意图类型 + 实体类型序列, 如 车次详情(Train)"""
+    entity_types = [entity.get("type") or "Other" for entity in sub_query.get("entities", []) or [] if isinstance(entity, dict)]
+    return f"{sub_query.get('type', '')}({','.join(entity_types)})"
+
+
+def _slot_of(value: str, entities: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    在实体中查找参数值来源 --> 参数模板槽位
+    允许参数值是实体文本去掉 站/火车站 等后缀的结果（实体 北京西站 -> 参数 北京西），回放时对新实体去掉同样的后缀
+    """
+    for idx, entity in enumerate(entities):
+        for field in ("text", "value"):
+            source = entity.get(field)
+            if not isinstance(source, str) or not source:
+                continue
+            if source == value:
+                return {"slot": idx, "field": field, "suffix": ""}
+            if value and source.startswith(value) and source[len(value):] in StationResolver.SUFFIXES:
+                return {"slot": idx, "field": field, "suffix": source[len(value):]}
+    return None
+
+
+def _fill_slot(template: Dict[str, Any], entities: List[Dict[str, Any]]) -> Optional[str]:
+    if template["slot"] >= len(entities):
+        return None
+    source = entities[template["slot"]].get(template["field"])
+    if not isinstance(source, str) or not source:
+        return None
+    suffix = template["suffix"]
+    if suffix and source.endswith(suffix) and len(source) > len(suffix):
+        return source[:-len(suffix)]
+    return source
+
+
+class PlanCache:
+    """
+    推理路径缓存 --> 结构相似的子查询直接回放上一次成功的工具调用序列，跳过 ReThink 的 LLM 调用
+
+    - key: query_signature, 如 查询车次详情(Train)
+    - value: [{"function_name": ..., "parameters": {参数名: 槽位模板 | 常量}}]
+    - 只记录可完全槽位化的路径: 字符串参数必须能在实体中找到来源，否则不缓存（避免把具体站名/车次回放给别的查询）
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._plans: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "stored": 0, "unslottable": 0, "replayed_steps": 0, "think_calls_avoided": 0, "fallbacks": 0}
+        self.logger = get_logger(name="PlanCache")
+
+    def get(self, sub_query: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """命中时返回已填充当前实体的工具调用序列"""
+        key = query_signature(sub_query)
+        with self._lock:
+            self._stats["lookups"] += 1
+            plan = self._plans.get(key)
+            if plan is None:
+                return None
+            self._plans.move_to_end(key)
+        entities = sub_query.get("entities", []) or []
+        steps = []
+        for step in plan:
+            parameters = {}
+            for name, template in step["parameters"].items():
+                if isinstance(template, dict) and "slot" in template:
+                    value = _fill_slot(template, entities)
+                    if value is None:
+                        return None
+                    parameters[name] = value
+                else:
+                    parameters[name] = template
+            steps.append({"function_name": step["function_name"], "parameters": parameters})
+        with self._lock:
+            self._stats["hits"] += 1
+        self.logger.info(f"Plan cache hit: {key} -> {[s['function_name'] for s in steps]}")
+        return steps
+
+    def put(self, sub_query: Dict[str, Any], observations: List[Dict[str, Any]]) -> bool:
+        """由成功完成的子查询的观测记录生成路径模板；空结果与报错的调用不计入路径"""
+        entities = sub_query.get("entities", []) or []
+        plan = []
+        for observation in observations:
+            result = observation.get("result")
+            if not result or (isinstance(result, dict) and result.get("error")):
+                continue
+            parameters = {}
+            for name, value in (observation.get("parameters") or {}).items():
+                if isinstance(value, str):
+                    template = _slot_of(value.strip(), entities)
+                    if template is None:
+                        with self._lock:
+                            self._stats["unslottable"] += 1
+                        return False
+                    parameters[name] = template
+                else:
+                    parameters[name] = value
+            plan.append({"function_name": observation["function"], "parameters": parameters})
+        if not plan:
+            return False
+        key = query_signature(sub_query)
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+            self._stats["stored"] += 1
+        return True
+
+    def record_replay(self, think_calls_avoided: int = 1):
+        with self._lock:
+            self._stats["replayed_steps"] += 1
+            self._stats["think_calls_avoided"] += think_calls_avoided
+
+    def record_fallback(self):
+        with self._lock:
+            self._stats["fallbacks"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["lookups"]
+            return {
+                **self._stats,
+                "plans": len(self._plans),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
@@ -1,44 +1,103 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from contextvars import ContextVar
 from datetime import datetime
 import json
-from langchain_openai import ChatOpenAI
+import time
+import copy
+import asyncio
+import threading
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langgraph.graph import StateGraph, END
 
 from railmind.agent.state import AgentState, StateBuilder
 from railmind.agent.workflow_define import RailMindWorkFlowBuilder
+from railmind.agent.sub_query_dag import infer_dependencies, dependency_levels
+from railmind.agent.plan_cache import PlanCache
+from railmind.agent.speculative import SpeculativeExecutor
+from railmind.agent.coalescer import RequestCoalescer
 from railmind.operators.query_rewriter import QueryRewriter
 from railmind.operators.intent_recognizer import IntentRecognizer
+from railmind.operators.query_understander import QueryUnderstander
 from railmind.operators.result_evaluator import ResultEvaluator
+from railmind.operators.rule_evaluator import RuleEvaluator
+from railmind.operators.answer_composer import AnswerComposer
+from railmind.operators.answer_cache import AnswerCache
+from railmind.operators.prompt_budget import get_prompt_budget
+from railmind.operators.llm.llm_registry import LLMRegistry
+from railmind.operators.llm.thinking_budget import THINKING_USAGE
+from railmind.operators.rewrite_gate import RewriteGate, CharNGramClassifier
 from railmind.operators.memory import get_memory_store
 from railmind.function_call.kg_tools import TOOLS
+from railmind.function_call.station_resolver import StationResolver, StationResolverUnavailable, aget_station_resolver, find_stations_in_text
+from railmind.function_call.kg_changes import kg_change_feed
 from railmind.config import get_settings
-from railmind.operators.templates.think import SYSTEM_PROMPT, USER_PROMPT
+from railmind.operators.templates.think import SYSTEM_PROMPT, USER_PROMPT, TOOL_CALLING_SYSTEM_PROMPT
 from railmind.operators.logger import get_logger
 from railmind.agent.base_agent import BaseAgent
-from railmind.utils import is_think_model, log_execution_time, parse_think_content
+from railmind.utils import log_execution_time, parse_think_content, ActionStreamParser
 from railmind.operators.templates.answer_generate import FIN_SYSTEM_PROMPT, FIN_USER_PROMPT
 from railmind.agent.state import ErrorType
 
+# 流式接口下最终答案的 token 队列 --> astream 设置，_llm_answer 逐 token 写入
+ANSWER_TOKEN_SINK: ContextVar[Optional[asyncio.Queue]] = ContextVar("answer_token_sink", default=None)
+
 class ReActAgent(BaseAgent):
     def __init__(self, error_backtracking_log_path: str = "/data/lzm/AgentDev/RailMind/data"):
         super().__init__(error_backtracking_log_path=error_backtracking_log_path)
         self.logger = get_logger(name='ReActAgent')
         self.settings = get_settings()
+        # 按阶段路由 LLM (Settings.llm_stages)，未配置时所有阶段共享同一个实例
+        self.llm_registry = LLMRegistry(self.settings)
         # LLM for ReAct reasoning
-        self.llm = ChatOpenAI(
-            model=self.settings.openai_model,
-            api_key=self.settings.openai_api_key,
-            base_url=self.settings.openai_api_base,
-            temperature=0.2
-        )
-        self.query_rewriter = QueryRewriter(llm_instance=self.llm)
-        self.intent_recognizer = IntentRecognizer(llm_instance=self.llm)
-        self.result_evaluator = ResultEvaluator(llm_instance=self.llm)
+        self.llm = self.llm_registry.get("think")
+        self.answer_llm = self.llm_registry.get("answer")
+        self.think_budget = self.llm_registry.thinking_budget("think")
+        self.answer_budget = self.llm_registry.thinking_budget("answer")
+        self.query_rewriter = QueryRewriter(**self._operator_llm("rewrite"))
+        self.intent_recognizer = IntentRecognizer(**self._operator_llm("intent"))
+        self.query_understander = QueryUnderstander(**self._operator_llm("understand"))
+        self.prompt_budget = get_prompt_budget()
+        self.result_evaluator = ResultEvaluator(prompt_budget=self.prompt_budget, **self._operator_llm("evaluate"))
         self.memory_store = get_memory_store()
+        self.rewrite_gate = RewriteGate(
+            station_finder=find_stations_in_text if self.settings.station_resolver_enabled else None,
+            min_length=self.settings.rewrite_gate_min_length,
+            max_length=self.settings.rewrite_gate_max_length,
+            classifier=CharNGramClassifier.load(self.settings.rewrite_gate_model_path) if self.settings.rewrite_gate_model_path else None,
+            threshold=self.settings.rewrite_gate_threshold,
+        )
         self.tools = {tool.name: tool for tool in TOOLS}
+        self.answer_cache = AnswerCache(
+            station_finder=find_stations_in_text if self.settings.station_resolver_enabled else None,
+            max_entries=self.settings.answer_cache_max_entries,
+            ttl=self.settings.answer_cache_ttl,
+            similarity=self.settings.answer_cache_similarity,
+        ) if self.settings.answer_cache_enabled else None
+        self.answer_composer = AnswerComposer() if self.settings.template_answer_enabled else None
+        self.rule_evaluator = RuleEvaluator() if self.settings.rule_evaluator_enabled else None
+        self.plan_cache = PlanCache(max_size=self.settings.plan_cache_max_size) if self.settings.plan_cache_enabled else None
+        self.speculative_executor = SpeculativeExecutor(
+            self.tools,
+            self._invoke_tool,
+            top_k=self.settings.speculative_top_k,
+            resolve_stations=self.settings.station_resolver_enabled,
+        ) if self.settings.speculative_execution_enabled else None
+        self.stream_stats = {"iterations": 0, "early_dispatches": 0, "hits": 0, "tail_seconds": 0.0}
+        self.think_stats = {"requests": 0, "turns": 0, "parse_failures": 0, "tool_calls": 0, "multi_call_turns": 0}
+        self._think_lock = threading.Lock()
+        self._stream_lock = threading.Lock()
+        self.coalescer = RequestCoalescer() if self.settings.request_coalescing_enabled else None
+        self.dag_stats = {"runs": 0, "sub_queries": 0, "concurrent_levels": 0, "loop_seconds": 0.0, "wall_seconds": 0.0}
         self.graph = self._build_graph()
     
+    def _operator_llm(self, stage: str) -> Dict[str, Any]:
+        return {
+            "llm_instance": self.llm_registry.get(stage),
+            "thinking": self.llm_registry.thinking(stage),
+            "thinking_budget": self.llm_registry.thinking_budget(stage),
+        }
+
     def _func_logger(self, name):
         return get_logger(name=name)
     
@@ -47,17 +106,28 @@ class ReActAgent(BaseAgent):
 
     async def _init_state(self, state: AgentState) -> AgentState:
         state = StateBuilder.init_state(state=state, agent_instance=self)
+        with self._think_lock:
+            self.think_stats["requests"] += 1
+        if self.speculative_executor:
+            self.speculative_executor.record_request()
+        if self.settings.rewrite_gate_enabled and self.rewrite_gate.should_skip(state["original_query"]):
+            state["rewrite_skipped"] = True
+            state["rewritten_query"] = state["original_query"]
         return state
     
     @log_execution_time("Rewrite Query")
     async def _rewrite_query(self, state: AgentState) -> AgentState:
-        # TODO 重写query是因为 用户输入的query不规范 --> 那如果用户输入的query非常规范，仍然进行query重写 会浪费时间！如何解决呢？
+        # 重写query是因为 用户输入的query不规范 --> 规范的query已在 _init_state 中由 RewriteGate 判定并跳过本节点
+        result = None
         try:
+            start_time = time.perf_counter()
             result = await self.query_rewriter.rewrite(
                 state["original_query"],
                 context=state["memory_context"]
             )
+            self.rewrite_gate.record_rewrite_latency(time.perf_counter() - start_time)
             state["rewritten_query"] = result.get("rewritten_query", state["original_query"])
+            self._log_rewrite_pair(state)
             
         except Exception as e:
             state["error"] = ErrorType.RW
@@ -68,26 +138,51 @@ class ReActAgent(BaseAgent):
             await self.write_backtrack(error_type=ErrorType.RW, error_msg=e, data=error_data)
         return state
     
+    @log_execution_time("Understand Query")
+    async def _understand_query(self, state: AgentState) -> AgentState:
+        """understand_mode=fused 时替代 rewrite_query + recognize_intent，一次 LLM 调用同时得到改写结果与意图"""
+        result = None
+        try:
+            result = await self.query_understander.understand(
+                state["original_query"],
+                context=state["memory_context"]
+            )
+            state["rewritten_query"] = result.get("rewritten_query") or state["original_query"]
+            self._log_rewrite_pair(state)
+            self._append_sub_queries(state, result)
+        except Exception as e:
+            state["error"] = ErrorType.IR
+            error_data = {
+                "original_query": state["original_query"],
+                "result": result
+            }
+            await self.write_backtrack(error_type=ErrorType.IR, error_msg=e, data=error_data)
+        return state
+
+    def _append_sub_queries(self, state: AgentState, result: Dict[str, Any]):
+        for i, q in zip(result.get("intents", []), result.get("queries", [])):
+            state["sub_queries"].append({
+                "sub_query": q["sub_query"],
+                "type": i["type"],
+                "description": i["description"],
+                "confidence": i["confidence"], 
+                "entities": q.get("entities", []),
+                "relevant_functions": q.get("relevant_functions", []),
+                "intent_index": q["intent_index"],
+                "results": [],
+                "exe_process_data": {}
+            })
+
     @log_execution_time("Intent Recognize")
     async def _recognize_intent(self, state: AgentState) -> AgentState:
         # TODO 多个意图识别的不好！请问明天北京去西安的列车都有哪些？上午8点之前发车的呢？这是两个query！但是系统判断为了一个query
         if state.get("error"):
             self.logger.info(f"An error {state['error']} was detected; skip intent_recognize.")
             return state
+        result = None
         try:
             result = await self.intent_recognizer.recognize(state["rewritten_query"])
-            for i, q in zip(result.get("intents", []), result.get("queries", [])):
-                state["sub_queries"].append({
-                    "sub_query": q["sub_query"],
-                    "type": i["type"],
-                    "description": i["description"],
-                    "confidence": i["confidence"], 
-                    "entities": q.get("entities", []),
-                    "relevant_functions": q.get("relevant_functions", []),
-                    "intent_index": q["intent_index"],
-                    "results": [],
-                    "exe_process_data": {}
-                })
+            self._append_sub_queries(state, result)
             
         except Exception as e:
             state["error"] = ErrorType.IR
@@ -103,7 +198,7 @@ class ReActAgent(BaseAgent):
         # V0.1版本 先按intent_index执行 --> 每一个子查询的执行均与其他查询相关 做了一个完全的历史上下文信息
         # V0.2后续改进： 先判断所有子查询的依存关系 进行分组，独立的子查询并发执行，有依存关系的子查询需要按步骤执行。
         # V0.3: func 召回问题 func召回的不准 后面会多走很多的loop 浪费时间
-        # V0.4Agent-Memory板块 做推理路径的缓存 比如用户1第一次的推理路径是 A-> B -> C -> D，第二次的查询类似，就可以复用一部分路径 节省时间
+        # V0.4Agent-Memory板块 做推理路径的缓存 比如用户1第一次的推理路径是 A-> B -> C -> D，第二次的查询类似，就可以复用一部分路径 节省时间 --> 已由 PlanCache 实现，见 _next_replay_action
 
         await self._update_current_sub_query(state)
         try:
@@ -116,15 +211,39 @@ class ReActAgent(BaseAgent):
             else:
                 await self.write_backtrack(error_msg="No Subquery Information Received", data=state)
                 raise ValueError
+
+            replay_action = self._next_replay_action(state)
+            if replay_action is not None:
+                state["thoughts"].append({
+                    "iteration": state["iteration_count"],
+                    "timestamp": datetime.now().isoformat(),
+                    "sub_query_index": state["current_sub_query_index"],
+                    "sub_query": current_query,
+                    "content": {"thought": "复用相似查询的推理路径", "next_action": replay_action},
+                    "plan_replay": True
+                })
+                state["actions"].append({
+                    "iteration": state["iteration_count"],
+                    "timestamp": datetime.now().isoformat(),
+                    "sub_query_index": state["current_sub_query_index"],
+                    "action": replay_action,
+                    "plan_replay": True
+                })
+                return state
+
+            tool_calling = self.settings.think_mode == "tool_calling"
             think_prompt = ChatPromptTemplate.from_messages([
-                ("system", SYSTEM_PROMPT),
+                ("system", TOOL_CALLING_SYSTEM_PROMPT if tool_calling else SYSTEM_PROMPT),
                 ('user', USER_PROMPT)
             ])
 
-            func_schemas = await self.intent_recognizer.get_function_schemas(current_functions)
-            func_info = json.dumps(func_schemas, ensure_ascii=False, indent=2)
-            exec_func_info = json.dumps(state["executed_functions"], ensure_ascii=False, indent=2)
-            results_info = json.dumps(state["current_result"][-3:], ensure_ascii=False, indent=2)
+            # tool_calling 模式下函数定义经 tools 参数传入，不再写入 prompt
+            func_info = ""
+            if not tool_calling:
+                func_schemas = await self.intent_recognizer.get_function_schemas(current_functions)
+                func_info = self.prompt_budget.fit("think", "available_functions", func_schemas)
+            exec_func_info = self.prompt_budget.fit("think", "executed_functions", state["executed_functions"])
+            results_info = self.prompt_budget.fit("think", "current_results", state["current_result"][-3:])
 
             sub_query_context = ""
             total = len(state["sub_queries"])
@@ -132,9 +251,9 @@ class ReActAgent(BaseAgent):
             sub_query_context = f"当前正在处理第 {current_idx + 1}/{total} 个子查询。" # 写出去 别在这里碍眼
             self.logger.info(sub_query_context)
 
-            prev_results = [{"sub_query": sq["sub_query"], "results": sq["results"]} for sq in state["sub_queries"][:current_idx] if sq.get("results")]
+            prev_results = [{"sub_query": sq["sub_query"], "results": sq.get("result") or sq["results"]} for sq in state["sub_queries"][:current_idx] if sq.get("result") or sq.get("results")]
             if prev_results:
-                sub_query_context += f"\n\n前面子查询的结果：\n{json.dumps(prev_results, ensure_ascii=False, indent=2)}" # 写出去 别在这里碍眼
+                sub_query_context += f"\n\n前面子查询的结果：\n{self.prompt_budget.fit('think', 'previous_results', prev_results)}" # 写出去 别在这里碍眼
 
             error_context = ""
             # TODO 参数错误要特殊处理 优先级不高
@@ -149,8 +268,10 @@ class ReActAgent(BaseAgent):
                     # 清除错误标记 --> 避免重复提示
                     state["last_error"] = None
 
-            chain = think_prompt | self.llm
-            response = await chain.ainvoke({
+            # LLM 生成期间预先执行排名靠前的候选工具调用
+            if self.speculative_executor:
+                self.speculative_executor.launch(state)
+            think_inputs = {
                 "available_functions": func_info,
                 "query": current_query + sub_query_context,
                 "intent": current_intent,
@@ -158,23 +279,22 @@ class ReActAgent(BaseAgent):
                 "executed_functions": exec_func_info,
                 "current_results": results_info,
                 "error_context": error_context
-            })
-            is_think = is_think_model(self.llm.model_name)
-            try:
-                if is_think:
-                    _, res_context = parse_think_content(response.content)
-                    thought_result = json.loads(res_context)
-                else:
-                    thought_result = json.loads(response.content)
-            except:
+            }
+            if tool_calling:
+                thought_result, response = await self._think_with_tools(think_prompt, think_inputs, current_functions)
+            else:
+                thought_result, response = await self._think_with_json(think_prompt, think_inputs, state)
+            if thought_result is None:
+                self._discard_pending_calls(state)
                 state["error"] = ErrorType.RTMODEL
                 error_data = {
                     "origin_query": state["original_query"],
                     "all_query": state["sub_queries"],
-                    "current_query": state["current_sub_query"].get("sub_query"),
-                    "model_result": response
+                    "current_query": current_query,
+                    "model_result": response.content
                 }
                 await self.write_backtrack(error_type=ErrorType.RTMODEL, data=error_data)
+                return state
 
             state["thoughts"].append({
                 "iteration": state["iteration_count"],
@@ -192,16 +312,149 @@ class ReActAgent(BaseAgent):
             })
             
         except Exception as e:
+            self._discard_pending_calls(state)
             state["error"] = ErrorType.RT
             await self.write_backtrack(error_type=ErrorType.RT, error_msg=e, data=self._common_error_data(state))
         return state
+
+    def _discard_pending_calls(self, state: AgentState) -> None:
+        """ReThink 没有产出可执行的 action 时，取消本轮已发起的推测调用与流式提前调用"""
+        if self.speculative_executor:
+            self.speculative_executor.settle(state)
+        self._cancel_early_action(state)
     
+    async def _think_with_json(self, think_prompt: ChatPromptTemplate, think_inputs: Dict[str, Any], state: AgentState) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """think_mode=json: 函数 schema 写入 prompt，解析模型回复的 JSON --> (thought_result, 模型原始回复)，解析失败时 thought_result 为 None"""
+        self.prompt_budget.record_prompt("think", think_prompt.format_messages(**think_inputs))
+        if self.settings.think_streaming:
+            response = await self._stream_think(think_prompt, think_inputs, state)
+        else:
+            response = await self.think_budget.ainvoke(self.llm, think_prompt, think_inputs)
+        try:
+            if self.llm_registry.thinking("think"):
+                _, res_context = parse_think_content(response.content)
+                thought_result = json.loads(res_context)
+            else:
+                thought_result = json.loads(response.content)
+            calls = 0 if thought_result.get("next_action", {}).get("function_name") in (None, "", "end_of_turn") else 1
+        except Exception:
+            self.logger.warning(f"ReThink output is not valid JSON: {response.content}")
+            self._record_think_turn(calls=0, parse_failure=True)
+            return None, response
+        self._record_think_turn(calls=calls, parse_failure=False)
+        return thought_result, response
+
+    async def _think_with_tools(self, think_prompt: ChatPromptTemplate, think_inputs: Dict[str, Any], function_names: List[str]) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """
+        think_mode=tool_calling: 召回的函数经 llm.bind_tools 传入，直接读取 tool_calls
+            - 一轮返回多个 tool_calls 时记录在 next_action.tool_calls 中，由 _execute_action 并发执行
+            - 没有 tool_calls 视为 end_of_turn
+            - tool_calls 全部无法解析（参数非 JSON / 未知函数）时 thought_result 为 None
+        """
+        tool_schemas = [convert_to_openai_tool(self.tools[name]) for name in function_names if name in self.tools]
+        llm = self.llm.bind_tools(tool_schemas) if tool_schemas else self.llm
+        self.prompt_budget.record_prompt("think", think_prompt.format_messages(**think_inputs), tools=tool_schemas)
+        response = await self.think_budget.ainvoke(llm, think_prompt, think_inputs)
+
+        calls = [{"function_name": c["name"], "parameters": c.get("args") or {}} for c in response.tool_calls if c["name"] in self.tools]
+        invalid = len(response.tool_calls) - len(calls) + len(response.invalid_tool_calls)
+        if invalid:
+            self.logger.warning(f"ReThink returned {invalid} unparsable tool call(s): {response.invalid_tool_calls or response.tool_calls}")
+        self._record_think_turn(calls=len(calls), parse_failure=not calls and invalid > 0)
+        if not calls and invalid:
+            return None, response
+
+        thought = response.content
+        if self.llm_registry.thinking("think"):
+            _, thought = parse_think_content(response.content)
+        if not calls:
+            next_action = {"function_name": "end_of_turn", "parameters": {}, "reason": thought}
+        elif len(calls) == 1:
+            next_action = calls[0]
+        else:
+            next_action = {**calls[0], "tool_calls": calls}
+        return {"thought": thought, "next_action": next_action}, response
+
+    def _record_think_turn(self, calls: int, parse_failure: bool) -> None:
+        with self._think_lock:
+            self.think_stats["turns"] += 1
+            self.think_stats["tool_calls"] += calls
+            self.think_stats["multi_call_turns"] += calls > 1
+            self.think_stats["parse_failures"] += parse_failure
+
+    def think_mode_stats(self) -> Dict[str, Any]:
+        with self._think_lock:
+            turns, requests = self.think_stats["turns"], self.think_stats["requests"]
+            return {
+                "mode": self.settings.think_mode,
+                **self.think_stats,
+                "parse_failure_rate": self.think_stats["parse_failures"] / turns if turns else 0.0,
+                "iterations_per_query": round(turns / requests, 2) if requests else 0.0,
+                "prompt_tokens": self.prompt_budget.stats().get("think", {}).get("avg_prompt_tokens", 0.0),
+            }
+
+    async def _stream_think(self, think_prompt: ChatPromptTemplate, think_inputs: Dict[str, Any], state: AgentState):
+        """
+        think_streaming: 流式消费 ReThink 输出，next_action 的函数名与参数解析完成后立即后台执行工具，
+        剩余的 reason/expected_outcome 继续生成，_execute_action 直接复用已发起的调用
+        """
+        parser = ActionStreamParser(skip_think=self.llm_registry.thinking("think"))
+        dispatched_at = None
+        state["early_action"] = None
+
+        def on_chunk(content: str) -> None:
+            nonlocal dispatched_at
+            if dispatched_at is not None:
+                return
+            action = parser.feed(content)
+            if action and action["function_name"] in self.tools:
+                dispatched_at = time.perf_counter()
+                self._dispatch_early_action(state, action["function_name"], action["parameters"])
+
+        response = await self.think_budget.ainvoke(self.llm, think_prompt, think_inputs, on_chunk=on_chunk)
+        with self._stream_lock:
+            self.stream_stats["iterations"] += 1
+            if dispatched_at is not None:
+                self.stream_stats["early_dispatches"] += 1
+                self.stream_stats["tail_seconds"] += time.perf_counter() - dispatched_at
+        return response
+
+    def _dispatch_early_action(self, state: AgentState, func_name: str, params: Dict[str, Any]) -> None:
+        # 推测执行已发起相同调用时不再重复请求
+        if self.speculative_executor and self.speculative_executor.call_key(func_name, params) in (state.get("speculations") or {}):
+            return
+        self.logger.info(f"Streaming think: dispatching {func_name} before generation ends.")
+        state["early_action"] = {
+            "key": json.dumps([func_name, params], ensure_ascii=False, sort_keys=True),
+            "task": asyncio.create_task(self._call_function(func_name, params, state)),
+        }
+
+    def _cancel_early_action(self, state: AgentState) -> None:
+        """提前调用的 asyncio.Task 不能留在 state 中（无法序列化，也不应继续占用 KG）"""
+        early = state.get("early_action")
+        state["early_action"] = None
+        if early:
+            early["task"].cancel()
+
+    async def _claim_early_action(self, state: AgentState, func_name: str, params: Dict[str, Any]):
+        """返回 (是否命中, 结果)；未命中的提前调用被取消"""
+        early = state.get("early_action")
+        state["early_action"] = None
+        if not early:
+            return False, None
+        if early["key"] != json.dumps([func_name, params], ensure_ascii=False, sort_keys=True):
+            early["task"].cancel()
+            return False, None
+        with self._stream_lock:
+            self.stream_stats["hits"] += 1
+        return True, await early["task"]
+
     @log_execution_time("Execute Action")
     async def _execute_action(self, state: AgentState) -> AgentState:
         # TODO 1. 高并发场景下 如何确保数据同步安全？
-        # TODO 2. 如何保证多站点问题的模糊和确定性呢？ 比如用户模糊的查询是北京 那如何检索到 北京西、北京、北京南等站点呢？ 再比如用户精确查询 北京站 --> 但是数据库里面只有北京、北京西，怎么办呢？
+        # 2. 多站点问题的模糊和确定性 --> 已在 _invoke_tool 中由 StationResolver 将车站参数解析为规范站名（北京西站 -> 北京西；北京站 -> 北京；无同名车站的城市 成都 -> 成都东、成都西）
         """
-        TODO2 的真实badcase案例：
+        2 的真实badcase案例：
         案例1：
             Query：从北京西到西安的车次有哪些？
             召回func：find_trains_between_stations
@@ -213,6 +466,7 @@ class ReActAgent(BaseAgent):
             实际上，我们数据库里面只有北京西，你搜北京、北京站 一定搜不到结果
         """
         if not state["actions"]:
+            self._discard_pending_calls(state)
             state["error"] = "No executable Action"
             return state
         
@@ -223,49 +477,169 @@ class ReActAgent(BaseAgent):
         end_signals = {"end_of_turn"}
         is_end_signal = not func_name or func_name in end_signals
         if is_end_signal:
+            self._discard_pending_calls(state)
             return await self._handle_end_signal(state, func_name)
         try:
-            result = await self._call_function(func_name, params, state)
-            if not result:
-                bad_case_data = {
-                    "func_name": func_name,
-                    "params": params,
-                    "state_snapshot": {
-                        "query": state.get("original_query"),
-                        "iteration": state.get("iteration_count")
+            # tool_calling 模式下一轮可能有多个调用，并发执行后按顺序记录观测
+            calls = [(c["function_name"], c.get("parameters", {})) for c in current_action.get("tool_calls") or []] or [(func_name, params)]
+            results = await self._obtain_results(state, calls)
+            for (func_name, params), result in zip(calls, results):
+                if not result:
+                    bad_case_data = {
+                        "func_name": func_name,
+                        "params": params,
+                        "state_snapshot": {
+                            "query": state.get("original_query"),
+                            "iteration": state.get("iteration_count")
+                        }
                     }
+                    await self.write_backtrack(error_type=ErrorType.COMMON, error_msg="Func Call执行返回结果为空", data=bad_case_data)
+
+                observation = {
+                    "iteration": state["iteration_count"],
+                    "timestamp": datetime.now().isoformat(),
+                    "function": func_name,
+                    "parameters": params,
+                    "result": result,
+                    "result_summary": self._summarize_result(result)
                 }
-                await self.write_backtrack(error_type=ErrorType.COMMON, error_msg="Func Call执行返回结果为空", data=bad_case_data)
+                
+                state["observations"].append(observation)
+                state["executed_functions"].append({
+                    "name": func_name,
+                    "parameters": params,
+                    "result_summary": observation["result_summary"]
+                })
+                is_param_error = isinstance(result, dict) and result.get("error") == "missing_required_parameters"
+                if result and not is_param_error:
+                    state["current_result"].extend(result if isinstance(result, list) else [result])
 
-            observation = {
-                "iteration": state["iteration_count"],
-                "timestamp": datetime.now().isoformat(),
-                "function": func_name,
-                "parameters": params,
-                "result": result,
-                "result_summary": self._summarize_result(result)
-            }
-            
-            state["observations"].append(observation)
-            state["executed_functions"].append({
-                "name": func_name,
-                "parameters": params,
-                "result_summary": observation["result_summary"]
-            })
-            is_param_error = isinstance(result, dict) and result.get("error") == "missing_required_parameters"
-            if result and not is_param_error:
-                state["current_result"].extend(result if isinstance(result, list) else [result])
-
-            # TODO 这里应该直接回ReThink模块 优先级不高 后面再改
-            if is_param_error:
-                state["param_error"] = result
-                self.logger.warning(f"Missing parameter: {result.get('message')}")
+                # TODO 这里应该直接回ReThink模块 优先级不高 后面再改
+                if is_param_error:
+                    state["param_error"] = result
+                    self.logger.warning(f"Missing parameter: {result.get('message')}")
             
         except Exception as e:
             state["error"] = ErrorType.EXE
             await self.write_backtrack(error_type=ErrorType.EXE, error_msg=e, data=self._common_error_data(state))
         return state
+
+    async def _obtain_results(self, state: AgentState, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """依次复用流式提前发起的调用、推测执行的结果，其余调用并发执行"""
+        func_name, params = calls[0]
+        if len(calls) == 1:
+            hit, result = await self._claim_early_action(state, func_name, params)
+        else:
+            self._cancel_early_action(state)
+            hit, result = False, None
+        if self.speculative_executor:
+            if hit:
+                self.speculative_executor.settle(state)
+                claimed = [(True, result)]
+            else:
+                claimed = await self.speculative_executor.claim_many(state, calls)
+        else:
+            claimed = [(hit, result)] if len(calls) == 1 else [(False, None)] * len(calls)
+        pending = [
+            asyncio.sleep(0, result=result) if hit else self._call_function(name, args, state)
+            for (name, args), (hit, result) in zip(calls, claimed)
+        ]
+        return list(await asyncio.gather(*pending))
     
+    @log_execution_time("Execute SubQueries")
+    async def _execute_sub_queries(self, state: AgentState) -> AgentState:
+        """
+        sub_query_execution=dag: 按依存关系调度子查询 --> 独立子查询各自在隔离的 state 中并发跑 ReAct 循环，
+        依赖前序结果的子查询在其依赖完成后启动，最后合并回主 state 交给 _generate_answer。
+        """
+        sub_queries = state["sub_queries"]
+        if len(sub_queries) <= 1:
+            return await self._run_react_loop(state)
+
+        dependencies = infer_dependencies(sub_queries)
+        levels = dependency_levels(dependencies)
+        self.logger.info(f"SubQuery dependencies: {dependencies}, levels: {levels}")
+        completed: Dict[int, AgentState] = {}
+        tasks: Dict[int, asyncio.Task] = {}
+        loop_seconds: Dict[int, float] = {}
+
+        async def run(idx: int) -> AgentState:
+            if dependencies[idx]:
+                await asyncio.gather(*(tasks[d] for d in dependencies[idx]))
+            start_time = time.perf_counter()
+            sub_state = await self._run_react_loop(self._isolated_state(state, idx, dependencies[idx], completed))
+            loop_seconds[idx] = time.perf_counter() - start_time
+            completed[idx] = sub_state
+            return sub_state
+
+        wall_start = time.perf_counter()
+        for idx in range(len(sub_queries)):
+            tasks[idx] = asyncio.create_task(run(idx))
+        await asyncio.gather(*tasks.values())
+        wall_seconds = time.perf_counter() - wall_start
+
+        # 合并
+        for idx in range(len(sub_queries)):
+            sub_state = completed[idx]
+            state["sub_queries"][idx] = sub_state["sub_queries"][-1]
+            state["total_iteration_count"] += sub_state["total_iteration_count"]
+            state["executed_functions"].extend(sub_state["executed_functions"])
+            state["observations"].extend(sub_state["observations"])
+            if sub_state.get("error") and not state.get("error"):
+                state["error"] = sub_state["error"]
+        state["current_sub_query_index"] = len(sub_queries)
+        state["func_end"] = True
+        state["should_continue"] = False
+
+        self.dag_stats["runs"] += 1
+        self.dag_stats["sub_queries"] += len(sub_queries)
+        self.dag_stats["concurrent_levels"] += len(levels)
+        self.dag_stats["loop_seconds"] += sum(loop_seconds.values())
+        self.dag_stats["wall_seconds"] += wall_seconds
+        self.logger.info(f"SubQueries finished in {wall_seconds:.2f}s (sequential would be {sum(loop_seconds.values()):.2f}s)")
+        return state
+
+    def _isolated_state(self, state: AgentState, idx: int, dependencies: List[int], completed: Dict[int, AgentState]) -> AgentState:
+        """为单个子查询构造隔离的 state: 已完成的依赖子查询排在前面作为上下文，当前子查询排在最后"""
+        sub_state = dict(state)
+        sub_state.update({
+            "sub_queries": [copy.deepcopy(completed[d]["sub_queries"][-1]) for d in dependencies] + [copy.deepcopy(state["sub_queries"][idx])],
+            "current_sub_query_index": len(dependencies),
+            "_previous_sub_query_index": -1,
+            "current_sub_query": {},
+            "current_functions": [],
+            "current_entities": [],
+            "current_intent": "",
+            "current_result": [],
+            "thoughts": [],
+            "actions": [],
+            "observations": [],
+            "executed_functions": [],
+            "iteration_count": 0,
+            "total_iteration_count": 0,
+            "should_continue": False,
+            "func_end": False,
+            "error": None,
+            "param_error": None,
+            "plan_replay": {},
+            "speculations": {},
+            "early_action": None,
+        })
+        return sub_state
+
+    async def _run_react_loop(self, state: AgentState) -> AgentState:
+        """与工作流中 react_think -> execute_action -> evaluate_result 的条件边一致的循环"""
+        while True:
+            state = await self._react_think(state)
+            if self._check_error_or_continue(state) == "error":
+                return state
+            state = await self._execute_action(state)
+            if self._check_error_or_continue_for_exe(state) != "continue":
+                return state
+            state = await self._evaluate_result(state)
+            if self._should_continue(state) == "finish":
+                return state
+
     @log_execution_time("Evaluate Result")
     async def _evaluate_result(self, state: AgentState) -> AgentState:
         if state["should_continue"]:
@@ -311,11 +685,16 @@ class ReActAgent(BaseAgent):
                 return state
 
             if current_sq:
-                sq_eval_result = await self.result_evaluator.evaluate(
-                    current_sq["sub_query"],
-                    state["executed_functions"],
-                    state["current_result"][-1]
-                )
+                # 规则能确定时跳过 LLM 评估
+                last_result = state["observations"][-1]["result"] if state["observations"] else state["current_result"]
+                sq_eval_result = self.rule_evaluator.evaluate(current_sq["sub_query"], last_result) if self.rule_evaluator else None
+                if sq_eval_result is None:
+                    sq_eval_result = await self.result_evaluator.evaluate(
+                        current_sq["sub_query"],
+                        state["executed_functions"],
+                        state["current_result"][-1]
+                    )
+                    self._log_evaluation(current_sq["sub_query"], last_result, sq_eval_result)
                 # @Elian: if the current subquery is complete, switch to the next one.
                 if not sq_eval_result.get("should_continue"):
                     # The result of the current subquery should be reflected in the subquery's result.
@@ -331,6 +710,7 @@ class ReActAgent(BaseAgent):
                     }
                     state["sub_queries"][current_idx]["result"] = state["current_result"][-1]
                     self.logger.info(f"subquery {current_idx + 1} completed.")
+                    self._remember_plan(state, current_idx)
                     state["current_sub_query_index"] += 1
                     
 
@@ -373,43 +753,21 @@ class ReActAgent(BaseAgent):
                 state["final_answer_metadata"] = {
                     "total_iterations": state["total_iteration_count"], # total_iteration_count
                     "functions_used": len(state["executed_functions"]), 
-                    "results_count": results_count
+                    "results_count": results_count,
+                    "thinking_usage": THINKING_USAGE.get() or {}
                 }
                 return state
             # TODO func_end 的处理 要判断是否有结果 如果有结果 就下面llm处理，如果没结果就返回一个固定值
-            
-            answer_prompt = ChatPromptTemplate.from_messages([
-                ("system", FIN_SYSTEM_PROMPT),
-                ("user", FIN_USER_PROMPT)
-            ])
-            process_steps = []
-            i = 0
-            for sub_query in state["sub_queries"]:
-                if not sub_query.get("exe_process_data")["thoughts"]:
-                    continue
-                process_steps.append(
-                    f'第{i+1}个查询为：{sub_query.get("sub_query")}:\n'
-                    f'它的答案为: {sub_query.get("results")}\n '
-                    f'  思考: {sub_query.get("exe_process_data")["thoughts"][-1]}\n'
-                    f'  行动: {sub_query.get("exe_process_data")["actions"][-1]}\n'
-                    f'  观察: {sub_query.get("exe_process_data")["observations"][-1]}'
-                )
-                i+=1
-            process_str = "".join(process_steps)
-            
-            chain = answer_prompt | self.llm
-            response = await chain.ainvoke({
-                "query": state["original_query"],
-                "process": process_str
-            })
-            
-            state["final_answer"] = response.content
-
+            # 单字段属性查询直接按模板回答
+            template_answer = self.answer_composer.compose(state["original_query"], state["sub_queries"]) if self.answer_composer else None
+            state["final_answer"] = template_answer if template_answer is not None else await self._llm_answer(state)
             
             state["final_answer_metadata"] = {
                 "total_iterations": state["total_iteration_count"], # total_iteration_count
                 "functions_used": len(state["executed_functions"]), 
-                "results_count": results_count
+                "results_count": results_count,
+                "answer_source": "template" if template_answer is not None else "llm",
+                "thinking_usage": THINKING_USAGE.get() or {}
             }
             # TODO 存到短期 中期 还是长期? 中间过程怎么存? 
             self.memory_store.add_to_short_term(state["session_id"], {
@@ -423,6 +781,61 @@ class ReActAgent(BaseAgent):
             await self.write_backtrack(error_type=ErrorType.GA, error_msg=e, data=self._common_error_data(state))
         return state
     
+    async def _llm_answer(self, state: AgentState) -> str:
+        answer_prompt = ChatPromptTemplate.from_messages([
+            ("system", FIN_SYSTEM_PROMPT),
+            ("user", FIN_USER_PROMPT)
+        ])
+        process_steps = []
+        i = 0
+        # 观察结果按子查询平分 answer.process 预算
+        observation_budget = self.prompt_budget.budget("answer", "process")
+        if observation_budget is not None:
+            observation_budget //= max(1, len(state["sub_queries"]))
+        for sub_query in state["sub_queries"]:
+            if not sub_query.get("exe_process_data")["thoughts"]:
+                continue
+            observation = sub_query.get("exe_process_data")["observations"][-1]
+            if isinstance(observation, dict):
+                observation = {**observation, "result": self.prompt_budget.fit("answer", "process", observation.get("result"), indent=None, max_tokens=observation_budget)}
+            process_steps.append(
+                f'第{i+1}个查询为：{sub_query.get("sub_query")}:\n'
+                f'它的答案为: {sub_query.get("results")}\n '
+                f'  思考: {sub_query.get("exe_process_data")["thoughts"][-1]}\n'
+                f'  行动: {sub_query.get("exe_process_data")["actions"][-1]}\n'
+                f'  观察: {observation}'
+            )
+            i+=1
+        process_str = "".join(process_steps)
+        
+        answer_inputs = {
+            "query": state["original_query"],
+            "process": process_str
+        }
+        self.prompt_budget.record_prompt("answer", answer_prompt.format_messages(**answer_inputs))
+        thinking = self.llm_registry.thinking("answer")
+        sink = ANSWER_TOKEN_SINK.get()
+        on_chunk = None
+        if sink is not None:
+            # 思考模型的 <think> 段不推送给客户端
+            chunks, sent = [], 0
+
+            def on_chunk(content: str) -> None:
+                nonlocal sent
+                chunks.append(content)
+                if not thinking:
+                    sink.put_nowait(("token", content))
+                    return
+                text = "".join(chunks)
+                if "</think>" in text:
+                    answer = parse_think_content(text)[1]
+                    if len(answer) > sent:
+                        sink.put_nowait(("token", answer[sent:]))
+                        sent = len(answer)
+
+        response = await self.answer_budget.ainvoke(self.answer_llm, answer_prompt, answer_inputs, on_chunk=on_chunk)
+        return parse_think_content(response.content)[1] if thinking else response.content
+
     async def _update_current_sub_query(self, state: AgentState) -> None:
         updated_state = StateBuilder.update_current_sub_query(state)
     
@@ -452,8 +865,7 @@ class ReActAgent(BaseAgent):
                 }
         
         try:
-            result_str = await tool.ainvoke(params)
-            return json.loads(result_str)
+            return await self._invoke_tool(tool, params)
         except Exception as e:
             error_msg = f"函数执行失败: {str(e)}"
             await self.write_backtrack(error_msg=error_msg, data={
@@ -463,6 +875,39 @@ class ReActAgent(BaseAgent):
                 })
             return {"error": error_msg}
     
+    async def _invoke_tool(self, tool, params: Dict[str, Any]) -> Any:
+        """车站参数解析为多个规范站名时，按每个站名并发执行工具并去重合并结果"""
+        resolver = await self._station_resolver()
+        if resolver is None:
+            return json.loads(await tool.ainvoke(params))
+        variants = resolver.expand(params)
+        if variants != [params]:
+            self.logger.info(f"Station parameters resolved: {params} -> {variants}")
+        if len(variants) == 1:
+            return json.loads(await tool.ainvoke(variants[0]))
+        results = await asyncio.gather(*(tool.ainvoke(v) for v in variants))
+        merged, seen = [], set()
+        for result_str in results:
+            result = json.loads(result_str)
+            for row in result if isinstance(result, list) else [result]:
+                key = json.dumps(row, ensure_ascii=False, sort_keys=True)
+                if row and key not in seen:
+                    seen.add(key)
+                    merged.append(row)
+        return merged
+
+    async def _station_resolver(self) -> Optional[StationResolver]:
+        """关闭或构建失败时返回 None，车站参数按原值执行；图谱变更 reset 后在线程中重建，构建失败后按重试间隔退避"""
+        if not self.settings.station_resolver_enabled:
+            return None
+        try:
+            return await aget_station_resolver()
+        except StationResolverUnavailable:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Station resolver unavailable: {e}")
+            return None
+
     async def _handle_end_signal(self, state: AgentState, func_name: str) -> AgentState:
         self.logger.info(f"Model calls {func_name}, current subquery complete.")
         current_idx = state["current_sub_query_index"]
@@ -470,6 +915,7 @@ class ReActAgent(BaseAgent):
         # normal termination
         if state["current_result"]:
             state["sub_queries"][current_idx]["result"] = state["current_result"][-1]
+            self._remember_plan(state, current_idx)
         # When `func calls` does not have a corresponding function for the current query to use.
         else:
             # TODO @Elian 特殊处理 记忆召回/返回空值记录badcase 在v0.1.5中处理
@@ -489,6 +935,41 @@ class ReActAgent(BaseAgent):
         
         return state
     
+    def _next_replay_action(self, state: AgentState) -> Optional[Dict[str, Any]]:
+        """
+        命中推理路径缓存时按序返回下一步工具调用，不再调用 ReThink LLM。
+        上一步回放的观测为空或报错时停止回放，交回 LLM 继续推理；路径全部回放完成后返回 end_of_turn。
+        """
+        current_idx = state["current_sub_query_index"]
+        if self.plan_cache is None or current_idx >= len(state["sub_queries"]):
+            return None
+        replay = state.get("plan_replay") or {}
+        if replay.get("index") != current_idx:
+            steps = self.plan_cache.get(state["sub_queries"][current_idx]) or []
+            replay = {"index": current_idx, "steps": steps, "position": 0, "active": bool(steps)}
+            state["plan_replay"] = replay
+        if not replay["active"]:
+            return None
+        if replay["position"]:
+            last_result = state["observations"][-1]["result"] if state["observations"] else None
+            if not last_result or (isinstance(last_result, dict) and last_result.get("error")):
+                replay["active"] = False
+                self.plan_cache.record_fallback()
+                self.logger.info("Plan replay returned empty/failed observation, falling back to ReThink.")
+                return None
+        if replay["position"] >= len(replay["steps"]):
+            replay["active"] = False
+            action = {"function_name": "end_of_turn", "parameters": {}}
+        else:
+            action = replay["steps"][replay["position"]]
+            replay["position"] += 1
+        self.plan_cache.record_replay()
+        return action
+
+    def _remember_plan(self, state: AgentState, current_idx: int) -> None:
+        if self.plan_cache is not None and state["observations"]:
+            self.plan_cache.put(state["sub_queries"][current_idx], state["observations"])
+
     def _summarize_result(self, result: Any) -> str:
         if not result:
             return "无结果"
@@ -519,6 +1000,35 @@ class ReActAgent(BaseAgent):
         return True
 
 
+    def _log_rewrite_pair(self, state: AgentState):
+        """记录 (原查询, 改写结果)，作为 RewriteGate 分类器的训练数据"""
+        if not self.settings.rewrite_gate_log_path:
+            return
+        try:
+            with open(self.settings.rewrite_gate_log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "query": state["original_query"],
+                    "rewritten_query": state["rewritten_query"],
+                    "has_memory": bool(state.get("memory_context")),
+                }, ensure_ascii=False) + "\n")
+        except Exception as e:
+            self.logger.warning(f"Failed to log rewrite pair: {e}")
+
+    def _log_evaluation(self, query: str, result: Any, evaluation: Dict[str, Any]):
+        """记录 LLM 评估结果，作为 scripts/eval_rule_evaluator.py 的回放集"""
+        if not self.settings.rule_evaluator_log_path:
+            return
+        try:
+            with open(self.settings.rule_evaluator_log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "query": query,
+                    "result": result,
+                    "should_continue": bool(evaluation.get("should_continue")),
+                    "reason": evaluation.get("reason", ""),
+                }, ensure_ascii=False, default=str) + "\n")
+        except Exception as e:
+            self.logger.warning(f"Failed to log evaluation: {e}")
+
     def _common_error_data(self, state: AgentState) -> Dict[Any, Any]:
         return {
                 "origin_query": state["original_query"],
@@ -533,6 +1043,11 @@ class ReActAgent(BaseAgent):
                 }
                 }
     
+    def _check_rewrite_needed(self, state: AgentState) -> str:
+        if state.get("rewrite_skipped"):
+            return "skip"
+        return "understand" if self.settings.understand_mode == "fused" else "rewrite"
+
     def _should_continue(self, state: AgentState) -> str:
         if state.get("error"):
             return "finish"
@@ -557,15 +1072,27 @@ class ReActAgent(BaseAgent):
             return "finish"
         return "continue"  
     
-    async def run(self, query: str, user_id: str, session_id: str) -> Dict[str, Any]:
-        # external variables
-        initial_state: AgentState = {
-            "original_query": query,
-            "user_id": user_id,
-            "session_id": session_id,
-            "max_iterations": self.settings.sub_query_max_iterations,
-            "start_time": datetime.now().isoformat(),
-        }
+    async def run(self, query: str, user_id: str, session_id: str, bypass_cache: bool = False) -> Dict[str, Any]:
+        initial_state = self._initial_state(query, user_id, session_id)
+        # 答案缓存与改写门控按站名抽取实体，解析器需在请求开始前就绪
+        await self._station_resolver()
+        # 图谱版本在执行前取值，执行期间图谱更新时答案按旧版本入缓存，下次查询即失效
+        kg_version = kg_change_feed.version
+        cached = self._lookup_answer_cache(initial_state, bypass_cache, kg_version)
+        if cached is not None:
+            return cached
+        if self.coalescer is None or bypass_cache:
+            return await self._execute(initial_state, kg_version, bypass_cache)
+        memory_context = self.memory_store.get_session_context(session_id)
+        if not self.coalescer.coalescable(query, memory_context):
+            self.coalescer.record_uncoalescable()
+            return await self._execute(initial_state, kg_version, bypass_cache)
+        final_state, shared = await self.coalescer.run(query, lambda: self._execute(initial_state, kg_version, bypass_cache))
+        return self._shared_state(initial_state, final_state, memory_context) if shared else final_state
+
+    async def _execute(self, initial_state: AgentState, kg_version: Optional[str], bypass_cache: bool) -> Dict[str, Any]:
+        # 各阶段思考用量按请求汇总，写入 final_answer_metadata
+        usage_token = THINKING_USAGE.set({})
         try:
             final_state = await self.graph.ainvoke(
                 initial_state,
@@ -578,5 +1105,177 @@ class ReActAgent(BaseAgent):
                 "error": f"达到递归限制，系统强制停止: {str(e)}",
                 "final_answer": "系统繁忙 请您稍后再试"
             }
-        
-        return final_state
\ No newline at end of file
+        finally:
+            THINKING_USAGE.reset(usage_token)
+        if self.answer_cache and not bypass_cache:
+            self.answer_cache.put(initial_state["original_query"], kg_version, final_state)
+        return final_state
+
+    async def astream(self, query: str, user_id: str, session_id: str, bypass_cache: bool = False) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        流式执行 --> 每个节点执行完立即产出事件，最终答案由 LLM 逐 token 产出
+        事件: node / rewrite / intent / thought / action / observation / answer_token / answer / complete
+        """
+        initial_state = self._initial_state(query, user_id, session_id)
+        await self._station_resolver()
+        kg_version = kg_change_feed.version
+        cached = self._lookup_answer_cache(initial_state, bypass_cache, kg_version)
+        if cached is None and self.coalescer and not bypass_cache:
+            # 相同查询正在 run() 中执行时直接等待其结果
+            inflight = self.coalescer.inflight(query)
+            memory_context = self.memory_store.get_session_context(session_id)
+            if inflight is not None and self.coalescer.coalescable(query, memory_context):
+                cached = self._shared_state(initial_state, await self.coalescer.join(inflight), memory_context)
+        if cached is not None:
+            yield "answer", {"answer": cached["final_answer"]}
+            yield "complete", self.summarize_state(cached)
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        # 任务创建时复制当前 context，工作流内的 _llm_answer 可取到 token 队列
+        sink_token = ANSWER_TOKEN_SINK.set(queue)
+        usage_token = THINKING_USAGE.set({})
+        try:
+            task = asyncio.create_task(self._drive_graph(initial_state, queue))
+        finally:
+            THINKING_USAGE.reset(usage_token)
+            ANSWER_TOKEN_SINK.reset(sink_token)
+
+        final_state, streamed = initial_state, False
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == "token":
+                    streamed = True
+                    yield "answer_token", {"token": payload}
+                elif kind == "node":
+                    node, final_state = payload
+                    for event in self._node_events(node, final_state):
+                        yield event
+                elif kind == "error":
+                    final_state = {**final_state, "error": payload, "final_answer": "系统繁忙 请您稍后再试"}
+                else:
+                    break
+        finally:
+            # 客户端断开时停止执行
+            if not task.done():
+                task.cancel()
+        if not streamed:
+            yield "answer", {"answer": final_state.get("final_answer", "")}
+        if self.answer_cache and not bypass_cache:
+            self.answer_cache.put(query, kg_version, final_state)
+        yield "complete", self.summarize_state(final_state)
+
+    async def _drive_graph(self, initial_state: AgentState, queue: asyncio.Queue) -> None:
+        try:
+            async for update in self.graph.astream(initial_state, config={"recursion_limit": 30}):
+                for node, node_state in update.items():
+                    queue.put_nowait(("node", (node, node_state)))
+        except Exception as e:
+            self.logger.error(f"Streaming workflow failed: {str(e)}")
+            queue.put_nowait(("error", str(e)))
+        finally:
+            queue.put_nowait(("done", None))
+
+    def _node_events(self, node: str, state: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        events = [("node", {"node": node, "timestamp": datetime.now().isoformat()})]
+        if node == "rewrite_query":
+            events.append(("rewrite", {"rewritten_query": state.get("rewritten_query", "")}))
+        elif node in ("recognize_intent", "understand_query"):
+            events.append(("intent", {
+                "rewritten_query": state.get("rewritten_query", ""),
+                "sub_queries": [
+                    {"sub_query": sq.get("sub_query"), "type": sq.get("type"), "functions": [f.get("function_name") for f in sq.get("relevant_functions", [])]}
+                    for sq in state.get("sub_queries", [])
+                ],
+            }))
+        elif node == "react_think":
+            if state.get("thoughts"):
+                events.append(("thought", state["thoughts"][-1]))
+            if state.get("actions"):
+                events.append(("action", state["actions"][-1]))
+        elif node == "execute_action":
+            # 结束信号不产生新的观察
+            action = state["actions"][-1]["action"] if state.get("actions") else {}
+            observations = state.get("observations") or []
+            if observations and action.get("function_name") in self.tools:
+                calls = len(action.get("tool_calls") or []) or 1
+                events.extend(("observation", observation) for observation in observations[-calls:])
+        elif node == "execute_sub_queries":
+            events.extend(("observation", observation) for observation in state.get("observations", []))
+        return events
+
+    @staticmethod
+    def summarize_state(state: Dict[str, Any]) -> Dict[str, Any]:
+        """流式接口 complete 事件的精简摘要"""
+        metadata = state.get("final_answer_metadata") or {}
+        return {
+            "success": state.get("error") is None,
+            "answer": state.get("final_answer", ""),
+            "metadata": {
+                "session_id": state.get("session_id"),
+                "user_id": state.get("user_id"),
+                "iterations": state.get("total_iteration_count", 0),
+                "functions_used": metadata.get("functions_used", len(state.get("executed_functions", []))),
+                "answer_source": metadata.get("answer_source"),
+                "timestamp": datetime.now().isoformat(),
+                "error": state.get("error"),
+            },
+            "sub_queries": [sq.get("sub_query") for sq in state.get("sub_queries", [])],
+        }
+
+    def _initial_state(self, query: str, user_id: str, session_id: str) -> AgentState:
+        # external variables
+        return {
+            "original_query": query,
+            "user_id": user_id,
+            "session_id": session_id,
+            "max_iterations": self.settings.sub_query_max_iterations,
+            "start_time": datetime.now().isoformat(),
+        }
+
+    def _lookup_answer_cache(self, initial_state: AgentState, bypass_cache: bool, kg_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not self.answer_cache:
+            return None
+        if bypass_cache:
+            self.answer_cache.record_bypass()
+            return None
+        cached = self.answer_cache.get(initial_state["original_query"], kg_version)
+        return self._cached_state(initial_state, cached) if cached is not None else None
+
+    def _shared_state(self, initial_state: AgentState, final_state: Dict[str, Any], memory_context: Dict[str, Any]) -> Dict[str, Any]:
+        """合并请求 --> 复用同一次执行的结果（不带发起会话的记忆上下文），本会话的短期记忆单独写入"""
+        if final_state.get("final_answer") and not final_state.get("error"):
+            self.memory_store.add_to_short_term(initial_state["session_id"], {
+                "query": initial_state["original_query"],
+                "answer": final_state["final_answer"],
+                "timestamp": datetime.now().isoformat()
+            })
+        return {
+            **final_state,
+            **initial_state,
+            "memory_context": memory_context,
+            "final_answer_metadata": {**(final_state.get("final_answer_metadata") or {}), "coalesced": True},
+        }
+
+    def _cached_state(self, initial_state: AgentState, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """答案缓存命中 --> 不执行工作流，仍写入短期记忆保持会话连续"""
+        self.logger.info(f"Answer cache hit: {initial_state['original_query']}")
+        self.memory_store.add_to_short_term(initial_state["session_id"], {
+            "query": initial_state["original_query"],
+            "answer": cached["final_answer"],
+            "timestamp": datetime.now().isoformat()
+        })
+        return {
+            **initial_state,
+            "sub_queries": [],
+            "thoughts": [],
+            "actions": [],
+            "observations": [],
+            "executed_functions": [],
+            "iteration_count": 0,
+            "total_iteration_count": 0,
+            "error": None,
+            "final_answer": cached["final_answer"],
+            "final_answer_metadata": {**cached["final_answer_metadata"], "answer_source": "cache", "cached_query": cached["query"]},
+        }
\ No newline at end of file
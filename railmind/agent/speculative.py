@@ -0,0 +1,155 @@
+import json
+import time
+import asyncio
+import threading
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+from railmind.operators.logger import get_logger
+from railmind.operators.rewrite_gate import TRAIN_NUMBER_PATTERN
+from railmind.function_call.station_resolver import current_station_resolver
+
+# 可由实体推导的工具参数
+STATION_ENTITY_TYPES = {"Station", "Location"}
+
+
+def params_from_entities(arg_names: List[str], entities: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    由意图识别的实体推导工具参数，任一参数无法推导时返回 None:
+        - train_number <- 第一个符合车次格式的 Train 实体
+        - station_name / departure_station <- 第一个 Station/Location 实体
+        - arrival_station <- 第二个 Station/Location 实体
+    """
+    stations = [e.get("text") for e in entities if e.get("type") in STATION_ENTITY_TYPES and e.get("text")]
+    trains = [e.get("text") for e in entities if e.get("type") == "Train" and TRAIN_NUMBER_PATTERN.fullmatch(str(e.get("text", "")).strip())]
+    sources = {
+        "train_number": trains[:1],
+        "station_name": stations[:1],
+        "departure_station": stations[:1],
+        "arrival_station": stations[1:2],
+    }
+    params = {}
+    for name in arg_names:
+        values = sources.get(name)
+        if not values:
+            return None
+        params[name] = values[0].strip()
+    return params
+
+
+class SpeculativeExecutor:
+    """
+    推测执行 --> ReThink 的 LLM 生成期间，按意图识别召回的函数 + 实体预先执行排名靠前的工具调用
+
+    - _react_think 调用 LLM 前 launch(): 为前 top_k 个可由实体推导出全部必填参数的函数启动 asyncio 任务
+    - _execute_action 调用 claim(): 与 LLM 决定的调用一致（车站参数按 StationResolver 规范化后比较）时复用推测结果，
+      其余未被使用的推测任务取消并计为浪费的 KG 调用
+    """
+
+    def __init__(self, tools: Dict[str, Any], invoke: Callable[[Any, Dict[str, Any]], Awaitable[Any]], top_k: int = 1, resolve_stations: bool = True):
+        self.tools = tools
+        self.invoke = invoke
+        self.top_k = top_k
+        self.resolve_stations = resolve_stations
+        self.logger = get_logger(name="SpeculativeExecutor")
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "launched": 0, "hits": 0, "wasted": 0, "saved_seconds": 0.0}
+
+    def call_key(self, func_name: str, params: Dict[str, Any]) -> str:
+        """车站参数解析到同一组规范站名的调用视为相同调用"""
+        canonical = {k: v.strip() if isinstance(v, str) else v for k, v in (params or {}).items()}
+        resolver = current_station_resolver() if self.resolve_stations else None
+        variants = resolver.expand(canonical) if resolver is not None else [canonical]
+        return json.dumps([func_name, variants], ensure_ascii=False, sort_keys=True)
+
+    def candidates(self, sub_query: Dict[str, Any], executed: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+        executed_keys = {self.call_key(f["name"], f.get("parameters", {})) for f in executed}
+        functions = sorted(sub_query.get("relevant_functions", []) or [], key=lambda f: f.get("priority", 99))
+        calls = []
+        for function in functions:
+            tool = self.tools.get(function.get("function_name"))
+            if tool is None or not tool.args:
+                continue
+            params = params_from_entities(list(tool.args), sub_query.get("entities", []) or [])
+            if params is None or self.call_key(tool.name, params) in executed_keys:
+                continue
+            calls.append((tool.name, params))
+            if len(calls) >= self.top_k:
+                break
+        return calls
+
+    def record_request(self):
+        with self._lock:
+            self._stats["requests"] += 1
+
+    def launch(self, state: Dict[str, Any]) -> None:
+        self.settle(state)
+        current_idx = state["current_sub_query_index"]
+        if current_idx >= len(state["sub_queries"]):
+            return
+        speculations = {}
+        for func_name, params in self.candidates(state["sub_queries"][current_idx], state["executed_functions"]):
+            entry = {"function": func_name, "parameters": params, "started": time.perf_counter(), "finished": None}
+            entry["task"] = asyncio.create_task(self._run(entry))
+            speculations[self.call_key(func_name, params)] = entry
+        if speculations:
+            self.logger.info(f"Speculating: {[(e['function'], e['parameters']) for e in speculations.values()]}")
+            with self._lock:
+                self._stats["launched"] += len(speculations)
+        state["speculations"] = speculations
+
+    async def _run(self, entry: Dict[str, Any]) -> Any:
+        try:
+            return await self.invoke(self.tools[entry["function"]], entry["parameters"])
+        finally:
+            entry["finished"] = time.perf_counter()
+
+    async def claim(self, state: Dict[str, Any], func_name: str, params: Dict[str, Any]) -> Tuple[bool, Any]:
+        """返回 (是否命中, 推测结果)；无论是否命中都会结算本轮其余推测任务"""
+        return (await self.claim_many(state, [(func_name, params)]))[0]
+
+    async def claim_many(self, state: Dict[str, Any], calls: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[bool, Any]]:
+        """一轮多个调用（tool_calling 模式）一次性认领，按 calls 顺序返回 (是否命中, 推测结果)"""
+        speculations = state.get("speculations") or {}
+        entries = [speculations.pop(self.call_key(func_name, params), None) if speculations else None for func_name, params in calls]
+        self.settle(state)
+        return list(await asyncio.gather(*(
+            self._await_entry(entry, func_name) for entry, (func_name, _) in zip(entries, calls)
+        )))
+
+    async def _await_entry(self, entry: Optional[Dict[str, Any]], func_name: str) -> Tuple[bool, Any]:
+        if entry is None:
+            return False, None
+        now = time.perf_counter()
+        saved = (entry["finished"] or now) - entry["started"]
+        try:
+            result = await entry["task"]
+        except Exception as e:
+            self.logger.warning(f"Speculative call {func_name} failed, executing normally: {e}")
+            with self._lock:
+                self._stats["wasted"] += 1
+            return False, None
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["saved_seconds"] += saved
+        self.logger.info(f"Speculation hit: {func_name}, saved {saved * 1000:.1f}ms")
+        return True, result
+
+    def settle(self, state: Dict[str, Any]) -> None:
+        """取消未被使用的推测任务"""
+        speculations = state.get("speculations") or {}
+        for entry in speculations.values():
+            entry["task"].cancel()
+        if speculations:
+            with self._lock:
+                self._stats["wasted"] += len(speculations)
+        state["speculations"] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            launched, requests = self._stats["launched"], self._stats["requests"]
+            return {
+                **self._stats,
+                "saved_seconds": round(self._stats["saved_seconds"], 3),
+                "hit_rate": self._stats["hits"] / launched if launched else 0.0,
+                "saved_ms_per_request": round(self._stats["saved_seconds"] / requests * 1000, 1) if requests else 0.0,
+            }
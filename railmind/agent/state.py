@@ -8,6 +8,7 @@ class AgentState(TypedDict):
     session_id: str
 
     rewritten_query: str
+    rewrite_skipped: bool
 
     sub_queries: List[Dict[str, Any]] 
 
@@ -38,6 +39,9 @@ class AgentState(TypedDict):
     start_time: str
     error: Optional[str]
     param_error: Optional[str]
+    plan_replay: Dict[str, Any]
+    speculations: Dict[str, Any]
+    early_action: Optional[Dict[str, Any]]
 
 
 class ErrorType(str, Enum):
@@ -65,6 +69,7 @@ class StateBuilder:
         state["error"] = None
         state["sub_queries"] = []
         state["rewritten_query"] = ""
+        state["rewrite_skipped"] = False
         state["current_sub_query_index"] = 0
         state["current_sub_query"] = {}
         state["current_functions"] = []
@@ -74,6 +79,9 @@ class StateBuilder:
         state["_previous_sub_query_index"] = -1
         state["total_iteration_count"] = 0
         state["param_error"] = None
+        state["plan_replay"] = {}
+        state["speculations"] = {}
+        state["early_action"] = None
 
         # load memory context
         state["memory_context"] = agent_instance.memory_store.get_session_context(
@@ -0,0 +1,51 @@
+import re
+from typing import Dict, Any, List, Set
+
+# 指代前面子查询结果的表达
+REFERENCE_PATTERN = re.compile(r"上述|上面|以上|前面|前述|这些|那些|这趟|那趟|该车|该站|该列车|它|其中|对应的|这个|那个")
+# 参与依存判断的实体类型 --> 时间/日期/数字等泛化实体共享不代表依存
+LINKING_ENTITY_TYPES = {"Station", "Train", "Location"}
+
+
+def entity_keys(sub_query: Dict[str, Any]) -> Set[str]:
+    keys = set()
+    for entity in sub_query.get("entities", []) or []:
+        if not isinstance(entity, dict) or entity.get("type") not in LINKING_ENTITY_TYPES:
+            continue
+        for field in ("text", "value"):
+            value = entity.get(field)
+            if isinstance(value, str) and value.strip():
+                keys.add(value.strip().lower())
+    return keys
+
+
+def infer_dependencies(sub_queries: List[Dict[str, Any]]) -> List[List[int]]:
+    """
+    根据意图识别结果推断子查询依存关系，返回每个子查询依赖的前序子查询下标:
+        - 显式 depends_on 字段
+        - 子查询文本指代前面的结果（上述/这些/该车...） --> 依赖全部前序子查询
+        - 与前序子查询共享车站/车次/地点实体 --> 依赖该子查询
+    只允许依赖下标更小的子查询，保证无环。
+    """
+    dependencies: List[List[int]] = []
+    keys = [entity_keys(sq) for sq in sub_queries]
+    for i, sq in enumerate(sub_queries):
+        deps: Set[int] = set()
+        explicit = sq.get("depends_on") or []
+        deps.update(d for d in explicit if isinstance(d, int) and 0 <= d < i)
+        if i and REFERENCE_PATTERN.search(sq.get("sub_query", "")):
+            deps.update(range(i))
+        deps.update(j for j in range(i) if keys[i] & keys[j])
+        dependencies.append(sorted(deps))
+    return dependencies
+
+
+def dependency_levels(dependencies: List[List[int]]) -> List[List[int]]:
+    """按依存深度分层，同层子查询可并发执行"""
+    depth: List[int] = []
+    for deps in dependencies:
+        depth.append(1 + max((depth[d] for d in deps), default=-1))
+    levels: List[List[int]] = [[] for _ in range(max(depth, default=-1) + 1)]
+    for i, d in enumerate(depth):
+        levels[d].append(i)
+    return levels
@@ -11,18 +11,35 @@ class RailMindWorkFlowBuilder:
         workflow.add_node("init", agent_instance._init_state)
         workflow.add_node("rewrite_query", agent_instance._rewrite_query)
         workflow.add_node("recognize_intent", agent_instance._recognize_intent)
+        # understand_mode=fused: 改写与意图识别合并为一个节点
+        workflow.add_node("understand_query", agent_instance._understand_query)
         workflow.add_node("react_think", agent_instance._react_think)
         workflow.add_node("execute_action", agent_instance._execute_action)
         workflow.add_node("evaluate_result", agent_instance._evaluate_result)
         workflow.add_node("generate_answer", agent_instance._generate_answer)
+        # sub_query_execution=dag: 子查询按依存关系并发执行，完成后直接生成答案
+        concurrent = agent_instance.settings.sub_query_execution == "dag"
+        if concurrent:
+            workflow.add_node("execute_sub_queries", agent_instance._execute_sub_queries)
+            workflow.add_edge("execute_sub_queries", "generate_answer")
+        react_entry = "execute_sub_queries" if concurrent else "react_think"
         
         # set a start
         workflow.set_entry_point("init")
         
         # add edge
-        workflow.add_edge("init", "rewrite_query")
+        # 规范查询由 RewriteGate 判定后跳过改写
+        workflow.add_conditional_edges(
+            "init",
+            agent_instance._check_rewrite_needed,
+            {
+                "rewrite": "rewrite_query",
+                "understand": "understand_query",
+                "skip": "recognize_intent"
+            }
+        )
         workflow.add_edge("rewrite_query", "recognize_intent")
-        workflow.add_edge("recognize_intent", "react_think")
+        workflow.add_edge("recognize_intent", react_entry)
         workflow.add_edge("react_think", "execute_action")
         # workflow.add_edge("execute_action", "evaluate_result")
         
@@ -49,7 +66,15 @@ class RailMindWorkFlowBuilder:
             agent_instance._check_error_or_continue,
             {
                 "error": "generate_answer",
-                "continue": "react_think"
+                "continue": react_entry
+            }
+        )
+        workflow.add_conditional_edges(
+            "understand_query",
+            agent_instance._check_error_or_continue,
+            {
+                "error": "generate_answer",
+                "continue": react_entry
             }
         )
         workflow.add_conditional_edges(
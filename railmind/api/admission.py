@@ -0,0 +1,217 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Deque
+
+from railmind.config import get_settings
+from railmind.operators.logger import get_logger
+
+LANES = ("interactive", "batch")
+
+
+class AdmissionRejected(Exception):
+    """请求未被接纳 --> 路由层转换为 429/503 + Retry-After"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """一次被接纳的 agent 运行，release() 可重复调用"""
+
+    def __init__(self, controller: "AdmissionController", lane: str):
+        self.controller = controller
+        self.lane = lane
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._release(self.lane)
+
+
+class AdmissionController:
+    """
+    /api/query 与 /api/query_stream 的准入控制
+
+    - 并发上限: 同时运行的 agent 最多 max_concurrency 个，batch 通道最多占用其中 batch_share 的比例
+    - 等待队列: 每个通道有界队列，空出名额时 interactive 优先；排队超过 queue_timeout 秒返回 503
+    - 快速拒绝: 队列已满返回 429；事件循环延迟超过 max_loop_lag 秒时直接返回 503，均带 Retry-After
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        queue_sizes: Optional[Dict[str, int]] = None,
+        queue_timeout: float = 30.0,
+        max_loop_lag: float = 0.5,
+        retry_after: int = 5,
+        batch_share: float = 0.5,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_sizes = queue_sizes or {"interactive": 64, "batch": 256}
+        self.queue_timeout = queue_timeout
+        self.max_loop_lag = max_loop_lag
+        self.retry_after = retry_after
+        self.batch_limit = max(1, int(max_concurrency * batch_share))
+        self.logger = get_logger(name="AdmissionController")
+        self._active = {lane: 0 for lane in LANES}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._lag_samples: Deque[float] = deque(maxlen=10)
+        self._monitor: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self._stats = {
+            lane: {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0, "rejected_loop_lag": 0}
+            for lane in LANES
+        }
+
+    # Event loop lag
+    async def start(self, interval: float = 0.1):
+        if self._monitor is None:
+            self._monitor = asyncio.create_task(self._watch_loop_lag(interval))
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+    async def _watch_loop_lag(self, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self._lag_samples.append(max(0.0, loop.time() - start - interval))
+
+    @property
+    def loop_lag(self) -> float:
+        """最近 10 次采样的最大延迟"""
+        return max(self._lag_samples, default=0.0)
+
+    # Admission
+    def _has_capacity(self, lane: str) -> bool:
+        if sum(self._active.values()) >= self.max_concurrency:
+            return False
+        return lane == "interactive" or self._active["batch"] < self.batch_limit
+
+    def _can_start(self, lane: str) -> bool:
+        """有空闲名额且没有更高或相同优先级的请求在排队"""
+        ahead = self._waiters["interactive"] if lane == "interactive" else self._waiters["interactive"] or self._waiters["batch"]
+        return not ahead and self._has_capacity(lane)
+
+    def _reject(self, lane: str, status_code: int, reason: str, counter: str) -> AdmissionRejected:
+        with self._lock:
+            self._stats[lane][counter] += 1
+        self.logger.warning(f"Rejecting {lane} request: {reason}")
+        return AdmissionRejected(status_code, reason, self.retry_after)
+
+    async def acquire(self, lane: str = "interactive") -> AdmissionTicket:
+        lane = lane if lane in LANES else "interactive"
+        if self.loop_lag > self.max_loop_lag:
+            raise self._reject(lane, 503, f"事件循环延迟过高 ({self.loop_lag:.2f}s)", "rejected_loop_lag")
+        if self._can_start(lane):
+            self._active[lane] += 1
+            self._record_admit(lane, 0.0)
+            return AdmissionTicket(self, lane)
+        if len(self._waiters[lane]) >= self.queue_sizes.get(lane, 0):
+            raise self._reject(lane, 429, "排队请求已满", "rejected_queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        with self._lock:
+            self._stats[lane]["queued"] += 1
+        start = time.perf_counter()
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # 客户端断开: 已分配的名额归还，未分配的移出队列
+            self._abandon(lane, waiter)
+            raise
+        if not done:
+            self._abandon(lane, waiter)
+            raise self._reject(lane, 503, f"排队超过 {self.queue_timeout:g}s", "rejected_timeout")
+        self._record_admit(lane, time.perf_counter() - start)
+        return AdmissionTicket(self, lane)
+
+    def _abandon(self, lane: str, waiter: asyncio.Future):
+        if waiter.done() and not waiter.cancelled():
+            self._release(lane)
+            return
+        waiter.cancel()
+        try:
+            self._waiters[lane].remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self, lane: str):
+        self._active[lane] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """空出的名额按 interactive -> batch 的顺序分配给排队请求，计数在分配时完成"""
+        for lane in LANES:
+            queue = self._waiters[lane]
+            while queue and self._has_capacity(lane):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self._active[lane] += 1
+                waiter.set_result(None)
+
+    def _record_admit(self, lane: str, wait_seconds: float):
+        with self._lock:
+            self._stats[lane]["admitted"] += 1
+            self._waits.append(wait_seconds)
+
+    @asynccontextmanager
+    async def admit(self, lane: str = "interactive"):
+        ticket = await self.acquire(lane)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            lanes = {
+                lane: {
+                    **self._stats[lane],
+                    "active": self._active[lane],
+                    "queue_depth": sum(not w.done() for w in self._waiters[lane]),
+                }
+                for lane in LANES
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": sum(self._active.values()),
+            "queue_depth": sum(lane["queue_depth"] for lane in lanes.values()),
+            "lanes": lanes,
+            "wait_seconds_avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "wait_seconds_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+            "wait_seconds_max": round(waits[-1], 3) if waits else 0.0,
+            "loop_lag_seconds": round(self.loop_lag, 3),
+        }
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _admission_controller
+    if _admission_controller is None:
+        settings = get_settings()
+        _admission_controller = AdmissionController(
+            max_concurrency=settings.admission_max_concurrency,
+            queue_sizes={"interactive": settings.admission_interactive_queue_size, "batch": settings.admission_batch_queue_size},
+            queue_timeout=settings.admission_queue_timeout,
+            max_loop_lag=settings.admission_max_loop_lag,
+            retry_after=settings.admission_retry_after,
+            batch_share=settings.admission_batch_share,
+        )
+    return _admission_controller
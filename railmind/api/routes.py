@@ -1,16 +1,21 @@
-import asyncio
 import json
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
 import uuid
 import traceback
+from typing import Dict, Any, Optional
 
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from railmind.api.schemas import QueryRequest, QueryResponse, SessionRequest, SessionResponse
 from railmind.agent.react_agent import ReActAgent
 from railmind.operators.memory import get_memory_store
-from railmind.function_call.kg_tools import TOOLS
+from railmind.function_call.kg_tools import TOOLS, kg_cache
+from railmind.function_call.kg_changes import kg_change_feed
+from railmind.function_call.station_resolver import current_station_resolver, reset_station_resolver
+from railmind.api.admission import get_admission_controller, AdmissionRejected, AdmissionTicket
+from railmind.config import get_settings
 from railmind.operators.logger import get_logger
 
 router = APIRouter(prefix="/api", tags=["api"])
@@ -22,6 +27,16 @@ def set_agent(agent_instance: ReActAgent):
     agent = agent_instance
 
 
+async def _admit(priority: str) -> Optional[AdmissionTicket]:
+    """准入控制，未接纳时返回 429/503 + Retry-After；admission_enabled=False 时直接放行"""
+    if not get_settings().admission_enabled:
+        return None
+    try:
+        return await get_admission_controller().acquire(priority)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason, headers={"Retry-After": str(e.retry_after)})
+
+
 @router.post("/session", response_model=SessionResponse)
 async def create_session(request: SessionRequest):
     """创建新会话"""
@@ -49,6 +64,7 @@ async def create_session(request: SessionRequest):
 @router.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
     """处理用户查询core"""
+    ticket = await _admit(request.priority)
     try:
         session_id = request.session_id or f"session_{uuid.uuid4().hex[:16]}"
         memory_store = get_memory_store()
@@ -58,7 +74,8 @@ async def query(request: QueryRequest):
         result = await agent.run(
             query=request.query,
             user_id=request.user_id,
-            session_id=session_id
+            session_id=session_id,
+            bypass_cache=request.bypass_cache
         )
         response = QueryResponse(
             success=result.get("error") is None,
@@ -83,64 +100,40 @@ async def query(request: QueryRequest):
         logger.error("/query interface Exception:")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"处理查询失败: {str(e)}")
+    finally:
+        if ticket is not None:
+            ticket.release()
 
 @router.get("/query_stream")
-async def query_stream(query: str, user_id: str, session_id: str = None):
-    """流式接口 --> 实时返回 ReAct 流程"""
+async def query_stream(query: str, user_id: str, session_id: str = None, bypass_cache: bool = False, priority: str = "interactive"):
+    """流式接口 --> 节点执行完即推送 ReAct 事件，最终答案逐 token 推送，complete 事件只携带精简摘要"""
+    # 准入在返回响应前完成，未接纳时直接返回 429/503；名额在流结束或客户端断开时归还
+    ticket = await _admit(priority)
+
     async def event_generator():
         try:
             current_session_id = session_id or f"session_{uuid.uuid4().hex[:16]}"
             memory_store = get_memory_store()
             if current_session_id not in memory_store.session_metadata:
                 memory_store.create_session(current_session_id, user_id)
-            result = await agent.run(
+            async for event, data in agent.astream(
                 query=query,
                 user_id=user_id,
-                session_id=current_session_id
-            )
-            
-            for i, thought in enumerate(result.get("thoughts", [])):
-                yield f"event: thought\n"
-                yield f"data: {json.dumps(thought, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.1)
-            
-            for i, action in enumerate(result.get("actions", [])):
-                yield f"event: action\n"
-                yield f"data: {json.dumps(action, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.1)
-            
-            for i, observation in enumerate(result.get("observations", [])):
-                yield f"event: observation\n"
-                yield f"data: {json.dumps(observation, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.1)
-
-            response = QueryResponse(
-                success=result.get("error") is None,
-                answer=result.get("final_answer", "无法生成答案"),
-                metadata={
-                    "session_id": current_session_id,
-                    "user_id": user_id,
-                    "iterations": result.get("iteration_count", 0),
-                    "functions_used": len(result.get("executed_functions", [])),
-                    "timestamp": datetime.now().isoformat(),
-                    "error": result.get("error")
-                },
-                thoughts=result.get("thoughts", []),
-                actions=result.get("actions", []),
-                observations=result.get("observations", []),
-                full_state=result
-            )
-            
-            yield f"event: complete\n"
-            yield f"data: {json.dumps(response.dict(), ensure_ascii=False)}\n\n"
+                session_id=current_session_id,
+                bypass_cache=bypass_cache
+            ):
+                yield f"event: {event}\n"
+                yield f"data: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
             
         except Exception as e:
-            print(f"流式查询错误: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error("/query_stream interface Exception:")
+            logger.error(traceback.format_exc())
             error_msg = {"error": str(e)}
             yield f"event: error\n"
             yield f"data: {json.dumps(error_msg, ensure_ascii=False)}\n\n"
+        finally:
+            if ticket is not None:
+                ticket.release()
     
     return StreamingResponse(
         event_generator(),
@@ -149,7 +142,9 @@ async def query_stream(query: str, user_id: str, session_id: str = None):
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "X-Accel-Buffering": "no"
-        }
+        },
+        # 生成器未开始迭代就断开时由此归还名额
+        background=BackgroundTask(ticket.release) if ticket is not None else None
     )
 
 @router.get("/session/{session_id}/history")
@@ -201,3 +196,55 @@ async def get_available_functions():
             for tool in TOOLS
         ]
     }
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """获取运行时指标"""
+    return {
+        "kg_cache": kg_cache.stats(),
+        "kg_version": kg_change_feed.version,
+        "rewrite_gate": agent.rewrite_gate.stats() if agent else {},
+        "sub_query_dag": agent.dag_stats if agent else {},
+        "plan_cache": agent.plan_cache.stats() if agent and agent.plan_cache else {},
+        "rule_evaluator": agent.rule_evaluator.stats() if agent and agent.rule_evaluator else {},
+        "speculative_execution": agent.speculative_executor.stats() if agent and agent.speculative_executor else {},
+        "think_streaming": agent.stream_stats if agent else {},
+        "think_mode": agent.think_mode_stats() if agent else {},
+        "llm_routing": agent.llm_registry.describe() if agent else {},
+        "thinking": agent.llm_registry.thinking_stats() if agent else {},
+        "template_answer": agent.answer_composer.stats() if agent and agent.answer_composer else {},
+        "answer_cache": agent.answer_cache.stats() if agent and agent.answer_cache else {},
+        "coalescing": agent.coalescer.stats() if agent and agent.coalescer else {},
+        "admission": get_admission_controller().stats() if get_settings().admission_enabled else {},
+        "prompt_tokens": agent.prompt_budget.stats() if agent else {},
+        "station_resolver": current_station_resolver().stats if current_station_resolver() else {},
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@router.post("/kg/cache/invalidate")
+async def invalidate_kg_cache(tool_name: str = None):
+    """清除KG工具结果缓存 --> 图谱重建后调用"""
+    removed = kg_cache.invalidate(tool_name)
+    if tool_name is None:
+        # 图谱重建后站名集合可能变化, 下次使用时重新构建
+        reset_station_resolver()
+        if agent and agent.answer_cache:
+            agent.answer_cache.clear()
+    return {
+        "message": f"已清除 {removed} 条缓存",
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@router.post("/kg/changes")
+async def publish_kg_changes(summary: Dict[str, Any]):
+    """接收 kg_builder 增量同步的变更摘要, 通知各缓存按影响范围失效"""
+    results = kg_change_feed.publish(summary)
+    return {
+        "message": "图谱变更已发布",
+        "kg_version": kg_change_feed.version,
+        "subscribers": results,
+        "timestamp": datetime.now().isoformat()
+    }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 
 class QueryRequest(BaseModel):
@@ -7,6 +7,8 @@ class QueryRequest(BaseModel):
     query: str = Field(..., description="用户查询")
     user_id: str = Field(default="default_user", description="用户ID")
     session_id: Optional[str] = Field(default=None, description="会话ID")
+    bypass_cache: bool = Field(default=False, description="跳过答案缓存（调试用）")
+    priority: Literal["interactive", "batch"] = Field(default="interactive", description="准入优先级通道")
 
 
 class QueryResponse(BaseModel):
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, Any
 
 
 class Settings(BaseSettings):
@@ -9,17 +10,107 @@ class Settings(BaseSettings):
     openai_model: str = "your_model_name"
     rpm: int = 1000 # Requests Per Minute 
     tpm: int = 50000 # Tokens Per Minute
+    # 按阶段覆盖模型与生成参数, 阶段: rewrite | intent | understand | think | evaluate | answer
+    # 字段: model, base_url, api_key, max_tokens, temperature, stop, thinking, thinking_budget, 如 {"intent": {"model": "qwen3-4b", "thinking": false}}
+    # thinking_budget: 0 关闭思考 | N 思考段最多 N 个 token，超出后截断并续写结果 | 不配置则完整思考
+    llm_stages: Dict[str, Dict[str, Any]] = {}
     
     # Neo4j
     neo4j_uri: str = "bolt://localhost:7687"
     neo4j_user: str = "neo4j"
     neo4j_password: str
+    neo4j_auto_schema: bool = True # 启动时自动创建缺失的约束与索引, False 则只告警
     
+    # KG backend
+    kg_backend: str = "neo4j" # neo4j | memory (TimetableEngine 进程内作答)
+    kg_memory_fallback: bool = False # Neo4j 不可用时退回 TimetableEngine
+    timetable_path: str = "data/raw_data.xlsx"
+
+    # KG tool cache
+    kg_cache_enabled: bool = True
+    kg_cache_max_bytes: int = 64 * 1024 * 1024
+    kg_cache_ttl: int = 3600 # 时刻表只在重建图谱时变化
+    kg_cache_negative_ttl: int = 60 # 空结果的缓存时间
+    kg_cache_tool_ttls: Dict[str, int] = {} # 按工具覆盖 TTL, 如 {"get_all_trains": 600}
+
+    # Station resolver
+    station_resolver_enabled: bool = True # 工具执行前将车站参数解析为图谱中的规范站名
+    station_resolver_max_candidates: int = 5 # 单个参数最多展开的站名数
+    station_resolver_max_distance: int = 1 # 编辑距离兜底的最大距离
+    station_resolver_retry_interval: float = 5.0 # 构建失败（如 Neo4j 不可用）后的重试间隔秒数，连续失败时翻倍，最长 300 秒
+
+    # Understand stage
+    understand_mode: str = "two_stage" # two_stage: rewrite_query -> recognize_intent | fused: understand_query 单次调用
+
+    # SubQuery execution
+    sub_query_execution: str = "sequential" # sequential: 按 intent_index 依次执行 | dag: 按依存关系并发执行独立子查询
+
+    # Rule evaluator
+    rule_evaluator_enabled: bool = False # 规则能确定子查询是否完成时跳过 LLM 评估
+    rule_evaluator_log_path: str = "" # 记录 LLM 评估结果 供 scripts/eval_rule_evaluator.py 计算一致率
+
+    # Speculative execution
+    speculative_execution_enabled: bool = False # ReThink 生成期间预先执行召回的候选工具调用
+    speculative_top_k: int = 1 # 每轮最多推测执行的调用数
+
+    # Think mode
+    think_mode: str = "json" # json: 函数 schema 写入 prompt 并解析 JSON 回复 | tool_calling: 通过 tools 参数绑定函数，直接读取 tool_calls
+
+    # Think streaming
+    think_streaming: bool = False # 流式解析 ReThink 输出，next_action 完整后立即执行工具
+
+    # Prompt budget
+    prompt_budget_enabled: bool = False # 按段落 token 预算裁剪 think/evaluate/answer 的 prompt
+    prompt_tokenizer_model: str = "" # HF tokenizer 路径，为空时使用 tiktoken cl100k_base
+    prompt_section_budgets: Dict[str, int] = {
+        "think.available_functions": 3000,
+        "think.executed_functions": 800,
+        "think.current_results": 1500,
+        "think.previous_results": 1500,
+        "evaluate.executed_functions": 500,
+        "evaluate.current_results": 1500,
+        "answer.process": 4000,
+    }
+
+    # Request coalescing
+    request_coalescing_enabled: bool = False # 相同查询同时在途时只执行一次工作流，其余请求共享结果
+
+    # Answer cache
+    answer_cache_enabled: bool = False # 相同/近似查询直接返回缓存答案，按图谱版本失效
+    answer_cache_max_entries: int = 10000
+    answer_cache_ttl: int = 3600
+    answer_cache_similarity: float = 0.0 # 实体一致时近似匹配的最低 2-gram Jaccard 相似度，0 表示只做精确匹配（默认）
+
+    # Template answer
+    template_answer_enabled: bool = False # 单字段属性查询按模板直接回答，跳过最终答案的 LLM 调用
+
+    # Plan cache
+    plan_cache_enabled: bool = False # 结构相似的子查询回放已成功的工具调用序列，跳过 ReThink
+    plan_cache_max_size: int = 1000
+
+    # Rewrite gate
+    rewrite_gate_enabled: bool = False # 规范查询跳过 QueryRewriter 的 LLM 调用
+    rewrite_gate_min_length: int = 4
+    rewrite_gate_max_length: int = 60
+    rewrite_gate_model_path: str = "" # CharNGramClassifier 模型(JSON), 为空时仅使用规则
+    rewrite_gate_threshold: float = 0.8 # 分类器判定规范的最低概率
+    rewrite_gate_log_path: str = "" # 记录 (原查询, 改写结果) 供 scripts/train_rewrite_gate.py 训练
+
     # Redis
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_db: int = 0
     
+    # Admission control
+    admission_enabled: bool = False # /api/query 与 /api/query_stream 的并发上限、排队与快速拒绝
+    admission_max_concurrency: int = 32 # 同时运行的 agent 数上限
+    admission_interactive_queue_size: int = 64 # interactive 通道最大排队数, 超出返回 429
+    admission_batch_queue_size: int = 256 # batch 通道最大排队数
+    admission_batch_share: float = 0.5 # batch 通道最多占用的并发比例, 为 interactive 保留名额
+    admission_queue_timeout: float = 30.0 # 排队超过该秒数返回 503
+    admission_max_loop_lag: float = 0.5 # 事件循环延迟超过该秒数时直接返回 503
+    admission_retry_after: int = 5 # 拒绝响应的 Retry-After 秒数
+
     # Server
     backend_host: str = "0.0.0.0"
     backend_port: int = 8000
@@ -1,5 +1,6 @@
-from railmind.function_call.kg_functions import TrainKGQuerySystem
+from railmind.function_call.kg_functions import TrainKGQuerySystem, AsyncTrainKGQuerySystem
 
 __all__ = [
-    "TrainKGQuerySystem"
+    "TrainKGQuerySystem",
+    "AsyncTrainKGQuerySystem"
 ]
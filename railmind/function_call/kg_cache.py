@@ -0,0 +1,218 @@
+# kg_cache.py
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, FrozenSet
+
+from railmind.operators.logger import get_logger
+
+# 工具参数 -> 图谱变更摘要中的实体类型
+ENTITY_PARAMS = {
+    "train_number": "train_number",
+    "station_name": "station_name",
+    "departure_station": "station_name",
+    "arrival_station": "station_name",
+    "hall_name": "hall_name",
+    "gate_number": "gate_number",
+    "platform_number": "platform_number",
+}
+# 按子串 (CONTAINS) 匹配实体的工具参数 --> 变更实体包含该参数值时也需失效，如 "北京" 的查询结果包含 "北京丰台"
+CONTAINS_PARAMS = {
+    "search_trains_by_station": {"station_name"},
+}
+# 子串匹配标签的实体类型前缀
+CONTAINS_PREFIX = "~"
+# 工具结果字段 -> 实体类型，存入缓存时与参数一起记录为该条目的实体标签
+RESULT_FIELDS = {
+    "车次": "train_number",
+    "列车车次": "train_number",
+    "始发列车": "train_number",
+    "到达列车": "train_number",
+    "车站名称": "station_name",
+    "关联车站": "station_name",
+    "始发站": "station_name",
+    "终到站": "station_name",
+    "候车厅": "hall_name",
+    "候车厅名称": "hall_name",
+    "检票口": "gate_number",
+    "检票口编号": "gate_number",
+    "站台": "platform_number",
+    "站台编号": "platform_number",
+}
+
+
+class ToolResultCache:
+    """
+    KG 工具结果的读穿缓存 --> LRU + TTL
+
+    - key: (工具名, 规范化参数JSON)
+    - value: 工具返回的 JSON 字符串，按 UTF-8 字节数计入内存上限
+    - 空结果（"[]"）单独使用较短的 negative_ttl，避免 LLM 反复用错误参数打到 Neo4j
+    - 存入时记录条目涉及的实体标签（参数中的车次/站名等 + 结果中出现的车次/站名等），增量变更按标签精确失效；
+      按子串匹配的参数（CONTAINS_PARAMS）记为子串标签，变更实体名包含参数值即失效
+    - 时刻表只在 kg_builder 重新加载时变化，重建后调用 invalidate() 清空
+    """
+
+    EMPTY_RESULTS = {"[]", "{}"}
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 3600,
+        negative_ttl: float = 60,
+        tool_ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.tool_ttls = tool_ttls or {}
+        # key -> (value, expire_at, size, tags)，tags 为空表示不含实体参数的聚合查询
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float, int, FrozenSet[Tuple[str, str]]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.logger = get_logger(name="ToolResultCache")
+
+    @staticmethod
+    def make_key(tool_name: str, parameters: Dict[str, Any]) -> Tuple[str, str]:
+        """规范化参数: 去除字符串首尾空白, 按键排序序列化"""
+        canonical = {
+            k: v.strip() if isinstance(v, str) else v
+            for k, v in parameters.items()
+        }
+        return tool_name, json.dumps(canonical, ensure_ascii=False, sort_keys=True)
+
+    @staticmethod
+    def entity_tags(key: Tuple[str, str], value: str) -> FrozenSet[Tuple[str, str]]:
+        """
+        条目的实体标签 {(实体类型, 值)}: 参数中的实体值 + 结果各行中的实体字段；不含实体参数时返回空集
+        子串匹配的参数记为 (CONTAINS_PREFIX + 实体类型, 值)
+        """
+        parameters = json.loads(key[1])
+        contains = CONTAINS_PARAMS.get(key[0], set())
+        tags = {
+            (CONTAINS_PREFIX * (k in contains) + ENTITY_PARAMS[k], str(v).strip())
+            for k, v in parameters.items()
+            if k in ENTITY_PARAMS and isinstance(v, (str, int)) and str(v).strip()
+        }
+        if not tags:
+            return frozenset()
+        try:
+            rows = json.loads(value)
+        except ValueError:
+            rows = []
+        for row in rows if isinstance(rows, list) else [rows]:
+            if not isinstance(row, dict):
+                continue
+            for field, kind in RESULT_FIELDS.items():
+                values = row.get(field)
+                for item in values if isinstance(values, list) else [values]:
+                    if isinstance(item, (str, int)) and str(item):
+                        tags.add((kind, str(item)))
+        return frozenset(tags)
+
+    def _counter(self, tool_name: str) -> Dict[str, int]:
+        if tool_name not in self._stats:
+            self._stats[tool_name] = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0}
+        return self._stats[tool_name]
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            counter = self._counter(key[0])
+            entry = self._entries.get(key)
+            if entry is None:
+                counter["misses"] += 1
+                return None
+            value, expire_at, size, _ = entry
+            if expire_at <= time.monotonic():
+                self._remove(key)
+                counter["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            counter["hits"] += 1
+            if value in self.EMPTY_RESULTS:
+                counter["negative_hits"] += 1
+            return value
+
+    def set(self, key: Tuple[str, str], value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if value in self.EMPTY_RESULTS:
+            ttl = self.negative_ttl
+        else:
+            ttl = self.tool_ttls.get(key[0], self.default_ttl)
+        if ttl <= 0:
+            return
+        tags = self.entity_tags(key, value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size, tags)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted_key, _ = next(iter(self._entries.items()))
+                self._remove(evicted_key)
+                self._counter(evicted_key[0])["evictions"] += 1
+
+    def _remove(self, key: Tuple[str, str]):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def invalidate(self, tool_name: Optional[str] = None) -> int:
+        """清除缓存 --> tool_name 为空时清空全部, 返回清除条数"""
+        with self._lock:
+            keys = [k for k in self._entries if tool_name is None or k[0] == tool_name]
+            for key in keys:
+                self._remove(key)
+        self.logger.info(f"Invalidated {len(keys)} cached results ({tool_name or 'all tools'})")
+        return len(keys)
+
+    def apply_changes(self, summary: Dict[str, Any]) -> int:
+        """
+        按图谱变更摘要失效缓存 --> 订阅 kg_change_feed
+        - 不含实体参数的条目（全量列表、时间段、车型等聚合查询）一律失效
+        - 含实体参数的条目，实体标签与变更实体有交集（按值精确比较）即失效
+        - 子串标签: 同类型的变更实体名包含标签值即失效
+        """
+        if summary.get("full_invalidation"):
+            return self.invalidate()
+        changed = {
+            (kind, str(value))
+            for kind, values in (summary.get("entities") or {}).items()
+            for value in values
+        }
+        if not changed:
+            return 0
+
+        with self._lock:
+            keys = [k for k, entry in self._entries.items() if self._affected(entry[3], changed)]
+            for key in keys:
+                self._remove(key)
+        self.logger.info(f"Invalidated {len(keys)} cached results for KG changes")
+        return len(keys)
+
+    @staticmethod
+    def _affected(tags: FrozenSet[Tuple[str, str]], changed: set) -> bool:
+        if not tags or tags & changed:
+            return True
+        return any(
+            kind == CONTAINS_PREFIX + changed_kind and value in changed_value
+            for kind, value in tags if kind.startswith(CONTAINS_PREFIX)
+            for changed_kind, changed_value in changed
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(c["hits"] for c in self._stats.values())
+            misses = sum(c["misses"] for c in self._stats.values())
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "tools": {name: dict(c) for name, c in self._stats.items()},
+            }
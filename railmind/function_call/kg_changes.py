@@ -0,0 +1,50 @@
+# kg_changes.py
+from typing import Dict, Any, List, Callable, Optional
+
+from railmind.operators.logger import get_logger
+
+
+class KGChangeFeed:
+    """
+    图谱变更订阅 --> kg_builder 增量同步后发布变更摘要, 各缓存按摘要失效
+
+    摘要格式（见 operators/build_kg/kg_delta_sync.py）:
+        {
+            "kg_version": "...",
+            "inserted": 3, "updated": 1, "deleted": 0,
+            "full_invalidation": False,   # 无法确定影响范围时为 True
+            "entities": {"train_number": [...], "station_name": [...], "hall_name": [...],
+                         "gate_number": [...], "platform_number": [...]}
+        }
+    """
+
+    def __init__(self):
+        self._subscribers: List[Callable[[Dict[str, Any]], Any]] = []
+        self.version: Optional[str] = None
+        self.last_summary: Optional[Dict[str, Any]] = None
+        self.logger = get_logger(name="KGChangeFeed")
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+        self._subscribers.append(callback)
+        return callback
+
+    def publish(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """通知所有订阅者, 返回 {订阅者名: 返回值}; 单个订阅者失败不影响其他订阅者"""
+        self.version = summary.get("kg_version", self.version)
+        self.last_summary = summary
+        results = {}
+        for callback in self._subscribers:
+            name = getattr(callback, "__qualname__", repr(callback))
+            try:
+                results[name] = callback(summary)
+            except Exception as e:
+                self.logger.error(f"KG change subscriber {name} failed: {e}")
+                results[name] = None
+        self.logger.info(
+            f"KG changes published (version={self.version}): "
+            f"+{summary.get('inserted', 0)} ~{summary.get('updated', 0)} -{summary.get('deleted', 0)}"
+        )
+        return results
+
+
+kg_change_feed = KGChangeFeed()
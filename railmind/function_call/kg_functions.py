@@ -2,7 +2,7 @@
 import json
 from typing import Dict, List, Optional, Any
 from langchain.tools import tool
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, AsyncGraphDatabase
 import pandas as pd
 
 class TrainKGQuerySystem:
@@ -20,4 +20,22 @@ class TrainKGQuerySystem:
         """执行Cypher查询"""
         with self.driver.session() as session:
             result = session.run(cypher_query, parameters or {})
-            return [dict(record) for record in result]
\ No newline at end of file
+            return [dict(record) for record in result]
+
+
+class AsyncTrainKGQuerySystem:
+    """列车知识图谱异步查询系统 --> 供FastAPI/ReAct异步链路使用, 不占用线程池"""
+
+    def __init__(self, uri="bolt://localhost:7687", user="neo4j", password="123456"):
+        """初始化Neo4j异步连接"""
+        self.driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+
+    async def close(self):
+        """关闭数据库连接"""
+        await self.driver.close()
+
+    async def run_query(self, cypher_query: str, parameters: Dict = None):
+        """异步执行Cypher查询"""
+        async with self.driver.session() as session:
+            result = await session.run(cypher_query, parameters or {})
+            return [dict(record) async for record in result]
@@ -0,0 +1,113 @@
+# kg_schema.py
+import time
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+from railmind.operators.logger import get_logger
+
+STATION_FULLTEXT_INDEX = "station_name_fulltext"
+
+# 唯一性约束 --> kg_builder 中每类节点的 *_id 业务主键
+CONSTRAINTS: Dict[str, Tuple[str, str]] = {
+    "train_id_unique": ("Train", "train_id"),
+    "station_id_unique": ("Station", "station_id"),
+    "hall_id_unique": ("WaitingHall", "hall_id"),
+    "gate_id_unique": ("TicketGate", "gate_id"),
+    "platform_id_unique": ("Platform", "platform_id"),
+}
+
+# 范围索引 --> kg_tools 中等值匹配 / STARTS WITH / 范围比较所用到的属性
+RANGE_INDEXES: Dict[str, Tuple[str, str]] = {
+    "train_number_index": ("Train", "train_number"),
+    "train_departure_time_index": ("Train", "departure_time"),
+    "train_departure_minute_index": ("Train", "departure_minute"),
+    "station_name_index": ("Station", "station_name"),
+    "hall_name_index": ("WaitingHall", "hall_name"),
+    "gate_number_index": ("TicketGate", "gate_number"),
+    "platform_number_index": ("Platform", "platform_number"),
+}
+
+# 全文索引 --> 车站名称子串检索，CJK 分词器按二元组切分中文
+FULLTEXT_INDEXES: Dict[str, Tuple[str, str, str]] = {
+    STATION_FULLTEXT_INDEX: ("Station", "station_name", "cjk"),
+}
+
+
+def fulltext_phrase(text: str) -> str:
+    """将原始文本转换为 Lucene 短语查询，转义引号与反斜杠"""
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+class KGSchemaManager:
+    """
+    列车知识图谱 Schema 管理
+
+    与具体驱动解耦，只依赖一个 run_query(cypher, parameters) -> List[Dict] 的可调用对象:
+        - kg_builder 建图时传入 py2neo 的执行函数
+        - FastAPI lifespan 启动时传入 TrainKGQuerySystem.run_query
+    所有语句均为 IF NOT EXISTS，可重复执行。
+    """
+
+    def __init__(self, run_query: Callable[[str, Optional[Dict[str, Any]]], List[Dict[str, Any]]]):
+        self.run_query = run_query
+        self.logger = get_logger(name="KGSchemaManager")
+
+    def statements(self) -> Dict[str, str]:
+        """name -> 创建语句"""
+        statements = {}
+        for name, (label, prop) in CONSTRAINTS.items():
+            statements[name] = (
+                f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+                f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+            )
+        for name, (label, prop) in RANGE_INDEXES.items():
+            statements[name] = f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+        for name, (label, prop, analyzer) in FULLTEXT_INDEXES.items():
+            statements[name] = (
+                f"CREATE FULLTEXT INDEX {name} IF NOT EXISTS FOR (n:{label}) ON EACH [n.{prop}] "
+                f"OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{analyzer}'}}}}"
+            )
+        return statements
+
+    def existing(self) -> Dict[str, str]:
+        """当前数据库中已存在的约束/索引 name -> state"""
+        names = {}
+        for record in self.run_query("SHOW INDEXES YIELD name, state RETURN name, state", None):
+            names[record["name"]] = record["state"]
+        for record in self.run_query("SHOW CONSTRAINTS YIELD name RETURN name", None):
+            names.setdefault(record["name"], "ONLINE")
+        return names
+
+    def missing(self) -> List[str]:
+        """返回缺失的约束/索引名称"""
+        existing = self.existing()
+        return [name for name in self.statements() if name not in existing]
+
+    def ensure(self) -> List[str]:
+        """创建缺失的约束与索引，返回本次创建的名称列表"""
+        created = []
+        for name in self.missing():
+            self.run_query(self.statements()[name], None)
+            created.append(name)
+            self.logger.info(f"Created schema object: {name}")
+        return created
+
+    def drop(self):
+        """删除本模块管理的全部约束与索引（仅用于 PROFILE 对比与重建）"""
+        for name in CONSTRAINTS:
+            self.run_query(f"DROP CONSTRAINT {name} IF EXISTS", None)
+        for name in list(RANGE_INDEXES) + list(FULLTEXT_INDEXES):
+            self.run_query(f"DROP INDEX {name} IF EXISTS", None)
+
+    def await_online(self, timeout: float = 300.0, interval: float = 1.0) -> bool:
+        """等待所有索引进入 ONLINE 状态 --> 刚创建的索引在后台填充，期间查询不会走索引"""
+        deadline = time.monotonic() + timeout
+        pending = []
+        while time.monotonic() < deadline:
+            existing = self.existing()
+            pending = [name for name in self.statements() if existing.get(name) != "ONLINE"]
+            if not pending:
+                return True
+            time.sleep(interval)
+        self.logger.warning(f"Schema objects not online after {timeout}s: {pending}")
+        return False
@@ -1,20 +1,117 @@
 # train_query_functions.py
-from langchain.tools import tool
-from railmind.function_call import TrainKGQuerySystem
-from typing import List, Dict, Optional
+import inspect
+import functools
+from langchain.tools import tool, StructuredTool
+from railmind.function_call import TrainKGQuerySystem, AsyncTrainKGQuerySystem
+from railmind.function_call.kg_schema import STATION_FULLTEXT_INDEX, fulltext_phrase
+from railmind.function_call.kg_cache import ToolResultCache
+from railmind.function_call.kg_changes import kg_change_feed
+from railmind.function_call.timetable_engine import get_timetable_engine
+from typing import List, Dict, Optional, Any, Callable, Tuple
 import json
 from datetime import datetime
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 
 from railmind.config import get_settings
-
-# TODO 因为后端都是异步接口 所以工具的话 可能得换成继承BaseTool 然后写同步和异步_run函数
+from railmind.operators.logger import get_logger
+from railmind.utils import parse_minute_of_day
 
 setting = get_settings()
 kg_system = TrainKGQuerySystem(uri=setting.neo4j_uri, user=setting.neo4j_user, password=setting.neo4j_password)
-__all__ = ["kg_system"] # 对外部导出使用
+async_kg_system = AsyncTrainKGQuerySystem(uri=setting.neo4j_uri, user=setting.neo4j_user, password=setting.neo4j_password)
+kg_cache = ToolResultCache(
+    max_bytes=setting.kg_cache_max_bytes,
+    default_ttl=setting.kg_cache_ttl,
+    negative_ttl=setting.kg_cache_negative_ttl,
+    tool_ttls=setting.kg_cache_tool_ttls,
+)
+kg_change_feed.subscribe(kg_cache.apply_changes)
+__all__ = ["kg_system", "async_kg_system", "kg_cache"] # 对外部导出使用
+logger = get_logger(name="KGTools")
 
-@tool
-def search_trains_by_station(station_name: str) -> str:
+
+def kg_tool(build_query: Callable[..., Tuple[str, Dict[str, Any]]]) -> StructuredTool:
+    """
+    将 Cypher 构造函数注册为同时具备同步/异步实现的工具
+    
+    build_query 只负责根据参数返回 (cypher, parameters)，函数名、签名与文档字符串即为工具的 name/args_schema/description。
+    - tool.invoke  --> 同步驱动 kg_system（脚本、离线测试使用）
+    - tool.ainvoke --> 异步驱动 async_kg_system（FastAPI + ReAct 链路使用，不阻塞事件循环）
+    两条链路共用 kg_cache，命中时不访问 Neo4j。
+    kg_backend=memory 时由 TimetableEngine 中的同名方法直接作答；kg_memory_fallback=True 时 Neo4j 不可用会退回 TimetableEngine。
+    """
+    signature = inspect.signature(build_query).replace(return_annotation=str)
+    name = build_query.__name__
+
+    def _bind(args, kwargs) -> Dict[str, Any]:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    def _lookup(arguments: Dict[str, Any]) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+        if not setting.kg_cache_enabled:
+            return None, None
+        key = kg_cache.make_key(name, arguments)
+        return key, kg_cache.get(key)
+
+    def _store(key: Optional[Tuple[str, str]], results: List[Dict[str, Any]]) -> str:
+        value = json.dumps(results, ensure_ascii=False, indent=2)
+        if key:
+            kg_cache.set(key, value)
+        return value
+
+    def _from_engine(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return getattr(get_timetable_engine(), name)(**arguments)
+
+    @functools.wraps(build_query)
+    def _run(*args, **kwargs) -> str:
+        arguments = _bind(args, kwargs)
+        key, cached = _lookup(arguments)
+        if cached is not None:
+            return cached
+        if setting.kg_backend == "memory":
+            return _store(key, _from_engine(arguments))
+        query, parameters = build_query(**arguments)
+        try:
+            results = kg_system.run_query(query, parameters)
+        except (ServiceUnavailable, SessionExpired):
+            if not setting.kg_memory_fallback:
+                raise
+            logger.warning(f"Neo4j unavailable, {name} falls back to TimetableEngine.")
+            results = _from_engine(arguments)
+        return _store(key, results)
+
+    @functools.wraps(build_query)
+    async def _arun(*args, **kwargs) -> str:
+        arguments = _bind(args, kwargs)
+        key, cached = _lookup(arguments)
+        if cached is not None:
+            return cached
+        if setting.kg_backend == "memory":
+            return _store(key, _from_engine(arguments))
+        query, parameters = build_query(**arguments)
+        try:
+            results = await async_kg_system.run_query(query, parameters)
+        except (ServiceUnavailable, SessionExpired):
+            if not setting.kg_memory_fallback:
+                raise
+            logger.warning(f"Neo4j unavailable, {name} falls back to TimetableEngine.")
+            results = _from_engine(arguments)
+        return _store(key, results)
+
+    _run.__signature__ = signature
+    _arun.__signature__ = signature
+    return StructuredTool.from_function(func=_run, coroutine=_arun, name=name)
+
+def _parse_time_window(start_time: str, end_time: str) -> Tuple[int, int]:
+    """HH:MM -> 分钟数，格式错误时抛出异常交由 Agent 提示模型修正参数"""
+    start_minute, end_minute = parse_minute_of_day(start_time), parse_minute_of_day(end_time)
+    if start_minute is None or end_minute is None:
+        raise ValueError(f"时间格式错误: {start_time} ~ {end_time}，应为 HH:MM")
+    return start_minute, end_minute
+
+@kg_tool
+def search_trains_by_station(station_name: str) -> Tuple[str, Dict[str, Any]]:
     """
     根据车站名称查询经过该车站的列车
     
@@ -24,22 +121,37 @@ def search_trains_by_station(station_name: str) -> str:
     Returns:
         JSON格式的列车信息列表
     """
-    query = """
-    MATCH (t:Train)-[:DEPARTS_FROM|ARRIVES_AT]->(s:Station)
+    # CJK 分词器按二元组建索引，单字无法命中全文索引，退回标签扫描
+    if len(station_name) < 2:
+        query = """
+        MATCH (t:Train)-[r:DEPARTS_FROM|ARRIVES_AT]->(s:Station)
+        WHERE s.station_name CONTAINS $station_name
+        RETURN DISTINCT t.train_number as 车次,
+               t.departure_time as 发车时间,
+               t.arrival_time as 到达时间,
+               s.station_name as 关联车站,
+               CASE type(r) WHEN 'DEPARTS_FROM' THEN 'Departure' ELSE 'Arrival' END as 车站类型
+        ORDER BY t.departure_time
+        """
+        return query, {"station_name": station_name}
+
+    # 全文索引召回候选车站，CONTAINS 二次过滤保证与子串匹配语义一致
+    query = f"""
+    CALL db.index.fulltext.queryNodes('{STATION_FULLTEXT_INDEX}', $station_phrase) YIELD node AS s
     WHERE s.station_name CONTAINS $station_name
+    MATCH (t:Train)-[r:DEPARTS_FROM|ARRIVES_AT]->(s)
     RETURN DISTINCT t.train_number as 车次,
            t.departure_time as 发车时间,
            t.arrival_time as 到达时间,
            s.station_name as 关联车站,
-           s.station_type as 车站类型
+           CASE type(r) WHEN 'DEPARTS_FROM' THEN 'Departure' ELSE 'Arrival' END as 车站类型
     ORDER BY t.departure_time
     """
     
-    results = kg_system.run_query(query, {"station_name": station_name})
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {"station_name": station_name, "station_phrase": fulltext_phrase(station_name)}
 
-@tool
-def get_train_details(train_number: str) -> str:
+@kg_tool
+def get_train_details(train_number: str) -> Tuple[str, Dict[str, Any]]:
     """
     获取特定列车的完整详细信息
     
@@ -65,11 +177,10 @@ def get_train_details(train_number: str) -> str:
            p.platform_number as 站台
     """
     
-    results = kg_system.run_query(query, {"train_number": train_number})
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {"train_number": train_number}
 
-@tool
-def find_trains_between_stations(departure_station: str, arrival_station: str) -> str:
+@kg_tool
+def find_trains_between_stations(departure_station: str, arrival_station: str) -> Tuple[str, Dict[str, Any]]:
     """
     查询两个车站之间的直达列车
     
@@ -91,41 +202,54 @@ def find_trains_between_stations(departure_station: str, arrival_station: str) -
     ORDER BY t.departure_time
     """
     
-    results = kg_system.run_query(query, {
+    return query, {
         "departure_station": departure_station,
         "arrival_station": arrival_station
-    })
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    }
 
-@tool
-def search_trains_by_time_range(start_time: str, end_time: str) -> str:
+@kg_tool
+def search_trains_by_time_range(start_time: str, end_time: str) -> Tuple[str, Dict[str, Any]]:
     """
     查询指定时间范围内的列车
     
     Args:
         start_time: 开始时间（格式：HH:MM，如：00:00）
-        end_time: 结束时间（格式：HH:MM，如：01:00）
+        end_time: 结束时间（格式：HH:MM，如：01:00）；早于开始时间表示跨零点，如 23:00 ~ 01:00
     
     Returns:
         JSON格式的列车信息
     """
-    query = """
-    MATCH (t:Train)
-    WHERE t.departure_time >= $start_time AND t.departure_time <= $end_time
-    RETURN t.train_number as 车次,
-           t.departure_time as 发车时间,
-           t.arrival_time as 到达时间
-    ORDER BY t.departure_time
-    """
-    
-    results = kg_system.run_query(query, {
-        "start_time": start_time,
-        "end_time": end_time
-    })
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    start_minute, end_minute = _parse_time_window(start_time, end_time)
+    if start_minute <= end_minute:
+        query = """
+        MATCH (t:Train)
+        WHERE t.departure_minute >= $start_minute AND t.departure_minute <= $end_minute
+        RETURN t.train_number as 车次,
+               t.departure_time as 发车时间,
+               t.arrival_time as 到达时间
+        ORDER BY t.departure_minute
+        """
+    else:
+        # 跨零点: 拆成两段索引范围查找, 按从开始时间起算的分钟数排序
+        query = """
+        CALL {
+            MATCH (t:Train) WHERE t.departure_minute >= $start_minute RETURN t
+            UNION ALL
+            MATCH (t:Train) WHERE t.departure_minute <= $end_minute RETURN t
+        }
+        RETURN t.train_number as 车次,
+               t.departure_time as 发车时间,
+               t.arrival_time as 到达时间
+        ORDER BY (t.departure_minute - $start_minute + 1440) % 1440
+        """
+    
+    return query, {
+        "start_minute": start_minute,
+        "end_minute": end_minute
+    }
 
-@tool
-def search_trains_by_train_type(train_type: str) -> str:
+@kg_tool
+def search_trains_by_train_type(train_type: str) -> Tuple[str, Dict[str, Any]]:
     """
     根据列车类型查询列车
     
@@ -144,11 +268,10 @@ def search_trains_by_train_type(train_type: str) -> str:
     ORDER BY t.departure_time
     """
     
-    results = kg_system.run_query(query, {"train_type": train_type})
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {"train_type": train_type}
 
-@tool
-def get_station_info(station_name: str) -> str:
+@kg_tool
+def get_station_info(station_name: str) -> Tuple[str, Dict[str, Any]]:
     """
     获取车站的详细信息
     
@@ -165,17 +288,20 @@ def get_station_info(station_name: str) -> str:
     OPTIONAL MATCH (t2:Train)-[:ARRIVES_AT]->(s)
     WITH s, departures, collect(DISTINCT t2.train_number) as arrivals
     RETURN s.station_name as 车站名称,
-           s.station_type as 车站类型,
+           CASE
+               WHEN size(departures) > 0 AND size(arrivals) > 0 THEN 'Departure/Arrival'
+               WHEN size(departures) > 0 THEN 'Departure'
+               ELSE 'Arrival'
+           END as 车站类型,
            departures as 始发列车,
            arrivals as 到达列车,
            size(departures) + size(arrivals) as 总车次
     """
     
-    results = kg_system.run_query(query, {"station_name": station_name})
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {"station_name": station_name}
 
-@tool
-def get_waiting_hall_info(hall_name: str) -> str:
+@kg_tool
+def get_waiting_hall_info(hall_name: str) -> Tuple[str, Dict[str, Any]]:
     """
     获取候车厅的详细信息
     
@@ -193,11 +319,10 @@ def get_waiting_hall_info(hall_name: str) -> str:
            count(DISTINCT t) as 列车数量
     """
     
-    results = kg_system.run_query(query, {"hall_name": hall_name})
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {"hall_name": hall_name}
 
-@tool
-def get_platform_info(platform_number: str) -> str:
+@kg_tool
+def get_platform_info(platform_number: str) -> Tuple[str, Dict[str, Any]]:
     """
     获取站台的详细信息
     
@@ -210,17 +335,16 @@ def get_platform_info(platform_number: str) -> str:
     query = """
     MATCH (p:Platform {platform_number: $platform_number})
     MATCH (t:Train)-[:STOPS_AT]->(p)
+    WITH p, t ORDER BY t.departure_time
     RETURN p.platform_number as 站台编号,
            collect(DISTINCT t.train_number) as 列车车次,
            count(DISTINCT t) as 列车数量
-    ORDER BY t.departure_time
     """
     
-    results = kg_system.run_query(query, {"platform_number": platform_number})
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {"platform_number": platform_number}
 
-@tool
-def get_ticket_gate_info(gate_number: str) -> str:
+@kg_tool
+def get_ticket_gate_info(gate_number: str) -> Tuple[str, Dict[str, Any]]:
     """
     获取检票口的详细信息
     
@@ -233,17 +357,16 @@ def get_ticket_gate_info(gate_number: str) -> str:
     query = """
     MATCH (g:TicketGate {gate_number: $gate_number})
     MATCH (t:Train)-[:CHECKS_AT]->(g)
+    WITH g, t ORDER BY t.departure_time
     RETURN g.gate_number as 检票口编号,
            collect(DISTINCT t.train_number) as 列车车次,
            count(DISTINCT t) as 列车数量
-    ORDER BY t.departure_time
     """
     
-    results = kg_system.run_query(query, {"gate_number": gate_number})
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {"gate_number": gate_number}
 
-@tool
-def get_all_stations() -> str:
+@kg_tool
+def get_all_stations() -> Tuple[str, Dict[str, Any]]:
     """
     获取所有车站的列表
     
@@ -252,16 +375,22 @@ def get_all_stations() -> str:
     """
     query = """
     MATCH (s:Station)
+    WITH s,
+         EXISTS { (s)<-[:DEPARTS_FROM]-() } as departs,
+         EXISTS { (s)<-[:ARRIVES_AT]-() } as arrives
     RETURN s.station_name as 车站名称,
-           s.station_type as 车站类型
+           CASE
+               WHEN departs AND arrives THEN 'Departure/Arrival'
+               WHEN departs THEN 'Departure'
+               ELSE 'Arrival'
+           END as 车站类型
     ORDER BY s.station_name
     """
     
-    results = kg_system.run_query(query)
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {}
 
-@tool
-def get_all_trains() -> str:
+@kg_tool
+def get_all_trains() -> Tuple[str, Dict[str, Any]]:
     """
     获取所有列车的列表
     
@@ -276,17 +405,16 @@ def get_all_trains() -> str:
     ORDER BY t.departure_time
     """
     
-    results = kg_system.run_query(query)
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, {}
 
-@tool
+@kg_tool
 def search_trains_by_multiple_conditions(
     departure_station: Optional[str] = None,
     arrival_station: Optional[str] = None,
     train_type: Optional[str] = None,
     start_time: Optional[str] = None,
     end_time: Optional[str] = None
-) -> str:
+) -> Tuple[str, Dict[str, Any]]:
     """
     根据多个条件组合查询列车
     
@@ -319,13 +447,20 @@ def search_trains_by_multiple_conditions(
         where_conditions.append("t.train_number STARTS WITH $train_type")
         parameters["train_type"] = train_type
     
-    if start_time:
-        where_conditions.append("t.departure_time >= $start_time")
-        parameters["start_time"] = start_time
-    
-    if end_time:
-        where_conditions.append("t.departure_time <= $end_time")
-        parameters["end_time"] = end_time
+    parameters["order_origin"] = 0
+    if start_time and end_time:
+        start_minute, end_minute = _parse_time_window(start_time, end_time)
+        operator = "AND" if start_minute <= end_minute else "OR" # 跨零点
+        where_conditions.append(f"(t.departure_minute >= $start_minute {operator} t.departure_minute <= $end_minute)")
+        parameters.update(start_minute=start_minute, end_minute=end_minute, order_origin=start_minute)
+    elif start_time:
+        start_minute, _ = _parse_time_window(start_time, start_time)
+        where_conditions.append("t.departure_minute >= $start_minute")
+        parameters.update(start_minute=start_minute, order_origin=start_minute)
+    elif end_time:
+        end_minute, _ = _parse_time_window(end_time, end_time)
+        where_conditions.append("t.departure_minute <= $end_minute")
+        parameters["end_minute"] = end_minute
     
     # 构建完整查询
     query = " ".join(query_parts)
@@ -333,14 +468,15 @@ def search_trains_by_multiple_conditions(
         query += " WHERE " + " AND ".join(where_conditions)
     
     query += """
-    RETURN DISTINCT t.train_number as 车次,
+    WITH DISTINCT t.train_number as 车次,
            t.departure_time as 发车时间,
-           t.arrival_time as 到达时间
-    ORDER BY t.departure_time
+           t.arrival_time as 到达时间,
+           t.departure_minute as departure_minute
+    RETURN 车次, 发车时间, 到达时间
+    ORDER BY (departure_minute - $order_origin + 1440) % 1440
     """
     
-    results = kg_system.run_query(query, parameters)
-    return json.dumps(results, ensure_ascii=False, indent=2)
+    return query, parameters
 
 @tool
 def get_current_date(format_type: str = "date") -> str:
@@ -0,0 +1,248 @@
+# station_resolver.py
+import json
+import time
+import asyncio
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Iterable
+
+from railmind.operators.logger import get_logger
+from railmind.function_call.kg_changes import kg_change_feed
+
+# 工具参数中表示车站名称的字段
+STATION_PARAMS = {"station_name", "departure_station", "arrival_station"}
+# 构建连续失败时重试间隔翻倍的上限（秒）
+MAX_RETRY_INTERVAL = 300.0
+
+
+class StationResolverUnavailable(RuntimeError):
+    """上次构建失败且仍在重试间隔内 --> 调用方按未启用解析处理，不再重复查询图谱"""
+
+
+@dataclass
+class StationResolution:
+    query: str
+    names: List[str] = field(default_factory=list)
+    method: str = "unresolved" # exact | normalized | city | prefix | fuzzy | unresolved
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein 编辑距离"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class StationResolver:
+    """
+    车站名称解析 --> 在工具执行前把 LLM 给出的车站参数映射为图谱中的规范站名
+
+    解析顺序（命中即返回）:
+        1. 精确匹配            北京西     -> [北京西]；北京 -> [北京]
+        2. 去后缀后精确匹配    北京西站   -> [北京西]；北京站 -> [北京]
+        3. 城市分组            成都       -> [成都东, 成都西]（仅当不存在与城市同名的车站）
+        4. 前缀树              乌鲁       -> [乌鲁木齐, 乌鲁木齐南]
+        5. 编辑距离兜底        成都四     -> [成都西]
+    """
+
+    SUFFIXES = ("火车站", "高铁站", "客运站", "车站", "站")
+    DIRECTIONS = ("东", "西", "南", "北")
+
+    def __init__(self, station_names: Iterable[str], max_candidates: int = 5, max_distance: int = 1):
+        self.max_candidates = max_candidates
+        self.max_distance = max_distance
+        self.names = list(dict.fromkeys(n for n in station_names if n))
+        self.name_set = set(self.names)
+        self.trie: Dict[str, Any] = {}
+        self.cities: Dict[str, List[str]] = {}
+        for name in self.names:
+            self._insert(name)
+            self.cities.setdefault(self.city_of(name), []).append(name)
+        self.stats: Dict[str, int] = {
+            "exact": 0, "normalized": 0, "city": 0, "prefix": 0, "fuzzy": 0, "unresolved": 0,
+            "rewritten_calls": 0,
+        }
+        self.logger = get_logger(name="StationResolver")
+
+    @classmethod
+    def from_tool_result(cls, result: str, **kwargs) -> "StationResolver":
+        """由 get_all_stations 的返回值构建"""
+        return cls((row["车站名称"] for row in json.loads(result)), **kwargs)
+
+    def _insert(self, name: str):
+        node = self.trie
+        for ch in name:
+            node = node.setdefault(ch, {})
+        node["$"] = name
+
+    def _prefix(self, prefix: str) -> List[str]:
+        node = self.trie
+        for ch in prefix:
+            if ch not in node:
+                return []
+            node = node[ch]
+        found, stack = [], [node]
+        while stack and len(found) < self.max_candidates:
+            current = stack.pop()
+            if "$" in current:
+                found.append(current["$"])
+            stack.extend(v for k, v in sorted(current.items(), reverse=True) if k != "$")
+        return found
+
+    def find_in_text(self, text: str) -> List[str]:
+        """在整句中查找出现的车站名（前缀树最长匹配）与城市名"""
+        found = []
+        for start in range(len(text)):
+            node, match = self.trie, None
+            for ch in text[start:]:
+                if ch not in node:
+                    break
+                node = node[ch]
+                match = node.get("$", match)
+            if match:
+                found.append(match)
+        found.extend(city for city in self.cities if len(city) >= 2 and city in text)
+        return list(dict.fromkeys(found))
+
+    def normalize(self, name: str) -> str:
+        """去除空白与 站/火车站 等后缀"""
+        name = "".join(name.split())
+        for suffix in self.SUFFIXES:
+            if name.endswith(suffix) and len(name) > len(suffix):
+                return name[:-len(suffix)]
+        return name
+
+    def city_of(self, name: str) -> str:
+        """北京西 -> 北京；至少保留两个字，避免 山西 -> 山"""
+        if len(name) > 2 and name.endswith(self.DIRECTIONS):
+            return name[:-1]
+        return name
+
+    def resolve(self, name: str) -> StationResolution:
+        resolution = self._resolve(name)
+        self.stats[resolution.method] += 1
+        return resolution
+
+    def _resolve(self, name: str) -> StationResolution:
+        if name in self.name_set:
+            return StationResolution(name, [name], "exact")
+        normalized = self.normalize(name)
+        if not normalized:
+            return StationResolution(name)
+        if normalized in self.name_set:
+            return StationResolution(name, [normalized], "normalized")
+        if normalized in self.cities:
+            return StationResolution(name, self.cities[normalized][:self.max_candidates], "city")
+        prefixed = self._prefix(normalized)
+        if prefixed:
+            return StationResolution(name, prefixed, "prefix")
+        if len(normalized) >= 2:
+            scored = sorted(
+                (edit_distance(normalized, n), n) for n in self.names
+                if abs(len(n) - len(normalized)) <= self.max_distance
+            )
+            best = [n for d, n in scored if d <= self.max_distance and d == scored[0][0]]
+            if best:
+                return StationResolution(name, best[:self.max_candidates], "fuzzy")
+        return StationResolution(name)
+
+    def expand(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        将参数中的车站字段解析为规范站名；某字段解析出多个站名时做笛卡尔积展开，
+        由调用方对每组参数分别执行工具再合并结果。未解析成功的字段保持原值。
+        """
+        choices = []
+        rewritten = False
+        for key, value in parameters.items():
+            if key in STATION_PARAMS and isinstance(value, str) and value:
+                names = self.resolve(value).names or [value]
+                rewritten = rewritten or names != [value]
+                choices.append([(key, n) for n in names])
+            else:
+                choices.append([(key, value)])
+        if rewritten:
+            self.stats["rewritten_calls"] += 1
+        variants = [dict(combo) for combo in itertools.product(*choices)]
+        return variants[:self.max_candidates]
+
+
+# 全局车站解析实例 --> 启动时由 get_all_stations 构建, 图谱重建后 reset
+_station_resolver: Optional[StationResolver] = None
+_build_lock = threading.Lock()
+# 构建失败记录 --> 重试间隔内直接抛出 StationResolverUnavailable，避免 Neo4j 不可用时每个请求都发起一次构建
+_failures = 0
+_retry_at = 0.0
+
+
+def _check_backoff():
+    if _failures and time.monotonic() < _retry_at:
+        raise StationResolverUnavailable(f"Station resolver build failed {_failures} time(s), retrying in {_retry_at - time.monotonic():.0f}s")
+
+
+def get_station_resolver() -> StationResolver:
+    """同步获取（未构建时同步查询图谱），事件循环中使用 aget_station_resolver"""
+    global _station_resolver, _failures, _retry_at
+    with _build_lock:
+        if _station_resolver is None:
+            _check_backoff()
+            from railmind.config import get_settings
+            from railmind.function_call.kg_tools import get_all_stations
+            settings = get_settings()
+            try:
+                result = get_all_stations.invoke({})
+            except Exception:
+                _failures += 1
+                _retry_at = time.monotonic() + min(settings.station_resolver_retry_interval * 2 ** (_failures - 1), MAX_RETRY_INTERVAL)
+                raise
+            _failures, _retry_at = 0, 0.0
+            _station_resolver = StationResolver.from_tool_result(
+                result,
+                max_candidates=settings.station_resolver_max_candidates,
+                max_distance=settings.station_resolver_max_distance,
+            )
+            _station_resolver.logger.info(f"Station resolver built with {len(_station_resolver.names)} stations")
+        return _station_resolver
+
+
+async def aget_station_resolver() -> StationResolver:
+    """未构建（或已被 reset）时在线程中构建，不阻塞事件循环；上次构建失败且在重试间隔内时抛出 StationResolverUnavailable"""
+    resolver = _station_resolver
+    if resolver is not None:
+        return resolver
+    _check_backoff()
+    return await asyncio.to_thread(get_station_resolver)
+
+
+def current_station_resolver() -> Optional[StationResolver]:
+    """已构建的实例，不触发构建"""
+    return _station_resolver
+
+
+def find_stations_in_text(text: str) -> List[str]:
+    """RewriteGate / AnswerCache 的 station_finder; 解析器尚未构建时抛出异常，由调用方按查不到实体处理"""
+    resolver = current_station_resolver()
+    if resolver is None:
+        raise RuntimeError("Station resolver is not built yet")
+    return resolver.find_in_text(text)
+
+
+def reset_station_resolver():
+    """图谱变更后丢弃实例并清除失败记录，下次使用时立即重建"""
+    global _station_resolver, _failures, _retry_at
+    _station_resolver = None
+    _failures, _retry_at = 0, 0.0
+
+
+def _on_kg_change(summary: Dict[str, Any]):
+    if summary.get("full_invalidation") or (summary.get("entities") or {}).get("station_name"):
+        reset_station_resolver()
+
+
+kg_change_feed.subscribe(_on_kg_change)
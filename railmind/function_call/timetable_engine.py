@@ -0,0 +1,392 @@
+# timetable_engine.py
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from railmind.operators.logger import get_logger
+from railmind.function_call.kg_changes import kg_change_feed
+from railmind.utils import parse_minute_of_day
+
+_MAX_CHAR = chr(0x10FFFF)
+MISSING_MINUTE = 1440
+
+
+def _unique(values: Iterable[Any]) -> List[Any]:
+    """去重并保持首次出现顺序 --> 对应 Cypher 的 collect(DISTINCT ...)"""
+    return list(dict.fromkeys(values))
+
+
+def _minute_or_missing(value: Any) -> int:
+    """缺失的分钟数记为 MISSING_MINUTE，范围查找时天然落在 [0, 1439] 之外"""
+    minute = parse_minute_of_day(value)
+    return MISSING_MINUTE if minute is None else minute
+
+
+def _hash_index(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """值 -> 行号数组"""
+    index: Dict[str, List[int]] = {}
+    for i, value in enumerate(values.tolist()):
+        index.setdefault(value, []).append(i)
+    return {k: np.asarray(v, dtype=np.int64) for k, v in index.items()}
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """边表 -> CSR 邻接 (indptr, targets)，同一源点内保持原始边顺序"""
+    order = np.argsort(sources, kind="stable")
+    counts = np.bincount(sources, minlength=size)
+    indptr = np.concatenate(([0], np.cumsum(counts)))
+    return indptr, targets[order]
+
+
+class TimetableEngine:
+    """
+    进程内列式时刻表引擎 --> 不经过 Neo4j 回答 kg_tools 中的全部 KG 查询
+
+    数据模型与 kg_builder 建出的图完全一致（节点主键、节点去重规则、关系重数），因此结果与 Cypher 版本一致:
+        - 节点属性以 NumPy 列存储
+        - 关系以 (源行号, 目标行号) 边表 + CSR 邻接存储
+        - 等值查询走哈希索引，时间范围 / 车次前缀走排序索引 + searchsorted
+    """
+
+    def __init__(self):
+        self.logger = get_logger(name="TimetableEngine")
+        self.loaded_rows = 0
+
+    @classmethod
+    def from_excel(cls, file_path: str) -> "TimetableEngine":
+        return cls.from_dataframe(pd.read_excel(file_path))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "TimetableEngine":
+        engine = cls()
+        engine._build(df)
+        return engine
+
+    def _build(self, df: pd.DataFrame):
+        # 与 kg_bulk_loader.add_row 相同的主键与去重规则: 车站按名称唯一, 关系按 (起点, 终点) 唯一
+        nodes: Dict[str, Dict[str, int]] = {"train": {}, "station": {}, "hall": {}, "gate": {}, "platform": {}}
+        train_cols: Dict[str, List[Any]] = {"number": [], "departure": [], "arrival": [], "departure_minute": [], "arrival_minute": []}
+        station_names: List[str] = []
+        hall_names: List[str] = []
+        gate_numbers: List[str] = []
+        platform_numbers: List[str] = []
+        edges: Dict[str, List[Tuple[int, int]]] = {"departs": [], "arrives": [], "waits": [], "checks": [], "stops": []}
+
+        def node_id(kind: str, key: str, create) -> int:
+            if key not in nodes[kind]:
+                nodes[kind][key] = len(nodes[kind])
+                create()
+            return nodes[kind][key]
+
+        for _, row in df.iterrows():
+            train_number = str(row['车次']).strip()
+            departure_time = str(row['开点'])
+            arrival_time = str(row['到点'])
+
+            t = node_id("train", f"train_{train_number.replace('/', '_')}_{departure_time}", lambda: (
+                train_cols["number"].append(train_number),
+                train_cols["departure"].append(departure_time),
+                train_cols["arrival"].append(arrival_time),
+                train_cols["departure_minute"].append(_minute_or_missing(row['开点'])),
+                train_cols["arrival_minute"].append(_minute_or_missing(row['到点'])),
+            ))
+
+            departure_station = str(row['始发站']).strip()
+            dep = node_id("station", f"station_{departure_station}", lambda: station_names.append(departure_station))
+            arrival_station = str(row['终到站']).strip()
+            arr = node_id("station", f"station_{arrival_station}", lambda: station_names.append(arrival_station))
+
+            for hall_name in str(row['候车厅']).split('，'):
+                hall_name = hall_name.strip()
+                if hall_name:
+                    h = node_id("hall", f"hall_{hall_name}", lambda: hall_names.append(hall_name))
+                    edges["waits"].append((t, h))
+
+            ticket_gate = str(row['检票口']).strip()
+            g = node_id("gate", f"gate_{ticket_gate}", lambda: gate_numbers.append(ticket_gate))
+            platform = str(row['站台']).strip()
+            p = node_id("platform", f"platform_{platform}", lambda: platform_numbers.append(platform))
+
+            edges["departs"].append((t, dep))
+            edges["arrives"].append((t, arr))
+            edges["checks"].append((t, g))
+            edges["stops"].append((t, p))
+
+        # 节点列
+        self.train_number = np.asarray(train_cols["number"], dtype=str)
+        self.train_departure = np.asarray(train_cols["departure"], dtype=str)
+        self.train_arrival = np.asarray(train_cols["arrival"], dtype=str)
+        self.train_departure_minute = np.asarray(train_cols["departure_minute"], dtype=np.int64)
+        self.train_arrival_minute = np.asarray(train_cols["arrival_minute"], dtype=np.int64)
+        self.station_name = np.asarray(station_names, dtype=str)
+        self.hall_name = np.asarray(hall_names, dtype=str)
+        self.gate_number = np.asarray(gate_numbers, dtype=str)
+        self.platform_number = np.asarray(platform_numbers, dtype=str)
+        n_trains = len(self.train_number)
+
+        # 关系边表 + 正反向 CSR 邻接
+        self.edges: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.out_adj: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.in_adj: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        target_sizes = {
+            "departs": len(self.station_name), "arrives": len(self.station_name),
+            "waits": len(self.hall_name), "checks": len(self.gate_number), "stops": len(self.platform_number),
+        }
+        for rel, pairs in edges.items():
+            arr = np.asarray(list(dict.fromkeys(pairs)), dtype=np.int64).reshape(-1, 2)
+            src, dst = arr[:, 0], arr[:, 1]
+            self.edges[rel] = (src, dst)
+            self.out_adj[rel] = _csr(src, dst, n_trains)
+            self.in_adj[rel] = _csr(dst, src, target_sizes[rel])
+
+        # 车站类型由关系推导: 同一车站可以既是始发站又是终到站
+        departs = np.diff(self.in_adj["departs"][0]) > 0
+        arrives = np.diff(self.in_adj["arrives"][0]) > 0
+        self.station_type = np.where(departs & arrives, "Departure/Arrival", np.where(departs, "Departure", "Arrival"))
+
+        # 哈希索引
+        self.train_by_number = _hash_index(self.train_number)
+        self.station_by_name = _hash_index(self.station_name)
+        self.hall_by_name = _hash_index(self.hall_name)
+        self.gate_by_number = _hash_index(self.gate_number)
+        self.platform_by_number = _hash_index(self.platform_number)
+
+        # 排序索引
+        self.departure_order = np.argsort(self.train_departure, kind="stable")
+        self.departure_sorted = self.train_departure[self.departure_order]
+        self.departure_rank = np.empty(n_trains, dtype=np.int64)
+        self.departure_rank[self.departure_order] = np.arange(n_trains)
+        self.minute_order = np.argsort(self.train_departure_minute, kind="stable")
+        self.minute_sorted = self.train_departure_minute[self.minute_order]
+        self.number_order = np.argsort(self.train_number, kind="stable")
+        self.number_sorted = self.train_number[self.number_order]
+        self.station_name_order = np.argsort(self.station_name, kind="stable")
+
+        self.loaded_rows = len(df)
+        self.logger.info(
+            f"Timetable loaded: {self.loaded_rows} rows, {n_trains} trains, {len(self.station_name)} stations"
+        )
+
+    # ------------------------------------------------------------------ helpers
+    def _neighbors(self, adj: Tuple[np.ndarray, np.ndarray], idx: int) -> np.ndarray:
+        indptr, targets = adj
+        return targets[indptr[idx]:indptr[idx + 1]]
+
+    def _by_departure(self, trains: np.ndarray) -> np.ndarray:
+        """按发车时间稳定排序 --> 对应 ORDER BY t.departure_time"""
+        return trains[np.argsort(self.departure_rank[trains], kind="stable")]
+
+    def _by_window(self, trains: np.ndarray, origin: int) -> np.ndarray:
+        """按从 origin 起算的分钟数稳定排序，缺失时间排在最后 --> 对应 ORDER BY (minute - origin + 1440) % 1440"""
+        minutes = self.train_departure_minute[trains]
+        keys = np.where(minutes == MISSING_MINUTE, MISSING_MINUTE, (minutes - origin) % 1440)
+        return trains[np.argsort(keys, kind="stable")]
+
+    def _minute_range(self, lo_minute: int, hi_minute: int) -> np.ndarray:
+        """departure_minute ∈ [lo_minute, hi_minute] 的列车，按分钟数升序"""
+        lo = np.searchsorted(self.minute_sorted, lo_minute, side="left")
+        hi = np.searchsorted(self.minute_sorted, hi_minute, side="right")
+        return self.minute_order[lo:max(lo, hi)]
+
+    @staticmethod
+    def _parse_time_window(start_time: str, end_time: str) -> Tuple[int, int]:
+        start_minute, end_minute = parse_minute_of_day(start_time), parse_minute_of_day(end_time)
+        if start_minute is None or end_minute is None:
+            raise ValueError(f"时间格式错误: {start_time} ~ {end_time}，应为 HH:MM")
+        return start_minute, end_minute
+
+    def _trains_to_stations(self, rel: str, station_name: str) -> np.ndarray:
+        """经 rel 关系连接到指定名称车站的列车（含关系重数）"""
+        stations = self.station_by_name.get(station_name)
+        if stations is None:
+            return np.empty(0, dtype=np.int64)
+        src, dst = self.edges[rel]
+        return src[np.isin(dst, stations)]
+
+    def _train_row(self, t: int) -> Dict[str, Any]:
+        return {
+            "车次": self.train_number[t].item(),
+            "发车时间": self.train_departure[t].item(),
+            "到达时间": self.train_arrival[t].item(),
+        }
+
+    def _distinct_rows(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """对应 RETURN DISTINCT"""
+        seen = {}
+        for row in rows:
+            seen.setdefault(tuple(row.values()), row)
+        return list(seen.values())
+
+    # ------------------------------------------------------------------ tools
+    def search_trains_by_station(self, station_name: str) -> List[Dict[str, Any]]:
+        station_mask = np.char.find(self.station_name, station_name) >= 0
+        src = np.concatenate([self.edges["departs"][0], self.edges["arrives"][0]])
+        dst = np.concatenate([self.edges["departs"][1], self.edges["arrives"][1]])
+        # 车站类型取自关系类型
+        types = np.repeat(["Departure", "Arrival"], [len(self.edges["departs"][0]), len(self.edges["arrives"][0])])
+        hit = station_mask[dst]
+        src, dst, types = src[hit], dst[hit], types[hit]
+        order = np.argsort(self.departure_rank[src], kind="stable")
+        rows = (
+            {
+                **self._train_row(t),
+                "关联车站": self.station_name[s].item(),
+                "车站类型": station_type,
+            }
+            for t, s, station_type in zip(src[order].tolist(), dst[order].tolist(), types[order].tolist())
+        )
+        return self._distinct_rows(rows)
+
+    def get_train_details(self, train_number: str) -> List[Dict[str, Any]]:
+        results = []
+        for t in self.train_by_number.get(train_number, np.empty(0, dtype=np.int64)).tolist():
+            departures = _unique(self.station_name[self._neighbors(self.out_adj["departs"], t)].tolist())
+            arrivals = _unique(self.station_name[self._neighbors(self.out_adj["arrives"], t)].tolist())
+            halls = _unique(self.hall_name[self._neighbors(self.out_adj["waits"], t)].tolist())
+            gates = _unique(self.gate_number[self._neighbors(self.out_adj["checks"], t)].tolist())
+            platforms = _unique(self.platform_number[self._neighbors(self.out_adj["stops"], t)].tolist())
+            for dep in departures:
+                for arr in arrivals:
+                    for gate in gates:
+                        for platform in platforms:
+                            results.append({
+                                "车次": self.train_number[t].item(),
+                                "始发站": dep,
+                                "终到站": arr,
+                                "发车时间": self.train_departure[t].item(),
+                                "到达时间": self.train_arrival[t].item(),
+                                "候车厅": halls,
+                                "检票口": gate,
+                                "站台": platform,
+                            })
+        return results
+
+    def find_trains_between_stations(self, departure_station: str, arrival_station: str) -> List[Dict[str, Any]]:
+        n_trains = len(self.train_number)
+        dep_counts = np.bincount(self._trains_to_stations("departs", departure_station), minlength=n_trains)
+        arr_counts = np.bincount(self._trains_to_stations("arrives", arrival_station), minlength=n_trains)
+        # 无 DISTINCT: 每个 (DEPARTS_FROM, ARRIVES_AT) 关系组合各产生一行
+        multiplicity = dep_counts * arr_counts
+        results = []
+        for t in self._by_departure(np.flatnonzero(multiplicity)).tolist():
+            row = {**self._train_row(t), "始发站": departure_station, "终到站": arrival_station}
+            results.extend(dict(row) for _ in range(int(multiplicity[t])))
+        return results
+
+    def search_trains_by_time_range(self, start_time: str, end_time: str) -> List[Dict[str, Any]]:
+        start_minute, end_minute = self._parse_time_window(start_time, end_time)
+        if start_minute <= end_minute:
+            trains = self._minute_range(start_minute, end_minute)
+        else:
+            # 跨零点: [start, 23:59] + [00:00, end]
+            trains = np.concatenate([self._minute_range(start_minute, 1439), self._minute_range(0, end_minute)])
+        return [self._train_row(t) for t in trains.tolist()]
+
+    def search_trains_by_train_type(self, train_type: str) -> List[Dict[str, Any]]:
+        lo = np.searchsorted(self.number_sorted, train_type, side="left")
+        hi = np.searchsorted(self.number_sorted, train_type + _MAX_CHAR, side="left")
+        trains = self._by_departure(self.number_order[lo:hi])
+        return [self._train_row(t) for t in trains.tolist()]
+
+    def get_station_info(self, station_name: str) -> List[Dict[str, Any]]:
+        results = []
+        for s in self.station_by_name.get(station_name, np.empty(0, dtype=np.int64)).tolist():
+            departures = _unique(self.train_number[self._neighbors(self.in_adj["departs"], s)].tolist())
+            arrivals = _unique(self.train_number[self._neighbors(self.in_adj["arrives"], s)].tolist())
+            results.append({
+                "车站名称": self.station_name[s].item(),
+                "车站类型": self.station_type[s].item(),
+                "始发列车": departures,
+                "到达列车": arrivals,
+                "总车次": len(departures) + len(arrivals),
+            })
+        return results
+
+    def _facility_info(self, rel: str, index: Dict[str, np.ndarray], value: str, name_key: str,
+                       ordered: bool) -> List[Dict[str, Any]]:
+        nodes = index.get(value)
+        if nodes is None:
+            return []
+        trains = np.concatenate([self._neighbors(self.in_adj[rel], n) for n in nodes.tolist()])
+        if len(trains) == 0:
+            return []
+        if ordered:
+            trains = self._by_departure(trains)
+        return [{
+            name_key: value,
+            "列车车次": _unique(self.train_number[trains].tolist()),
+            "列车数量": len(np.unique(trains)),
+        }]
+
+    def get_waiting_hall_info(self, hall_name: str) -> List[Dict[str, Any]]:
+        return self._facility_info("waits", self.hall_by_name, hall_name, "候车厅名称", ordered=False)
+
+    def get_platform_info(self, platform_number: str) -> List[Dict[str, Any]]:
+        return self._facility_info("stops", self.platform_by_number, platform_number, "站台编号", ordered=True)
+
+    def get_ticket_gate_info(self, gate_number: str) -> List[Dict[str, Any]]:
+        return self._facility_info("checks", self.gate_by_number, gate_number, "检票口编号", ordered=True)
+
+    def get_all_stations(self) -> List[Dict[str, Any]]:
+        return [
+            {"车站名称": self.station_name[s].item(), "车站类型": self.station_type[s].item()}
+            for s in self.station_name_order.tolist()
+        ]
+
+    def get_all_trains(self) -> List[Dict[str, Any]]:
+        return [self._train_row(t) for t in self.departure_order.tolist()]
+
+    def search_trains_by_multiple_conditions(
+        self,
+        departure_station: Optional[str] = None,
+        arrival_station: Optional[str] = None,
+        train_type: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        mask = np.ones(len(self.train_number), dtype=bool)
+        if departure_station:
+            mask &= np.isin(np.arange(len(mask)), self._trains_to_stations("departs", departure_station))
+        if arrival_station:
+            mask &= np.isin(np.arange(len(mask)), self._trains_to_stations("arrives", arrival_station))
+        if train_type:
+            mask &= np.char.startswith(self.train_number, train_type)
+        minutes = self.train_departure_minute
+        origin = 0
+        if start_time and end_time:
+            start_minute, end_minute = self._parse_time_window(start_time, end_time)
+            if start_minute <= end_minute:
+                mask &= (minutes >= start_minute) & (minutes <= end_minute)
+            else:
+                mask &= ((minutes >= start_minute) & (minutes != MISSING_MINUTE)) | (minutes <= end_minute)
+            origin = start_minute
+        elif start_time:
+            origin, _ = self._parse_time_window(start_time, start_time)
+            mask &= (minutes >= origin) & (minutes != MISSING_MINUTE)
+        elif end_time:
+            _, end_minute = self._parse_time_window(end_time, end_time)
+            mask &= minutes <= end_minute
+        trains = self._by_window(np.flatnonzero(mask), origin)
+        return self._distinct_rows(self._train_row(t) for t in trains.tolist())
+
+
+# 全局时刻表引擎实例 --> 首次使用时从 Excel 加载
+_timetable_engine: Optional[TimetableEngine] = None
+
+
+def get_timetable_engine() -> TimetableEngine:
+    global _timetable_engine
+    if _timetable_engine is None:
+        from railmind.config import get_settings
+        _timetable_engine = TimetableEngine.from_excel(get_settings().timetable_path)
+    return _timetable_engine
+
+
+def reset_timetable_engine(summary: Optional[Dict[str, Any]] = None):
+    """时刻表变更后丢弃当前实例, 下次使用时重新加载"""
+    global _timetable_engine
+    _timetable_engine = None
+
+
+kg_change_feed.subscribe(reset_timetable_engine)
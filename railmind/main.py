@@ -1,31 +1,70 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import uuid
 from datetime import datetime
 
 from railmind.api.routes import set_agent
 from railmind.agent.react_agent import ReActAgent
-from railmind.function_call.kg_tools import kg_system
+from railmind.function_call.kg_tools import kg_system, async_kg_system
+from railmind.function_call.kg_schema import KGSchemaManager
+from railmind.function_call.timetable_engine import get_timetable_engine
+from railmind.function_call.station_resolver import aget_station_resolver
 from railmind.operators.logger import get_logger
 from railmind.api.routes import router, set_agent
-from railmind.config import get_settings
+from railmind.api.admission import get_admission_controller
+from railmind.config import get_settings, Settings
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 
 agent: ReActAgent = None
 logger = get_logger(name="RailMind")
 
 
+def check_kg_schema(settings: Settings):
+    """检查 Neo4j 约束与索引; Neo4j 不可用时只告警，不影响启动（查询可退回 TimetableEngine）"""
+    logger.info("Checking KG Schema...")
+    schema_manager = KGSchemaManager(kg_system.run_query)
+    try:
+        missing = schema_manager.missing()
+        if missing and settings.neo4j_auto_schema:
+            schema_manager.ensure()
+            logger.info(f"KG Schema created: {missing}")
+        elif missing:
+            logger.warning(f"KG Schema missing (set NEO4J_AUTO_SCHEMA=true to create): {missing}")
+    except (ServiceUnavailable, SessionExpired) as e:
+        logger.warning(f"Neo4j unavailable, skipping KG Schema check: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     global agent
+    settings = get_settings()
+    # 同步的 Neo4j / Excel 读取放到线程中执行，不阻塞事件循环
+    if settings.kg_backend == "memory" or settings.kg_memory_fallback:
+        logger.info("Loading Timetable Engine...")
+        await asyncio.to_thread(get_timetable_engine)
+    if settings.kg_backend != "memory":
+        await asyncio.to_thread(check_kg_schema, settings)
+    if settings.station_resolver_enabled:
+        logger.info("Building Station Resolver...")
+        try:
+            await aget_station_resolver()
+        except (ServiceUnavailable, SessionExpired) as e:
+            logger.warning(f"Neo4j unavailable, Station Resolver will be built on first request: {e}")
     logger.info("Initializing ReAct Agent...")
     agent = ReActAgent()
     set_agent(agent)
     logger.info("ReAct Agent Initialization Complete")
+    if settings.admission_enabled:
+        await get_admission_controller().start()
     yield # The code before `yield` will execute when `main.py` starts; the code after `main.py` will execute when `main.py` closes.
+    if settings.admission_enabled:
+        await get_admission_controller().stop()
     logger.info("🔌Closing Database Connection...")
     kg_system.close()
+    await async_kg_system.close()
     logger.info("👋The Application is Closed.")
 
 
@@ -0,0 +1,180 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from railmind.operators.logger import get_logger
+from railmind.operators.rewrite_gate import TRAIN_NUMBER_PATTERN, REFERENTIAL_PATTERN, normalize_query
+from railmind.operators.rule_evaluator import requested_attributes, NEGATION_PATTERN
+
+# 依赖当前时间的查询 --> 答案随时钟变化，不缓存
+TEMPORAL_PATTERN = re.compile(r"今天|明天|后天|昨天|今晚|明早|现在|当前|目前|最近|马上|下一班|下一趟|还有|还能|几点了|今日|本周|这周")
+# 工具调用依赖当前时间
+CLOCK_FUNCTIONS = {"get_current_date"}
+
+
+def char_bigrams(text: str) -> frozenset:
+    return frozenset(text[i:i + 2] for i in range(len(text) - 1)) or frozenset([text])
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class AnswerCache:
+    """
+    整体答案缓存 --> ReActAgent.run 之前按规范化查询命中，直接返回上一次的答案
+
+    - 精确匹配: 去除空白/标点并转小写后的查询文本
+    - 近似匹配（similarity > 0，默认关闭）: 车次/车站/属性/数字/否定词完全一致的条目中，字符 2-gram Jaccard 相似度 >= similarity，
+      实体一致是前提，避免 K4547/6 的检票口 命中 K4545/8 的检票口；车站保留出现顺序，从A到B 不会命中 从B到A；
+      没有可用的车站查找（未启用 StationResolver 或查找失败）时只做精确匹配
+    - 条目带图谱版本 (kg_change_feed.version)，版本变化后失效
+    - 不缓存: 依赖时钟的查询（今天/现在/下一班...）、指代会话记忆的查询（它/这趟...）、调用了 get_current_date 的执行、出错的执行
+    """
+
+    def __init__(
+        self,
+        station_finder: Optional[Callable[[str], List[str]]] = None,
+        max_entries: int = 10000,
+        ttl: float = 3600,
+        similarity: float = 0.0,
+    ):
+        self.station_finder = station_finder
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_entities: Dict[Tuple, set] = {}
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "exact_hits": 0, "near_hits": 0, "misses": 0, "stale": 0, "uncacheable": 0, "bypassed": 0, "stored": 0}
+        self.logger = get_logger(name="AnswerCache")
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return normalize_query(query).lower()
+
+    def entity_key(self, query: str) -> Optional[Tuple]:
+        """近似匹配必须一致的部分: 车次、车站（按出现顺序）、查询属性、数字、否定词；无法识别车站时返回 None"""
+        if self.station_finder is None:
+            return None
+        try:
+            stations = self.station_finder(query)
+        except Exception as e:
+            self.logger.warning(f"Station lookup failed: {e}")
+            return None
+        return (
+            tuple(sorted(t.upper() for t in TRAIN_NUMBER_PATTERN.findall(query))),
+            tuple(sorted(dict.fromkeys(stations), key=lambda name: (query.find(name), -len(name)))),
+            tuple(name for name, _ in requested_attributes(query)),
+            tuple(re.findall(r"\d+", query)),
+            tuple(NEGATION_PATTERN.findall(query)),
+        )
+
+    @staticmethod
+    def cacheable_query(query: str) -> bool:
+        return not TEMPORAL_PATTERN.search(query) and not REFERENTIAL_PATTERN.search(query.strip())
+
+    def record_bypass(self):
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def get(self, query: str, kg_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not self.cacheable_query(query):
+            with self._lock:
+                self._stats["uncacheable"] += 1
+            return None
+        key = self.normalize(query)
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._valid(key, kg_version)
+            if entry is not None:
+                self._stats["exact_hits"] += 1
+                return entry
+        if self.similarity <= 0:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        grams, entity_key = char_bigrams(key), self.entity_key(query)
+        if entity_key is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            scored = [
+                (jaccard(grams, self._entries[candidate]["grams"]), candidate)
+                for candidate in self._by_entities.get(entity_key, ())
+            ]
+            for score, candidate in sorted(scored, reverse=True):
+                if score < self.similarity:
+                    break
+                entry = self._valid(candidate, kg_version)
+                if entry is not None:
+                    self._stats["near_hits"] += 1
+                    self.logger.info(f"Near-duplicate answer cache hit ({score:.2f}): {query} ~ {entry['query']}")
+                    return entry
+            self._stats["misses"] += 1
+        return None
+
+    def _valid(self, key: str, kg_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """调用方需持有锁；过期或图谱版本不一致的条目被删除"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["kg_version"] != kg_version or entry["expire_at"] <= time.monotonic():
+            self._remove(key)
+            self._stats["stale"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, query: str, kg_version: Optional[str], final_state: Dict[str, Any]) -> bool:
+        if not self.cacheable_query(query) or final_state.get("error") or not final_state.get("final_answer"):
+            return False
+        for sub_query in final_state.get("sub_queries", []):
+            functions = (sub_query.get("exe_process_data") or {}).get("exec_func_info", [])
+            if any(f.get("name") in CLOCK_FUNCTIONS for f in functions):
+                return False
+        key = self.normalize(query)
+        entry = {
+            "query": query,
+            "final_answer": final_state["final_answer"],
+            "final_answer_metadata": final_state.get("final_answer_metadata", {}),
+            "kg_version": kg_version,
+            "expire_at": time.monotonic() + self.ttl,
+            "grams": char_bigrams(key),
+            "entity_key": self.entity_key(query) if self.similarity > 0 else None,
+        }
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            if entry["entity_key"] is not None:
+                self._by_entities.setdefault(entry["entity_key"], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._stats["stored"] += 1
+        return True
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        keys = self._by_entities.get(entry["entity_key"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_entities[entry["entity_key"]]
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._by_entities.clear()
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["lookups"]
+            hits = self._stats["exact_hits"] + self._stats["near_hits"]
+            return {**self._stats, "entries": len(self._entries), "hit_rate": hits / lookups if lookups else 0.0}
@@ -0,0 +1,75 @@
+import re
+import threading
+from typing import Dict, Any, List, Optional
+
+from railmind.operators.logger import get_logger
+from railmind.operators.rule_evaluator import requested_attributes, NEGATION_PATTERN
+from railmind.utils import parse_minute_of_day
+
+# 属性之外的诉求（时长、列表、判断、票价...）交给 LLM
+UNSUPPORTED_PATTERN = re.compile(r"多长|多久|时长|历时|耗时|哪些|几趟|多少趟|几个|几班|是否|能不能|可不可以|有没有|票价|价格|余票")
+TIME_ATTRIBUTES = {"发车时间", "到达时间"}
+ATTRIBUTE_LABELS = {"发车时间": "开点", "到达时间": "到点"}
+
+
+def format_value(name: str, value: Any) -> str:
+    if isinstance(value, list):
+        return "，".join(str(v) for v in value if v not in (None, ""))
+    if name in TIME_ATTRIBUTES:
+        minute = parse_minute_of_day(value)
+        if minute is not None:
+            return f"{minute // 60}:{minute % 60:02d}"
+    return str(value)
+
+
+class AnswerComposer:
+    """
+    属性查询的模板答案 --> 单个子查询、查询只要求一个属性、工具返回唯一一条记录且包含该属性时，直接按模板渲染，跳过 _generate_answer 的 LLM 调用
+    多子查询/多记录/多属性/否定句的答案仍交给 LLM 组织语言
+    """
+
+    def __init__(self):
+        self.logger = get_logger(name="AnswerComposer")
+        self._lock = threading.Lock()
+        self._stats = {"template": 0, "llm": 0}
+
+    @staticmethod
+    def _single_record(sub_query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        observations = (sub_query.get("exe_process_data") or {}).get("observations") or []
+        last = observations[-1] if observations else None
+        result = last.get("result") if isinstance(last, dict) else None
+        if isinstance(result, list) and len(result) == 1 and isinstance(result[0], dict):
+            return result[0]
+        if isinstance(result, dict) and not result.get("error"):
+            return result
+        return None
+
+    def render(self, query: str, sub_queries: List[Dict[str, Any]]) -> Optional[str]:
+        if len(sub_queries) != 1 or UNSUPPORTED_PATTERN.search(query) or NEGATION_PATTERN.search(query):
+            return None
+        record = self._single_record(sub_queries[0])
+        attributes = requested_attributes(query)
+        # 匹配到多个属性时关键词可能误匹配，交给 LLM
+        if record is None or len(attributes) != 1:
+            return None
+        name, columns = attributes[0]
+        column = next((c for c in columns if record.get(c) not in (None, "", [])), None)
+        if column is None:
+            return None
+
+        subject = f"{record['车次']}次列车" if record.get("车次") else "该列车"
+        return f"{subject}的{ATTRIBUTE_LABELS.get(name, name)}是{format_value(name, record[column])}。"
+
+    def compose(self, query: str, sub_queries: List[Dict[str, Any]]) -> Optional[str]:
+        """返回模板答案；无法用模板回答时返回 None 并计为 llm"""
+        answer = self.render(query, sub_queries)
+        with self._lock:
+            self._stats["template" if answer is not None else "llm"] += 1
+        if answer is not None:
+            self.logger.info(f"Template answer: {answer}")
+        return answer
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._stats["template"] + self._stats["llm"]
+            return {**self._stats, "template_rate": self._stats["template"] / total if total else 0.0}
@@ -1,12 +1,61 @@
 import pandas as pd
-from py2neo import Graph, Node, Relationship, NodeMatcher
+import httpx
+from py2neo import Graph, Node, NodeMatcher
 import re
+import sys
 from datetime import datetime
 
+from railmind.function_call.kg_schema import KGSchemaManager
+from railmind.operators.build_kg.kg_bulk_loader import BulkKGLoader, DEFAULT_BATCH_SIZE
+from railmind.operators.build_kg.kg_delta_sync import KGDeltaSync, build_manifest, manifest_version
+from railmind.utils import parse_minute_of_day
+
 NEO4J_URI = "bolt://172.16.107.15:7687"
 NEO4J_USER = "neo4j" 
 NEO4J_PASSWORD = "MyStrongPassword123"
 
+def station_migration_queries(batch_size=10000):
+    """
+    旧模型 --> 规范车站模型的迁移语句:
+    1. 按 station_name 创建规范节点 station_{name}
+    2. 将 DEPARTS_FROM/ARRIVES_AT 改挂到规范节点，并把开点/到点/检票口/站台写到关系上
+    3. 删除旧的逐行 Station 节点
+    """
+    return [
+        """
+        MATCH (s:Station)
+        WITH DISTINCT s.station_name AS name
+        MERGE (c:Station {station_id: 'station_' + name})
+        ON CREATE SET c.station_name = name
+        """,
+        f"""
+        MATCH (t:Train)-[r:DEPARTS_FROM|ARRIVES_AT]->(s:Station)
+        WHERE s.station_id <> 'station_' + s.station_name
+        CALL {{
+            WITH t, r, s
+            MATCH (c:Station {{station_id: 'station_' + s.station_name}})
+            OPTIONAL MATCH (t)-[:CHECKS_AT]->(g:TicketGate)
+            OPTIONAL MATCH (t)-[:STOPS_AT]->(p:Platform)
+            WITH t, r, c, type(r) AS rel_type,
+                 head(collect(g.gate_number)) AS gate_number,
+                 head(collect(p.platform_number)) AS platform_number
+            FOREACH (_ IN CASE rel_type WHEN 'DEPARTS_FROM' THEN [1] ELSE [] END |
+                MERGE (t)-[n:DEPARTS_FROM]->(c)
+                SET n.departure_time = t.departure_time, n.gate_number = gate_number, n.platform_number = platform_number)
+            FOREACH (_ IN CASE rel_type WHEN 'ARRIVES_AT' THEN [1] ELSE [] END |
+                MERGE (t)-[n:ARRIVES_AT]->(c)
+                SET n.arrival_time = t.arrival_time)
+            DELETE r
+        }} IN TRANSACTIONS OF {int(batch_size)} ROWS
+        """,
+        f"""
+        MATCH (s:Station)
+        WHERE s.station_id <> 'station_' + s.station_name
+        CALL {{ WITH s DETACH DELETE s }} IN TRANSACTIONS OF {int(batch_size)} ROWS
+        """,
+    ]
+
+
 class TrainKnowledgeGraph:
     def __init__(self):
         try:
@@ -23,6 +72,43 @@ class TrainKnowledgeGraph:
         except Exception as e:
             print(f"清空数据库失败: {e}")
     
+    def ensure_schema(self):
+        """创建唯一性约束、范围索引与全文索引 --> 建图前执行，使 MERGE/查询走索引"""
+        try:
+            schema_manager = KGSchemaManager(lambda query, parameters=None: self.graph.run(query, parameters or {}).data())
+            created = schema_manager.ensure()
+            print(f"Schema已就绪，本次新建: {created if created else '无'}")
+        except Exception as e:
+            print(f"创建Schema失败: {e}")
+            raise
+
+    def backfill_time_minutes(self):
+        """为旧图谱中缺少 departure_minute/arrival_minute 的 Train 节点补齐整数分钟属性"""
+        try:
+            result = self.graph.run("""
+            MATCH (t:Train)
+            WHERE t.departure_minute IS NULL OR t.arrival_minute IS NULL
+            WITH t, split(replace(t.departure_time, '：', ':'), ':') AS d, split(replace(t.arrival_time, '：', ':'), ':') AS a
+            SET t.departure_minute = (toInteger(d[0]) * 60 + toInteger(d[1])) % 1440,
+                t.arrival_minute = (toInteger(a[0]) * 60 + toInteger(a[1])) % 1440
+            RETURN count(t) AS updated
+            """).data()
+            print(f"已补齐时间分钟属性: {result[0]['updated']} 个列车节点")
+        except Exception as e:
+            print(f"补齐时间分钟属性失败: {e}")
+            raise
+
+    def migrate_canonical_stations(self, batch_size=10000):
+        """将旧图谱中"每行一个 Station 节点"迁移为"每个车站一个节点", 可重复执行"""
+        try:
+            for query in station_migration_queries(batch_size):
+                self.graph.run(query)
+            stations = self.graph.run("MATCH (s:Station) RETURN count(s) AS stations").data()
+            print(f"车站节点迁移完成: 规范车站 {stations[0]['stations']} 个")
+        except Exception as e:
+            print(f"车站节点迁移失败: {e}")
+            raise
+
     def read_excel_data(self, file_path):
         try:
             df = pd.read_excel(file_path)
@@ -32,7 +118,42 @@ class TrainKnowledgeGraph:
             print(f"读取Excel文件失败: {e}")
             return None
     
+    def bulk_load(self, df, batch_size=DEFAULT_BATCH_SIZE, manifest_path=None):
+        """批量 UNWIND ... MERGE 建图, 可重复执行; 写入 manifest 供后续增量同步使用"""
+        loader = BulkKGLoader(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, batch_size=batch_size)
+        try:
+            summary = loader.load_dataframe(df)
+            manifest = build_manifest(df)
+            if manifest_path:
+                KGDeltaSync(loader, manifest_path).save_manifest(manifest)
+            summary["kg_version"] = manifest_version(manifest)
+            summary["full_invalidation"] = True
+            return summary
+        finally:
+            loader.close()
+
+    def delta_sync(self, df, manifest_path, batch_size=DEFAULT_BATCH_SIZE):
+        """与上次加载的 manifest 对比, 只写入新增/更新/删除的列车"""
+        loader = BulkKGLoader(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, batch_size=batch_size)
+        try:
+            return KGDeltaSync(loader, manifest_path).sync(df)
+        finally:
+            loader.close()
+
+    def notify_changes(self, api_base_url, summary):
+        """将变更摘要推送给在线服务, 由其失效 KG 工具缓存等"""
+        try:
+            response = httpx.post(f"{api_base_url}/api/kg/changes", json=summary, timeout=30)
+            response.raise_for_status()
+            print(f"已通知服务端图谱变更: {response.json()}")
+        except Exception as e:
+            print(f"通知服务端图谱变更失败: {e}")
+
+    def _merge_relationship(self, rel_type, src_key, dst_key, properties=None):
+        self.graph.run(BulkKGLoader.relationship_query(rel_type), rows=[{"src": src_key, "dst": dst_key, "props": properties or {}}])
+
     def create_nodes_and_relationships(self, df):
+        """逐行建图（旧实现, 使用 --legacy 启用）: 节点 graph.create，关系 MERGE"""
         created_nodes = {}
         
         for idx, row in df.iterrows():
@@ -46,7 +167,9 @@ class TrainKnowledgeGraph:
                         train_id=train_key,
                         train_number=train_number,
                         departure_time=str(row['开点']),
-                        arrival_time=str(row['到点'])
+                        arrival_time=str(row['到点']),
+                        departure_minute=parse_minute_of_day(row['开点']),
+                        arrival_minute=parse_minute_of_day(row['到点'])
                     )
                     self.graph.create(train_node)
                     created_nodes[train_key] = train_node
@@ -54,14 +177,14 @@ class TrainKnowledgeGraph:
                 else:
                     train_node = created_nodes[train_key]
                 
+                # 车站按名称唯一，每趟列车的开点/到点/检票口/站台记录在关系上
                 departure_station = str(row['始发站']).strip()
-                departure_key = f"station_{departure_station}_{str(row['开点'])}_{str(row['到点'])}_{str(row['检票口'])}_{str(row['站台'])}"
+                departure_key = f"station_{departure_station}"
                 if departure_key not in created_nodes:
                     departure_node = Node(
                         "Station",
                         station_id=departure_key,
-                        station_name=departure_station,
-                        station_type="Departure"
+                        station_name=departure_station
                     )
                     self.graph.create(departure_node)
                     created_nodes[departure_key] = departure_node
@@ -69,13 +192,12 @@ class TrainKnowledgeGraph:
                     departure_node = created_nodes[departure_key]
                 
                 arrival_station = str(row['终到站']).strip()
-                arrival_key = f"station_{arrival_station}_{str(row['开点'])}_{str(row['到点'])}_{str(row['检票口'])}_{str(row['站台'])}"
+                arrival_key = f"station_{arrival_station}"
                 if arrival_key not in created_nodes:
                     arrival_node = Node(
                         "Station",
                         station_id=arrival_key,
-                        station_name=arrival_station,
-                        station_type="Arrival"
+                        station_name=arrival_station
                     )
                     self.graph.create(arrival_node)
                     created_nodes[arrival_key] = arrival_node
@@ -98,8 +220,7 @@ class TrainKnowledgeGraph:
                             created_nodes[hall_key] = hall_node
                         else:
                             hall_node = created_nodes[hall_key]
-                        waits_at = Relationship(train_node, "WAITS_AT", hall_node)
-                        self.graph.create(waits_at)
+                        self._merge_relationship("WAITS_AT", train_key, hall_key)
                 
                 ticket_gate = str(row['检票口']).strip()
                 gate_key = f"gate_{ticket_gate}"
@@ -129,19 +250,15 @@ class TrainKnowledgeGraph:
                 else:
                     platform_node = created_nodes[platform_key]
 
-                departs_from = Relationship(train_node, "DEPARTS_FROM", departure_node,
-                                        departure_time=str(row['开点']))
-                self.graph.create(departs_from)
-                
-                arrives_at = Relationship(train_node, "ARRIVES_AT", arrival_node,
-                                        arrival_time=str(row['到点']))
-                self.graph.create(arrives_at)
-                
-                checks_at = Relationship(train_node, "CHECKS_AT", gate_node)
-                self.graph.create(checks_at)
-                
-                stops_at = Relationship(train_node, "STOPS_AT", platform_node)
-                self.graph.create(stops_at)
+                # 关系按 (起点, 终点, 类型) MERGE，重复行不会产生重复关系，与 BulkKGLoader 一致
+                self._merge_relationship("DEPARTS_FROM", train_key, departure_key, {
+                    "departure_time": str(row['开点']),
+                    "gate_number": ticket_gate,
+                    "platform_number": platform,
+                })
+                self._merge_relationship("ARRIVES_AT", train_key, arrival_key, {"arrival_time": str(row['到点'])})
+                self._merge_relationship("CHECKS_AT", train_key, gate_key)
+                self._merge_relationship("STOPS_AT", train_key, platform_key)
                 
             except Exception as e:
                 print(f"处理第{idx+1}行数据时出错: {e}")
@@ -150,11 +267,40 @@ class TrainKnowledgeGraph:
 
 def main():
     kg = TrainKnowledgeGraph()
+    if "--backfill-minutes" in sys.argv:
+        kg.ensure_schema()
+        kg.backfill_time_minutes()
+        return
+    if "--migrate-stations" in sys.argv:
+        kg.migrate_canonical_stations()
+        if "--notify" in sys.argv:
+            kg.notify_changes(sys.argv[sys.argv.index("--notify") + 1], {"full_invalidation": True})
+        return
     
-    kg.clear_database()
     excel_path = "/data/lzm/AgentDev/RailMind/data/raw_data.xlsx" 
-    df = kg.read_excel_data(excel_path)
-    kg.create_nodes_and_relationships(df)
+    manifest_path = "/data/lzm/AgentDev/RailMind/data/kg_manifest.json"
+    if "--manifest" in sys.argv:
+        manifest_path = sys.argv[sys.argv.index("--manifest") + 1]
+    batch_size = DEFAULT_BATCH_SIZE
+    if "--batch-size" in sys.argv:
+        batch_size = int(sys.argv[sys.argv.index("--batch-size") + 1])
+    # 增量同步: 不清库, 只写入变化的列车
+    if "--delta" in sys.argv:
+        kg.ensure_schema()
+        df = kg.read_excel_data(excel_path)
+        summary = kg.delta_sync(df, manifest_path, batch_size=batch_size)
+    else:
+        # 批量加载按唯一键 MERGE, --no-clear 时可在已有图谱上重复执行
+        if "--no-clear" not in sys.argv:
+            kg.clear_database()
+        kg.ensure_schema()
+        df = kg.read_excel_data(excel_path)
+        if "--legacy" in sys.argv:
+            kg.create_nodes_and_relationships(df)
+            return
+        summary = kg.bulk_load(df, batch_size=batch_size, manifest_path=manifest_path)
+    if "--notify" in sys.argv:
+        kg.notify_changes(sys.argv[sys.argv.index("--notify") + 1], summary)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,186 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Tuple
+
+import pandas as pd
+from neo4j import GraphDatabase
+
+from railmind.utils import parse_minute_of_day
+
+DEFAULT_BATCH_SIZE = 5000
+
+# 标签 -> 唯一键属性（与 kg_schema.CONSTRAINTS 一致）
+NODE_KEYS = {
+    "Train": "train_id",
+    "Station": "station_id",
+    "WaitingHall": "hall_id",
+    "TicketGate": "gate_id",
+    "Platform": "platform_id",
+}
+
+# 关系类型 -> (起点标签, 终点标签)
+REL_ENDPOINTS = {
+    "DEPARTS_FROM": ("Train", "Station"),
+    "ARRIVES_AT": ("Train", "Station"),
+    "WAITS_AT": ("Train", "WaitingHall"),
+    "CHECKS_AT": ("Train", "TicketGate"),
+    "STOPS_AT": ("Train", "Platform"),
+}
+
+
+@dataclass
+class GraphBatches:
+    """内存中的建图批次: 节点按唯一键去重, 关系按 (起点, 终点) 去重"""
+    nodes: Dict[str, Dict[str, Dict[str, Any]]] = field(default_factory=lambda: {label: {} for label in NODE_KEYS})
+    relationships: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = field(default_factory=lambda: {rel: {} for rel in REL_ENDPOINTS})
+    rows: int = 0
+
+    def add_node(self, label: str, properties: Dict[str, Any]) -> str:
+        key = properties[NODE_KEYS[label]]
+        # 首次出现的属性生效
+        self.nodes[label].setdefault(key, properties)
+        return key
+
+    def add_relationship(self, rel_type: str, src: str, dst: str, properties: Dict[str, Any] = None):
+        self.relationships[rel_type][(src, dst)] = properties or {}
+
+
+def add_row(batches: GraphBatches, row: pd.Series):
+    """展开一行时刻表 --> 车站按名称唯一, 每趟列车的开点/到点/检票口/站台记录在关系上"""
+    train_number = str(row['车次']).strip()
+    departure_time = str(row['开点'])
+    arrival_time = str(row['到点'])
+    ticket_gate = str(row['检票口']).strip()
+    platform = str(row['站台']).strip()
+
+    train_key = batches.add_node("Train", {
+        "train_id": f"train_{train_number.replace('/', '_')}_{departure_time}",
+        "train_number": train_number,
+        "departure_time": departure_time,
+        "arrival_time": arrival_time,
+        "departure_minute": parse_minute_of_day(row['开点']),
+        "arrival_minute": parse_minute_of_day(row['到点']),
+    })
+    departure_station = str(row['始发站']).strip()
+    departure_key = batches.add_node("Station", {
+        "station_id": f"station_{departure_station}",
+        "station_name": departure_station,
+    })
+    arrival_station = str(row['终到站']).strip()
+    arrival_key = batches.add_node("Station", {
+        "station_id": f"station_{arrival_station}",
+        "station_name": arrival_station,
+    })
+    for hall_name in str(row['候车厅']).split('，'):
+        hall_name = hall_name.strip()
+        if hall_name:
+            hall_key = batches.add_node("WaitingHall", {"hall_id": f"hall_{hall_name}", "hall_name": hall_name})
+            batches.add_relationship("WAITS_AT", train_key, hall_key)
+    gate_key = batches.add_node("TicketGate", {"gate_id": f"gate_{ticket_gate}", "gate_number": ticket_gate})
+    platform_key = batches.add_node("Platform", {"platform_id": f"platform_{platform}", "platform_number": platform})
+
+    batches.add_relationship("DEPARTS_FROM", train_key, departure_key, {
+        "departure_time": departure_time,
+        "gate_number": ticket_gate,
+        "platform_number": platform,
+    })
+    batches.add_relationship("ARRIVES_AT", train_key, arrival_key, {"arrival_time": arrival_time})
+    batches.add_relationship("CHECKS_AT", train_key, gate_key)
+    batches.add_relationship("STOPS_AT", train_key, platform_key)
+    batches.rows += 1
+
+
+def build_graph_batches(df: pd.DataFrame) -> GraphBatches:
+    batches = GraphBatches()
+    for idx, row in df.iterrows():
+        try:
+            add_row(batches, row)
+        except Exception as e:
+            print(f"处理第{idx+1}行数据时出错: {e}")
+            raise
+    return batches
+
+
+def chunked(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkKGLoader:
+    """
+    批量建图 --> 以参数化 UNWIND ... MERGE 按批提交, 替代逐节点/逐关系的 graph.create 往返
+
+    - 节点按唯一键 MERGE、关系按 (起点, 终点, 类型) MERGE, 重复执行不会产生重复数据
+    - 依赖 kg_schema 中的唯一性约束, 使 MERGE/MATCH 走索引查找, 加载前需先 ensure_schema()
+    """
+
+    def __init__(self, uri: str, user: str, password: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.batch_size = batch_size
+
+    def close(self):
+        self.driver.close()
+
+    @staticmethod
+    def node_query(label: str) -> str:
+        key = NODE_KEYS[label]
+        return f"""
+        UNWIND $rows AS row
+        MERGE (n:{label} {{{key}: row.{key}}})
+        SET n += row
+        """
+
+    @staticmethod
+    def relationship_query(rel_type: str) -> str:
+        src_label, dst_label = REL_ENDPOINTS[rel_type]
+        return f"""
+        UNWIND $rows AS row
+        MATCH (a:{src_label} {{{NODE_KEYS[src_label]}: row.src}})
+        MATCH (b:{dst_label} {{{NODE_KEYS[dst_label]}: row.dst}})
+        MERGE (a)-[r:{rel_type}]->(b)
+        SET r += row.props
+        """
+
+    def _write(self, query: str, rows: List[Dict[str, Any]]):
+        with self.driver.session() as session:
+            for batch in chunked(rows, self.batch_size):
+                session.execute_write(lambda tx: tx.run(query, rows=batch).consume())
+
+    def write(self, tx, batches: GraphBatches):
+        """在调用方的事务中写入节点与关系 --> 增量同步把删除旧列车与重新写入放在同一事务"""
+        for label, nodes in batches.nodes.items():
+            for batch in chunked(list(nodes.values()), self.batch_size):
+                tx.run(self.node_query(label), rows=batch).consume()
+        for rel_type, rels in batches.relationships.items():
+            rows = [{"src": src, "dst": dst, "props": props} for (src, dst), props in rels.items()]
+            for batch in chunked(rows, self.batch_size):
+                tx.run(self.relationship_query(rel_type), rows=batch).consume()
+
+    def load(self, batches: GraphBatches) -> Dict[str, Any]:
+        """写入节点与关系, 返回各类型数量与吞吐"""
+        start = time.perf_counter()
+        summary: Dict[str, Any] = {}
+        for label, nodes in batches.nodes.items():
+            self._write(self.node_query(label), list(nodes.values()))
+            summary[label] = len(nodes)
+        for rel_type, rels in batches.relationships.items():
+            rows = [{"src": src, "dst": dst, "props": props} for (src, dst), props in rels.items()]
+            self._write(self.relationship_query(rel_type), rows)
+            summary[rel_type] = len(rows)
+        elapsed = time.perf_counter() - start
+        summary["rows"] = batches.rows
+        summary["seconds"] = round(elapsed, 3)
+        summary["rows_per_sec"] = round(batches.rows / elapsed, 1) if elapsed > 0 else 0.0
+        return summary
+
+    def load_dataframe(self, df: pd.DataFrame) -> Dict[str, Any]:
+        build_start = time.perf_counter()
+        batches = build_graph_batches(df)
+        build_seconds = time.perf_counter() - build_start
+        summary = self.load(batches)
+        summary["build_seconds"] = round(build_seconds, 3)
+        print(
+            f"批量建图完成: {summary['rows']} 行, 写入 {summary['seconds']}s, "
+            f"{summary['rows_per_sec']} rows/sec (batch_size={self.batch_size})"
+        )
+        return summary
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+
+from railmind.operators.build_kg.kg_bulk_loader import BulkKGLoader, build_graph_batches, chunked
+
+# 参与指纹计算的时刻表列
+SOURCE_COLUMNS = ["车次", "始发站", "终到站", "开点", "到点", "候车厅", "检票口", "站台"]
+ENTITY_KINDS = ["train_number", "station_name", "hall_name", "gate_number", "platform_number"]
+
+DELETE_TRAINS_QUERY = """
+UNWIND $ids AS id
+MATCH (t:Train {train_id: id})
+OPTIONAL MATCH (t)-->(n)
+WITH collect(DISTINCT elementId(n)) AS neighbours, collect(DISTINCT t) AS trains
+FOREACH (t IN trains | DETACH DELETE t)
+RETURN neighbours
+"""
+
+# 删除列车后不再被任何列车引用的车站/候车厅/检票口/站台
+DELETE_ORPHANS_QUERY = """
+UNWIND $neighbours AS nid
+MATCH (n) WHERE elementId(n) = nid AND NOT EXISTS { (n)--() }
+DELETE n
+"""
+
+
+def natural_key(row: pd.Series) -> str:
+    """车次 + 开点, 与 Train 节点的 train_id 一致"""
+    return f"train_{str(row['车次']).strip().replace('/', '_')}_{str(row['开点'])}"
+
+
+def row_entities(row: pd.Series) -> Dict[str, List[str]]:
+    return {
+        "train_number": [str(row['车次']).strip()],
+        "station_name": [str(row['始发站']).strip(), str(row['终到站']).strip()],
+        "hall_name": [h.strip() for h in str(row['候车厅']).split('，') if h.strip()],
+        "gate_number": [str(row['检票口']).strip()],
+        "platform_number": [str(row['站台']).strip()],
+    }
+
+
+def build_manifest(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    train_id -> {"fingerprint", "entities"}
+    同一自然键出现多行时，按出现顺序合并计算指纹
+    """
+    manifest: Dict[str, Dict[str, Any]] = {}
+    digests: Dict[str, Any] = {}
+    for _, row in df.iterrows():
+        key = natural_key(row)
+        digest = digests.setdefault(key, hashlib.sha1())
+        digest.update(json.dumps([str(row[c]) for c in SOURCE_COLUMNS], ensure_ascii=False).encode("utf-8"))
+        entry = manifest.setdefault(key, {"entities": {kind: [] for kind in ENTITY_KINDS}})
+        for kind, values in row_entities(row).items():
+            entry["entities"][kind].extend(v for v in values if v not in entry["entities"][kind])
+    for key, digest in digests.items():
+        manifest[key]["fingerprint"] = digest.hexdigest()
+    return manifest
+
+
+def manifest_version(manifest: Dict[str, Dict[str, Any]]) -> str:
+    digest = hashlib.sha1()
+    for key in sorted(manifest):
+        digest.update(f"{key}:{manifest[key]['fingerprint']}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class KGDeltaSync:
+    """
+    增量同步 --> 用上次加载的 manifest 与新时刻表对比，只写入变化的列车
+
+    - 新增: 批量 MERGE 写入
+    - 更新: 删除旧列车后重新写入，再清理孤立邻居
+    - 删除: 删除列车及其孤立邻居
+    每批列车的删除与重新写入在同一事务中提交，同步期间更新中的列车不会短暂消失，其余列车始终可查；
+    完成后返回变更摘要，可交给 kg_change_feed 或 /api/kg/changes 失效缓存。
+    """
+
+    def __init__(self, loader: BulkKGLoader, manifest_path: str):
+        self.loader = loader
+        self.manifest_path = manifest_path
+
+    def load_manifest(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)["trains"]
+
+    def save_manifest(self, manifest: Dict[str, Dict[str, Any]]):
+        payload = {
+            "version": manifest_version(manifest),
+            "updated_at": datetime.now().isoformat(),
+            "trains": manifest,
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _graph_train_ids(self) -> List[str]:
+        with self.loader.driver.session() as session:
+            return [r["id"] for r in session.run("MATCH (t:Train) RETURN t.train_id AS id")]
+
+    def _apply(self, df: pd.DataFrame, deleted: List[str], changed: List[str]):
+        """按批提交: 同一事务内删除旧列车 -> MERGE 新数据 -> 清理不再被引用的邻居"""
+        row_keys = [natural_key(row) for _, row in df.iterrows()]
+        changed_set = set(changed)
+
+        def work(tx, batch, graph_batches):
+            record = tx.run(DELETE_TRAINS_QUERY, ids=batch).single()
+            if graph_batches is not None:
+                self.loader.write(tx, graph_batches)
+            tx.run(DELETE_ORPHANS_QUERY, neighbours=record["neighbours"]).consume()
+
+        with self.loader.driver.session() as session:
+            for batch in chunked(deleted + changed, self.loader.batch_size):
+                reload = set(batch) & changed_set
+                rows = df[[key in reload for key in row_keys]]
+                graph_batches = build_graph_batches(rows) if reload else None
+                session.execute_write(work, batch, graph_batches)
+
+    def sync(self, df: pd.DataFrame) -> Dict[str, Any]:
+        start = time.perf_counter()
+        new_manifest = build_manifest(df)
+        old_manifest = self.load_manifest()
+        # 没有 manifest 时以图谱现状为基准: 已有列车全部视为更新, 无法给出精确影响范围
+        full_invalidation = old_manifest is None
+        if old_manifest is None:
+            old_manifest = {train_id: {"fingerprint": None, "entities": {}} for train_id in self._graph_train_ids()}
+
+        inserted = [k for k in new_manifest if k not in old_manifest]
+        deleted = [k for k in old_manifest if k not in new_manifest]
+        updated = [k for k in new_manifest if k in old_manifest and old_manifest[k]["fingerprint"] != new_manifest[k]["fingerprint"]]
+
+        self._apply(df, deleted, updated + inserted)
+        self.save_manifest(new_manifest)
+
+        entities: Dict[str, set] = {kind: set() for kind in ENTITY_KINDS}
+        for key in inserted + updated + deleted:
+            for manifest in (old_manifest, new_manifest):
+                for kind, values in manifest.get(key, {}).get("entities", {}).items():
+                    entities[kind].update(values)
+        elapsed = time.perf_counter() - start
+        summary = {
+            "kg_version": manifest_version(new_manifest),
+            "inserted": len(inserted),
+            "updated": len(updated),
+            "deleted": len(deleted),
+            "unchanged": len(new_manifest) - len(inserted) - len(updated),
+            "full_invalidation": full_invalidation,
+            "entities": {kind: sorted(values) for kind, values in entities.items()},
+            "seconds": round(elapsed, 3),
+            "timestamp": datetime.now().isoformat(),
+        }
+        print(
+            f"增量同步完成: 新增 {summary['inserted']}, 更新 {summary['updated']}, 删除 {summary['deleted']}, "
+            f"未变化 {summary['unchanged']}, 耗时 {summary['seconds']}s"
+        )
+        return summary
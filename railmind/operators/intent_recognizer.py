@@ -1,17 +1,20 @@
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai.chat_models.base import BaseChatOpenAI
 
+from railmind.operators.llm.thinking_budget import ThinkingBudget
 from railmind.utils import is_think_model, parse_think_content
 from railmind.config import get_settings
 from railmind.function_call.kg_tools import TOOLS
 from railmind.operators.templates.intention import PROMPT
 
 class IntentRecognizer:
-    def __init__(self, llm_instance: BaseChatOpenAI = None):
+    def __init__(self, llm_instance: BaseChatOpenAI = None, thinking: Optional[bool] = None, thinking_budget: Optional[ThinkingBudget] = None):
         self.llm = llm_instance
+        self.thinking = thinking # None 时按模型名判断是否输出 <think>
+        self.thinking_budget = thinking_budget
         self.available_tools = TOOLS
         self.func_list_str = "\n".join([
             f"- {tool.name}: {tool.description}"
@@ -25,8 +28,12 @@ class IntentRecognizer:
     
     async def recognize(self, query: str) -> Dict[str, Any]:
         chain = self.intent_prompt | self.llm
-        response = await chain.ainvoke({"query": query, "func_list_str": self.func_list_str,})
-        is_think = is_think_model(self.llm.model_name)
+        inputs = {"query": query, "func_list_str": self.func_list_str}
+        if self.thinking_budget is not None:
+            response = await self.thinking_budget.ainvoke(self.llm, self.intent_prompt, inputs)
+        else:
+            response = await chain.ainvoke(inputs)
+        is_think = is_think_model(self.llm.model_name) if self.thinking is None else self.thinking
         try:
             if is_think:
                 _, res_context = parse_think_content(response.content)
@@ -0,0 +1,102 @@
+import threading
+from typing import Dict, Any, List
+from langchain_openai import ChatOpenAI
+
+from railmind.config import Settings
+from railmind.operators.logger import get_logger
+from railmind.operators.llm.thinking_budget import ThinkingBudget
+from railmind.utils import is_think_model
+
+# Agent 各阶段: 改写 / 意图识别 / 融合理解 / ReThink / 结果评估 / 最终答案
+STAGES = ("rewrite", "intent", "understand", "think", "evaluate", "answer")
+STAGE_FIELDS = {"model", "base_url", "api_key", "max_tokens", "temperature", "stop", "thinking", "thinking_budget"}
+DEFAULT_TEMPERATURE = 0.2
+
+
+class LLMRegistry:
+    """
+    按阶段路由 LLM --> Settings.llm_stages 为每个阶段覆盖 model / base_url / api_key / max_tokens / temperature / stop / thinking / thinking_budget
+
+    - 未配置的字段沿用 openai_model / openai_api_base / openai_api_key，temperature 默认 0.2
+    - 配置完全相同的阶段共享同一个 ChatOpenAI 实例
+    - thinking: None 时按 THINK_MODELS 判断模型是否输出 <think>；显式 true/false 时通过
+      extra_body.chat_template_kwargs.enable_thinking 开关思考（vLLM / Qwen3 约定），并据此解析输出
+    - thinking_budget: 0 等同 thinking=false；N > 0 时思考段最多 N 个 token（见 ThinkingBudget）；未配置则不限制
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.logger = get_logger(name="LLMRegistry")
+        self._lock = threading.Lock()
+        self._instances: Dict[str, ChatOpenAI] = {}
+        self._budgets: Dict[str, ThinkingBudget] = {}
+        for stage, overrides in settings.llm_stages.items():
+            if stage not in STAGES:
+                self.logger.warning(f"Unknown LLM stage '{stage}', expected one of {STAGES}.")
+            unknown = set(overrides) - STAGE_FIELDS
+            if unknown:
+                self.logger.warning(f"Unknown fields for LLM stage '{stage}': {sorted(unknown)}")
+
+    def config(self, stage: str) -> Dict[str, Any]:
+        overrides = self.settings.llm_stages.get(stage, {})
+        return {
+            "model": overrides.get("model") or self.settings.openai_model,
+            "base_url": overrides.get("base_url") or self.settings.openai_api_base,
+            "api_key": overrides.get("api_key") or self.settings.openai_api_key,
+            "max_tokens": overrides.get("max_tokens"),
+            "temperature": overrides.get("temperature", DEFAULT_TEMPERATURE),
+            "stop": overrides.get("stop"),
+            "thinking": False if overrides.get("thinking_budget") == 0 else overrides.get("thinking"),
+            "thinking_budget": overrides.get("thinking_budget"),
+        }
+
+    def thinking(self, stage: str) -> bool:
+        """该阶段的输出是否带 <think> 段"""
+        config = self.config(stage)
+        return is_think_model(config["model"]) if config["thinking"] is None else bool(config["thinking"])
+
+    def thinking_budget(self, stage: str) -> ThinkingBudget:
+        with self._lock:
+            if stage not in self._budgets:
+                self._budgets[stage] = ThinkingBudget(stage, self.thinking(stage), self.config(stage)["thinking_budget"])
+            return self._budgets[stage]
+
+    def thinking_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            budgets = list(self._budgets.values())
+        return {budget.stage: budget.stats() for budget in budgets}
+
+    def get(self, stage: str) -> ChatOpenAI:
+        config = self.config(stage)
+        key = repr(sorted((k, v) for k, v in config.items() if k != "thinking_budget"))
+        with self._lock:
+            if key not in self._instances:
+                model_kwargs = {}
+                if config["stop"]:
+                    model_kwargs["stop"] = config["stop"]
+                if config["thinking"] is not None:
+                    model_kwargs["extra_body"] = {"chat_template_kwargs": {"enable_thinking": bool(config["thinking"])}}
+                self._instances[key] = ChatOpenAI(
+                    model=config["model"],
+                    api_key=config["api_key"],
+                    base_url=config["base_url"],
+                    temperature=config["temperature"],
+                    max_tokens=config["max_tokens"],
+                    model_kwargs=model_kwargs,
+                )
+            return self._instances[key]
+
+    def instances(self) -> List[ChatOpenAI]:
+        """已创建的 ChatOpenAI 实例（相同配置的阶段只出现一次）"""
+        with self._lock:
+            return list(self._instances.values())
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        """各阶段的路由结果（不含 api_key）"""
+        return {
+            stage: {
+                **{k: v for k, v in self.config(stage).items() if k != "api_key"},
+                "thinking": self.thinking(stage),
+            }
+            for stage in STAGES
+        }
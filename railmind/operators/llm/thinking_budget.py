@@ -0,0 +1,123 @@
+import time
+import threading
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Callable
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from railmind.operators.logger import get_logger
+from railmind.operators.prompt_budget import get_prompt_budget
+from railmind.utils import parse_think_content
+
+THINK_START, THINK_END = "<think>", "</think>"
+# 预算用尽后接在截断的思考内容之后，模型从这里续写最终输出
+THINK_CUTOFF_NOTE = "（思考预算已用完，直接给出结果）"
+THINK_CUTOFF = f"\n{THINK_CUTOFF_NOTE}\n{THINK_END}\n\n"
+
+# 单次请求内各阶段的思考用量 --> ReActAgent.run/astream 设置，写入 final_answer_metadata.thinking_usage
+THINKING_USAGE: ContextVar[Optional[Dict[str, Dict[str, Any]]]] = ContextVar("thinking_usage", default=None)
+
+
+class ThinkingBudget:
+    """
+    单个阶段的思考预算 (Settings.llm_stages[stage].thinking_budget)
+
+    - 关闭 (thinking=false 或 thinking_budget=0): LLMRegistry 通过 chat_template_kwargs.enable_thinking=false 关闭思考，这里只做记录
+    - 封顶 (thinking_budget=N): 流式生成，<think> 段超过 N 个 token 时断开连接，把截断的思考内容加上 </think> 作为
+      assistant 前缀重新请求 (vLLM continue_final_message)，模型直接续写最终输出；返回的 content 仍是完整的
+      <think>...</think>结果，调用方的 parse_think_content 无需改动
+    - 完整 (未配置): 普通调用
+    每次调用记录思考 token 数、耗时与是否被截断，汇总到阶段统计与当前请求的 THINKING_USAGE
+    """
+
+    def __init__(self, stage: str, thinking: bool, budget: Optional[int] = None):
+        self.stage = stage
+        self.thinking = thinking
+        self.budget = budget if thinking and budget else None
+        self.logger = get_logger(name="ThinkingBudget")
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "reasoning_tokens": 0, "seconds": 0.0, "capped": 0}
+
+    @property
+    def mode(self) -> str:
+        if not self.thinking:
+            return "disabled"
+        return f"capped:{self.budget}" if self.budget else "full"
+
+    async def ainvoke(
+        self,
+        llm,
+        prompt: ChatPromptTemplate,
+        inputs: Dict[str, Any],
+        on_chunk: Optional[Callable[[str], None]] = None,
+    ) -> BaseMessage:
+        """on_chunk 不为空时流式生成并逐块回调（含 <think> 段，由调用方过滤）"""
+        messages = prompt.format_messages(**inputs)
+        start = time.perf_counter()
+        capped = False
+        if self.budget is None and on_chunk is None:
+            response = await llm.ainvoke(messages)
+        else:
+            response, capped = await self._stream(llm, messages, on_chunk)
+        reasoning, _ = parse_think_content(response.content) if self.thinking else ("", "")
+        reasoning = reasoning.replace(THINK_CUTOFF_NOTE, "").strip() if capped else reasoning
+        self._record(get_prompt_budget().count(reasoning) if reasoning else 0, time.perf_counter() - start, capped)
+        return response
+
+    async def _stream(self, llm, messages: List[BaseMessage], on_chunk: Optional[Callable[[str], None]]):
+        response, reasoning_tokens, cut = None, 0, False
+        counter = get_prompt_budget()
+        async for chunk in llm.astream(messages):
+            response = chunk if response is None else response + chunk
+            if on_chunk is not None:
+                on_chunk(chunk.content)
+            if self.budget is None or THINK_END in response.content:
+                continue
+            reasoning_tokens += counter.count(chunk.content.replace(THINK_START, ""))
+            if reasoning_tokens > self.budget:
+                cut = True
+                break
+        if not cut:
+            return response, False
+
+        self.logger.info(f"Thinking budget of stage {self.stage} exhausted ({self.budget} tokens), re-prompting for the final output.")
+        prefix = response.content + THINK_CUTOFF
+        if on_chunk is not None:
+            on_chunk(THINK_CUTOFF)
+        continuation = None
+        async for chunk in llm.astream(messages + [AIMessage(content=prefix)], extra_body=self._continue_body(llm)):
+            continuation = chunk if continuation is None else continuation + chunk
+            if on_chunk is not None:
+                on_chunk(chunk.content)
+        return AIMessageChunk(content=prefix) + continuation if continuation is not None else AIMessage(content=prefix), True
+
+    @staticmethod
+    def _continue_body(llm) -> Dict[str, Any]:
+        """保留 LLMRegistry 设置的 extra_body (enable_thinking)，bind_tools 之后的 llm 取其内部模型"""
+        model = getattr(llm, "bound", llm)
+        extra_body = dict((getattr(model, "model_kwargs", None) or {}).get("extra_body") or {})
+        return {**extra_body, "continue_final_message": True, "add_generation_prompt": False}
+
+    def _record(self, reasoning_tokens: int, seconds: float, capped: bool) -> None:
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["reasoning_tokens"] += reasoning_tokens
+            self._stats["seconds"] += seconds
+            self._stats["capped"] += capped
+        usage = THINKING_USAGE.get()
+        if usage is not None:
+            entry = usage.setdefault(self.stage, {"calls": 0, "reasoning_tokens": 0, "seconds": 0.0, "capped": 0})
+            entry["calls"] += 1
+            entry["reasoning_tokens"] += reasoning_tokens
+            entry["seconds"] = round(entry["seconds"] + seconds, 3)
+            entry["capped"] += capped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self._stats["calls"]
+            return {
+                "mode": self.mode,
+                **self._stats,
+                "seconds": round(self._stats["seconds"], 3),
+                "avg_reasoning_tokens": round(self._stats["reasoning_tokens"] / calls, 1) if calls else 0.0,
+            }
@@ -0,0 +1,138 @@
+import re
+import json
+import threading
+from typing import Dict, Any, List, Optional
+
+from railmind.config import get_settings
+from railmind.operators.logger import get_logger
+
+CJK_PATTERN = re.compile(r"[一-鿿　-〿＀-￯]")
+TRUNCATED_MARK = "...(已截断)"
+
+
+class PromptBudget:
+    """
+    Prompt 分段 token 预算 --> 各阶段把函数 schema / 执行记录 / 工具结果等段落按预算裁剪后再拼入 prompt
+
+    - 计数使用 llm_cli 中的 Tokenizer (BaseTokenizer.count_tokens)；tokenizer 不可用时按 中文 1 字 1 token、其他 4 字符 1 token 估算
+    - 列表结果: 保留能放进预算的前 k 条，并追加一条说明（总条数、保留条数、字段名），结果确定、可复现
+    - 其他内容: 按 token 截断并标注 ...(已截断)
+    - 按阶段记录实际 prompt token 数
+    """
+
+    def __init__(self, tokenizer=None, budgets: Optional[Dict[str, int]] = None):
+        self.tokenizer = tokenizer
+        self.budgets = budgets or {}
+        self.logger = get_logger(name="PromptBudget")
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def count(self, text: str) -> int:
+        if self.tokenizer is not None:
+            return self.tokenizer.count_tokens(text)
+        cjk = len(CJK_PATTERN.findall(text))
+        return cjk + (len(text) - cjk + 3) // 4
+
+    def budget(self, stage: str, section: str) -> Optional[int]:
+        return self.budgets.get(f"{stage}.{section}")
+
+    def truncate_text(self, text: str, max_tokens: int) -> str:
+        if self.count(text) <= max_tokens:
+            return text
+        max_tokens = max(0, max_tokens - self.count(TRUNCATED_MARK))
+        if self.tokenizer is not None:
+            return self.tokenizer.decode(self.tokenizer.encode(text)[:max_tokens]) + TRUNCATED_MARK
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low] + TRUNCATED_MARK
+
+    def fit(self, stage: str, section: str, value: Any, indent: Optional[int] = 2, max_tokens: Optional[int] = None) -> str:
+        """将段落序列化为 JSON 并裁剪到预算内；未配置预算时原样序列化"""
+        max_tokens = max_tokens if max_tokens is not None else self.budget(stage, section)
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, indent=indent, default=str)
+        if max_tokens is None or self.count(text) <= max_tokens:
+            return text
+        self._record_truncation(stage, section)
+        if isinstance(value, list) and value:
+            return self._fit_records(value, max_tokens, indent)
+        return self.truncate_text(text, max_tokens)
+
+    def _fit_records(self, records: List[Any], max_tokens: int, indent: Optional[int]) -> str:
+        """二分查找能放进预算的最大前缀"""
+        columns = sorted({k for r in records if isinstance(r, dict) for k in r})
+
+        def render(k: int) -> str:
+            note = {"_summary": f"共 {len(records)} 条记录，仅展示前 {k} 条", "columns": columns}
+            return json.dumps(records[:k] + [note], ensure_ascii=False, indent=indent, default=str)
+
+        low, high = 0, len(records) - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(render(mid)) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        text = render(low)
+        return text if self.count(text) <= max_tokens else self.truncate_text(text, max_tokens)
+
+    def record_prompt(self, stage: str, messages: List[Any], tools: Optional[List[Dict[str, Any]]] = None) -> int:
+        """记录某阶段实际发送的 prompt token 数；messages 为 ChatPromptTemplate.format_messages 的结果，tools 为绑定的函数定义"""
+        tokens = sum(self.count(str(m.content)) for m in messages)
+        if tools:
+            tokens += self.count(json.dumps(tools, ensure_ascii=False))
+        with self._lock:
+            counter = self._counter(stage)
+            counter["calls"] += 1
+            counter["prompt_tokens"] += tokens
+            counter["max_prompt_tokens"] = max(counter["max_prompt_tokens"], tokens)
+        return tokens
+
+    def _record_truncation(self, stage: str, section: str):
+        with self._lock:
+            self._counter(stage)["truncations"] += 1
+        self.logger.info(f"Prompt section {stage}.{section} exceeds its budget, truncated.")
+
+    def _counter(self, stage: str) -> Dict[str, int]:
+        if stage not in self._stats:
+            self._stats[stage] = {"calls": 0, "prompt_tokens": 0, "max_prompt_tokens": 0, "truncations": 0}
+        return self._stats[stage]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                stage: {**counter, "avg_prompt_tokens": round(counter["prompt_tokens"] / counter["calls"], 1) if counter["calls"] else 0.0}
+                for stage, counter in self._stats.items()
+            }
+
+
+_prompt_budget: Optional[PromptBudget] = None
+_prompt_budget_lock = threading.Lock()
+
+
+def _load_tokenizer(model_name: str):
+    """Tokenizer 依赖 transformers/tiktoken，加载失败时退化为估算"""
+    try:
+        from railmind.operators.llm.llm_cli import Tokenizer, TiktokenTokenizer
+        return Tokenizer(model_name) if model_name else TiktokenTokenizer()
+    except Exception as e:
+        get_logger(name="PromptBudget").warning(f"Tokenizer unavailable, estimating token counts: {e}")
+        return None
+
+
+def get_prompt_budget() -> PromptBudget:
+    global _prompt_budget
+    if _prompt_budget is None:
+        with _prompt_budget_lock:
+            if _prompt_budget is None:
+                settings = get_settings()
+                # 未开启时不裁剪，只按估算记录 prompt token 数，不加载 tokenizer
+                if settings.prompt_budget_enabled:
+                    _prompt_budget = PromptBudget(tokenizer=_load_tokenizer(settings.prompt_tokenizer_model), budgets=settings.prompt_section_budgets)
+                else:
+                    _prompt_budget = PromptBudget()
+    return _prompt_budget
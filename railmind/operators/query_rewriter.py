@@ -1,14 +1,17 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai.chat_models.base import BaseChatOpenAI
 
 from railmind.operators.templates.intention import PROMPT
+from railmind.operators.llm.thinking_budget import ThinkingBudget
 from railmind.utils import *
 
 class QueryRewriter:
-    def __init__(self, llm_instance: BaseChatOpenAI = None):
+    def __init__(self, llm_instance: BaseChatOpenAI = None, thinking: Optional[bool] = None, thinking_budget: Optional[ThinkingBudget] = None):
         self.llm = llm_instance
+        self.thinking = thinking # None 时按模型名判断是否输出 <think>
+        self.thinking_budget = thinking_budget
         self.rewrite_prompt = ChatPromptTemplate.from_messages([
             ("system", PROMPT['system_requery']),
             ("user", "请改写以下查询：\n{query}")
@@ -20,8 +23,12 @@ class QueryRewriter:
         query_with_context = query
         if context:
             query_with_context = f"历史记忆上下文：{context}\n\n当前查询：{query}"
-        response = await chain.ainvoke({"query": query_with_context})
-        is_think = is_think_model(self.llm.model_name)
+        inputs = {"query": query_with_context}
+        if self.thinking_budget is not None:
+            response = await self.thinking_budget.ainvoke(self.llm, self.rewrite_prompt, inputs)
+        else:
+            response = await chain.ainvoke(inputs)
+        is_think = is_think_model(self.llm.model_name) if self.thinking is None else self.thinking
         try:
             if is_think:
                 _, res_context = parse_think_content(response.content)
@@ -0,0 +1,51 @@
+import json
+from typing import Dict, Any, Optional
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai.chat_models.base import BaseChatOpenAI
+
+from railmind.operators.llm.thinking_budget import ThinkingBudget
+from railmind.utils import is_think_model, parse_think_content
+from railmind.function_call.kg_tools import TOOLS
+from railmind.operators.templates.intention import PROMPT
+
+class QueryUnderstander:
+    """查询改写 + 意图识别 合并为一次 LLM 调用"""
+    def __init__(self, llm_instance: BaseChatOpenAI = None, thinking: Optional[bool] = None, thinking_budget: Optional[ThinkingBudget] = None):
+        self.llm = llm_instance
+        self.thinking = thinking # None 时按模型名判断是否输出 <think>
+        self.thinking_budget = thinking_budget
+        self.func_list_str = "\n".join([
+            f"- {tool.name}: {tool.description}"
+            for tool in TOOLS
+        ])
+        self.understand_prompt = ChatPromptTemplate.from_messages([
+            ("system", PROMPT['system_understand']),
+            ("user", "请改写并分析以下查询：\n{query}")
+        ])
+
+    async def understand(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        chain = self.understand_prompt | self.llm
+
+        query_with_context = query
+        if context:
+            query_with_context = f"历史记忆上下文：{context}\n\n当前查询：{query}"
+        inputs = {"query": query_with_context, "func_list_str": self.func_list_str}
+        if self.thinking_budget is not None:
+            response = await self.thinking_budget.ainvoke(self.llm, self.understand_prompt, inputs)
+        else:
+            response = await chain.ainvoke(inputs)
+        is_think = is_think_model(self.llm.model_name) if self.thinking is None else self.thinking
+        try:
+            if is_think:
+                _, res_context = parse_think_content(response.content)
+                result = json.loads(res_context)
+            else:
+                result = json.loads(response.content)
+        except:
+            result = {
+                "rewritten_query": query,
+                "intents": [],
+                "queries": []
+            }
+        result.setdefault("rewritten_query", query)
+        return result
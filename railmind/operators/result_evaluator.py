@@ -1,16 +1,21 @@
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai.chat_models.base import BaseChatOpenAI
 
 from railmind.operators.templates.eval_result import SYSTEM_PROMPT, USER_PROMPT
+from railmind.operators.llm.thinking_budget import ThinkingBudget
 from railmind.utils import is_think_model, parse_think_content
+from railmind.operators.prompt_budget import PromptBudget
 
 
 class ResultEvaluator:
-    def __init__(self, llm_instance: BaseChatOpenAI = None):
+    def __init__(self, llm_instance: BaseChatOpenAI = None, prompt_budget: PromptBudget = None, thinking: Optional[bool] = None, thinking_budget: Optional[ThinkingBudget] = None):
         self.llm = llm_instance
+        self.thinking = thinking # None 时按模型名判断是否输出 <think>
+        self.thinking_budget = thinking_budget
+        self.prompt_budget = prompt_budget
         self.eval_prompt = ChatPromptTemplate.from_messages([
             ("system", SYSTEM_PROMPT),
             ("user", USER_PROMPT)
@@ -33,13 +38,21 @@ class ResultEvaluator:
             for i, r in enumerate(current_results)
         ])
         
-        chain = self.eval_prompt | self.llm
-        response = await chain.ainvoke({
+        eval_inputs = {
             "query": query,
             "executed_functions": func_info,
             "current_results": results_info
-        })
-        is_think = is_think_model(self.llm.model_name)
+        }
+        if self.prompt_budget is not None:
+            eval_inputs["executed_functions"] = self.prompt_budget.fit("evaluate", "executed_functions", func_info)
+            eval_inputs["current_results"] = self.prompt_budget.fit("evaluate", "current_results", results_info)
+            self.prompt_budget.record_prompt("evaluate", self.eval_prompt.format_messages(**eval_inputs))
+        chain = self.eval_prompt | self.llm
+        if self.thinking_budget is not None:
+            response = await self.thinking_budget.ainvoke(self.llm, self.eval_prompt, eval_inputs)
+        else:
+            response = await chain.ainvoke(eval_inputs)
+        is_think = is_think_model(self.llm.model_name) if self.thinking is None else self.thinking
         try:
             if is_think:
                 _, res_context = parse_think_content(response.content)
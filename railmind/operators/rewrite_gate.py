@@ -0,0 +1,164 @@
+import re
+import json
+import math
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Callable, Iterable, Tuple
+
+from railmind.operators.logger import get_logger
+
+# 车次: K178、G1234、K4547/6
+TRAIN_NUMBER_PATTERN = re.compile(r"(?<![A-Za-z0-9])[GDCZTKYLSgdcztklys]\d{1,5}(?:/\d{1,5})?(?![0-9])")
+# 指代/省略 --> 需要结合记忆改写
+REFERENTIAL_PATTERN = re.compile(
+    r"它|他们|这趟|那趟|这班|那班|这个|那个|这些|那些|上面|上述|刚才|刚刚|该车|该站|该列车|同一|^那|呢[？?！!。]*$"
+)
+PUNCTUATION = re.compile(r"[\s，,。.？?！!、；;：:“”\"'（）()]")
+
+
+def normalize_query(query: str) -> str:
+    return PUNCTUATION.sub("", query)
+
+
+class CharNGramClassifier:
+    """
+    字符 1/2-gram 多项式朴素贝叶斯 --> 判断查询是否已足够规范（label=1 表示无需改写）
+    模型以 JSON 保存，不引入额外依赖。训练见 scripts/train_rewrite_gate.py
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.class_counts: Dict[int, int] = {0: 0, 1: 0}
+        self.token_counts: Dict[int, Dict[str, int]] = {0: {}, 1: {}}
+        self.token_totals: Dict[int, int] = {0: 0, 1: 0}
+        self.vocabulary: set = set()
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        text = normalize_query(text)
+        return list(text) + [text[i:i + 2] for i in range(len(text) - 1)]
+
+    def fit(self, texts: Iterable[str], labels: Iterable[int]) -> "CharNGramClassifier":
+        for text, label in zip(texts, labels):
+            label = int(label)
+            self.class_counts[label] += 1
+            for token in self.features(text):
+                self.token_counts[label][token] = self.token_counts[label].get(token, 0) + 1
+                self.token_totals[label] += 1
+                self.vocabulary.add(token)
+        return self
+
+    def predict_proba(self, text: str) -> float:
+        """返回 P(label=1 | text)"""
+        total = sum(self.class_counts.values())
+        if not total or not self.class_counts[0] or not self.class_counts[1]:
+            return 0.0
+        vocab = len(self.vocabulary) or 1
+        log_probs = {}
+        for label in (0, 1):
+            log_prob = math.log(self.class_counts[label] / total)
+            denominator = self.token_totals[label] + self.alpha * vocab
+            for token in self.features(text):
+                log_prob += math.log((self.token_counts[label].get(token, 0) + self.alpha) / denominator)
+            log_probs[label] = log_prob
+        diff = log_probs[0] - log_probs[1]
+        return 1.0 / (1.0 + math.exp(min(diff, 700)))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "alpha": self.alpha,
+                "class_counts": self.class_counts,
+                "token_counts": self.token_counts,
+                "token_totals": self.token_totals,
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "CharNGramClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        model = cls(alpha=data["alpha"])
+        model.class_counts = {int(k): v for k, v in data["class_counts"].items()}
+        model.token_counts = {int(k): v for k, v in data["token_counts"].items()}
+        model.token_totals = {int(k): v for k, v in data["token_totals"].items()}
+        model.vocabulary = {t for counts in model.token_counts.values() for t in counts}
+        return model
+
+
+class RewriteGate:
+    """
+    Query 改写前置门控 --> 判断查询是否已足够规范，规范的查询跳过 QueryRewriter 的 LLM 调用
+
+    规则（全部满足才跳过）:
+        1. 长度在 [min_length, max_length] 内
+        2. 不含指代/省略（它、这趟、刚才、...呢？），这类查询需要结合记忆改写
+        3. 至少识别出一个实体: 车次 或 图谱中的车站/城市名
+        4. 若配置了分类器模型，P(规范) >= threshold
+    """
+
+    def __init__(
+        self,
+        station_finder: Optional[Callable[[str], List[str]]] = None,
+        min_length: int = 4,
+        max_length: int = 60,
+        classifier: Optional[CharNGramClassifier] = None,
+        threshold: float = 0.8,
+    ):
+        self.station_finder = station_finder
+        self.min_length = min_length
+        self.max_length = max_length
+        self.classifier = classifier
+        self.threshold = threshold
+        self.logger = get_logger(name="RewriteGate")
+        self._lock = threading.Lock()
+        self._decisions: Counter = Counter()
+        self._rewrite_seconds = 0.0
+        self._rewrite_count = 0
+
+    def decide(self, query: str) -> Tuple[bool, str]:
+        """返回 (是否跳过改写, 原因)"""
+        text = query.strip()
+        if not self.min_length <= len(text) <= self.max_length:
+            return False, "length"
+        if REFERENTIAL_PATTERN.search(text):
+            return False, "referential"
+        entities = TRAIN_NUMBER_PATTERN.findall(text)
+        if not entities and self.station_finder:
+            try:
+                entities = self.station_finder(text)
+            except Exception as e:
+                self.logger.warning(f"Station lookup failed, rewrite will run: {e}")
+        if not entities:
+            return False, "no_entity"
+        if self.classifier is not None:
+            score = self.classifier.predict_proba(text)
+            if score < self.threshold:
+                return False, "classifier"
+        return True, "canonical"
+
+    def should_skip(self, query: str) -> bool:
+        skip, reason = self.decide(query)
+        with self._lock:
+            self._decisions[reason] += 1
+        self.logger.info(f"Rewrite gate: {'skip' if skip else 'rewrite'} ({reason})")
+        return skip
+
+    def record_rewrite_latency(self, seconds: float):
+        """记录实际执行改写的耗时, 用于估算跳过节省的时间"""
+        with self._lock:
+            self._rewrite_seconds += seconds
+            self._rewrite_count += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._decisions.values())
+            skipped = self._decisions["canonical"]
+            avg_rewrite_ms = self._rewrite_seconds / self._rewrite_count * 1000 if self._rewrite_count else 0.0
+            return {
+                "total": total,
+                "skipped": skipped,
+                "skip_rate": skipped / total if total else 0.0,
+                "reasons": dict(self._decisions),
+                "avg_rewrite_ms": round(avg_rewrite_ms, 1),
+                "estimated_saved_ms": round(skipped * avg_rewrite_ms, 1),
+            }
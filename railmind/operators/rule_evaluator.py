@@ -0,0 +1,106 @@
+import re
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from railmind.operators.logger import get_logger
+
+# 查询中的属性表达 -> 工具结果中对应的列（任一列存在即可）
+# 关键词只用能唯一指向一个属性的完整短语: "去哪"/"到哪里" 既可能问终到站也可能问候车地点（K178去哪里候车？），
+# "检票" 也可能问检票时间，这类宽泛表达不收录，交给 LLM 评估
+ATTRIBUTES: List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = [
+    ("始发站", ("始发站", "从哪里出发", "从哪出发", "从哪里开出", "从哪开出"), ("始发站",)),
+    ("终到站", ("终到站", "终点站", "开往哪", "开向哪", "驶向哪"), ("终到站",)),
+    ("到达时间", ("到达时间", "几点到达", "几点到站", "什么时候到达"), ("到达时间",)),
+    ("发车时间", ("发车时间", "几点开车", "几点发车", "几点出发", "什么时候发车", "什么时候出发"), ("发车时间",)),
+    ("候车厅", ("候车厅", "候车室", "候车区", "哪里候车", "哪候车"), ("候车厅", "候车厅名称")),
+    ("检票口", ("检票口", "哪里检票", "哪检票"), ("检票口", "检票口编号")),
+    ("站台", ("站台",), ("站台", "站台编号")),
+    ("车站类型", ("车站类型",), ("车站类型",)),
+]
+
+# 否定表达: 语义与肯定句相反，模板答案与答案缓存都不处理
+# 按词匹配而不是单字，"无锡"、"无为" 等站名中的 无 不算否定
+NEGATION_PATTERN = re.compile(
+    r"不是|不在|不能|不可|不会|不要|不用|不需|不经|不停|不到|不去|不坐|不乘|不走|不开|"
+    r"没有|没法|没能|没在|没停|没经|无法|无需|并非|并不"
+)
+
+
+def requested_attributes(query: str) -> List[Tuple[str, Tuple[str, ...]]]:
+    """查询中明确要求的属性 --> [(属性名, 结果列)]"""
+    return [(name, columns) for name, keywords, columns in ATTRIBUTES if any(k in query for k in keywords)]
+
+
+def _records(result: Any) -> List[Dict[str, Any]]:
+    if isinstance(result, dict):
+        return [result]
+    if isinstance(result, list):
+        return [r for r in result if isinstance(r, dict)]
+    return []
+
+
+def _has_value(record: Dict[str, Any], columns: Tuple[str, ...]) -> bool:
+    return any(record.get(c) not in (None, "", []) for c in columns)
+
+
+class RuleEvaluator:
+    """
+    确定性的结果评估规则 --> 在 ResultEvaluator (LLM) 之前执行，规则能确定时跳过 LLM 调用
+
+    规则按顺序匹配，全部不确定时返回 None 交给 LLM:
+        - tool_error: 最近一次工具调用报错 --> 继续
+        - single_record_attribute: 查询只要求一个属性，且出现在唯一一条记录中 --> 完成
+        - records_attribute: 查询只要求一个属性，且多条记录均包含该属性 --> 完成
+        - missing_attribute: 查询要求的属性不在返回的列中 --> 继续（需要换工具）
+    查询匹配到多个属性时不判定完成（关键词可能误匹配），交给 LLM
+    """
+
+    def __init__(self):
+        self.logger = get_logger(name="RuleEvaluator")
+        self._lock = threading.Lock()
+        self._hits: Counter = Counter()
+
+    def decide(self, query: str, result: Any) -> Optional[Dict[str, Any]]:
+        """返回与 ResultEvaluator.evaluate 相同结构的 {should_continue, reason, rule}，不确定时返回 None"""
+        if isinstance(result, dict) and result.get("error"):
+            return self._decision("tool_error", True, f"工具调用失败: {result.get('message') or result.get('error')}")
+
+        attributes = requested_attributes(query)
+        records = _records(result)
+        if not attributes or not records:
+            return None
+        names = "、".join(name for name, _ in attributes)
+
+        if len(attributes) == 1 and all(_has_value(r, columns) for r in records for _, columns in attributes):
+            if len(records) == 1:
+                return self._decision("single_record_attribute", False, f"唯一记录包含所需属性: {names}")
+            return self._decision("records_attribute", False, f"{len(records)} 条记录均包含所需属性: {names}")
+
+        missing = [name for name, columns in attributes if not any(c in r for r in records for c in columns)]
+        if missing:
+            return self._decision("missing_attribute", True, f"结果中没有所需属性: {'、'.join(missing)}")
+        return None
+
+    def _decision(self, rule: str, should_continue: bool, reason: str) -> Dict[str, Any]:
+        return {"should_continue": should_continue, "reason": reason, "rule": rule}
+
+    def evaluate(self, query: str, result: Any) -> Optional[Dict[str, Any]]:
+        """decide + 命中计数；返回 None 时计为 llm"""
+        decision = self.decide(query, result)
+        with self._lock:
+            self._hits[decision["rule"] if decision else "llm"] += 1
+        if decision:
+            self.logger.info(f"Rule evaluator [{decision['rule']}]: {decision['reason']}")
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._hits.values())
+            llm_calls = self._hits["llm"]
+            return {
+                "total": total,
+                "rule_hits": {k: v for k, v in self._hits.items() if k != "llm"},
+                "llm_calls": llm_calls,
+                "llm_calls_avoided_rate": (total - llm_calls) / total if total else 0.0,
+            }
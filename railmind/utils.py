@@ -3,7 +3,8 @@ import json
 import time
 import functools
 import asyncio
-from typing import Callable, Tuple, Dict, Any
+from datetime import datetime, time as dtime
+from typing import Callable, Tuple, Dict, Any, Optional
 
 from railmind.operators.logger import get_logger
 from railmind.api.enum.think_model import THINK_MODELS
@@ -22,6 +23,70 @@ def parse_think_content(content: str) -> Tuple[str, Dict[str, Any]]:
     context_part = content.split("</think>")[-1].strip()
     return think_text, context_part
 
+class ActionStreamParser:
+    """
+    流式解析 ReThink 输出 --> next_action 的 function_name 与 parameters 完整出现后立即返回，无需等待整个 JSON 生成完毕
+    think 模型的 <think>...</think> 部分不参与解析
+    """
+    FUNCTION_NAME = re.compile(r'"function_name"\s*:\s*')
+    PARAMETERS = re.compile(r'"parameters"\s*:\s*')
+
+    def __init__(self, skip_think: bool = False):
+        self.skip_think = skip_think
+        self.buffer = ""
+        self.action: Optional[Dict[str, Any]] = None
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text: str) -> Optional[Dict[str, Any]]:
+        """追加一段输出，返回已解析出的 {"function_name", "parameters"}，尚不完整时返回 None"""
+        self.buffer += text or ""
+        if self.action is None:
+            self.action = self._extract()
+        return self.action
+
+    def _decode_after(self, pattern: re.Pattern, text: str) -> Tuple[bool, Any]:
+        match = pattern.search(text)
+        if not match:
+            return False, None
+        try:
+            value, _ = self._decoder.raw_decode(text, match.end())
+        except ValueError:
+            return False, None
+        return True, value
+
+    def _extract(self) -> Optional[Dict[str, Any]]:
+        text = self.buffer
+        if self.skip_think and "<think>" in text:
+            if "</think>" not in text:
+                return None
+            text = text.split("</think>")[-1]
+        start = text.find('"next_action"')
+        if start < 0:
+            return None
+        text = text[start:]
+        has_name, function_name = self._decode_after(self.FUNCTION_NAME, text)
+        has_params, parameters = self._decode_after(self.PARAMETERS, text)
+        if not (has_name and has_params) or not isinstance(function_name, str) or not isinstance(parameters, dict):
+            return None
+        return {"function_name": function_name, "parameters": parameters}
+
+def parse_minute_of_day(value: Any) -> Optional[int]:
+    """
+    将时刻表中的时间转换为一天中的分钟数(0~1439)，无法解析时返回 None。
+    兼容 "0:12"、"00:12"、"00:12:00"、"0：12" 以及 Excel 读出的 datetime.time。
+    """
+    if value is None:
+        return None
+    if isinstance(value, (dtime, datetime)):
+        return value.hour * 60 + value.minute
+    match = re.match(r"^\s*(\d{1,2})[:：](\d{2})(?:[:：]\d{2})?\s*$", str(value))
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 24 or minute > 59:
+        return None
+    return (hour * 60 + minute) % 1440
+
 def log_execution_time(
     func_name: str = None,
     logger_name: str = None,
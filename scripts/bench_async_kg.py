@@ -0,0 +1,84 @@
+"""
+KG工具 同步/异步 吞吐对比脚本
+模拟 N 个并发的 Agent 运行，每个运行按 ReAct 循环依次调用若干 KG 工具，对比:
+    - sync : 旧链路，同步工具经 run_in_executor 进入线程池（与改造前 tool.ainvoke 的行为一致）
+    - async: 新链路，tool.ainvoke 直接走 AsyncGraphDatabase 驱动
+
+用法: python scripts/bench_async_kg.py [--runs 50] [--rounds 3]
+"""
+import sys
+import time
+import asyncio
+import functools
+import statistics
+from typing import List, Dict, Any, Tuple
+
+from railmind.function_call.kg_tools import TOOLS, kg_system, async_kg_system
+
+# 一次 Agent 运行中典型的工具调用序列（取自 data/qa.json 的 badcase 回放）
+AGENT_PLAN: List[Tuple[str, Dict[str, Any]]] = [
+    ("get_train_details", {"train_number": "K4547/6"}),
+    ("search_trains_by_station", {"station_name": "成都西"}),
+    ("find_trains_between_stations", {"departure_station": "成都西", "arrival_station": "佳木斯"}),
+]
+
+TOOL_MAP = {tool.name: tool for tool in TOOLS}
+
+
+async def call_sync(name: str, params: Dict[str, Any]) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(TOOL_MAP[name].invoke, params))
+
+
+async def call_async(name: str, params: Dict[str, Any]) -> str:
+    return await TOOL_MAP[name].ainvoke(params)
+
+
+async def agent_run(caller) -> float:
+    start = time.perf_counter()
+    for name, params in AGENT_PLAN:
+        await caller(name, params)
+    return time.perf_counter() - start
+
+
+async def bench(mode: str, runs: int) -> Dict[str, float]:
+    caller = call_sync if mode == "sync" else call_async
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*[agent_run(caller) for _ in range(runs)])
+    total = time.perf_counter() - start
+    return {
+        "total": total,
+        "rps": runs / total,
+        "p50": statistics.median(latencies),
+        "max": max(latencies),
+    }
+
+
+async def main(runs: int, rounds: int):
+    # 预热连接池
+    await bench("sync", 1)
+    await bench("async", 1)
+
+    print("=" * 80)
+    print(f"🚀 并发Agent运行数: {runs} | 每次运行工具调用数: {len(AGENT_PLAN)} | 轮数: {rounds}")
+    print("=" * 80)
+    for mode in ("sync", "async"):
+        stats = [await bench(mode, runs) for _ in range(rounds)]
+        rps = statistics.mean(s["rps"] for s in stats)
+        p50 = statistics.mean(s["p50"] for s in stats)
+        worst = max(s["max"] for s in stats)
+        print(f"[{mode:5s}] {rps:8.2f} runs/s | p50: {p50 * 1000:8.1f}ms | max: {worst * 1000:8.1f}ms")
+    print("=" * 80)
+
+    kg_system.close()
+    await async_kg_system.close()
+
+
+if __name__ == "__main__":
+    runs = 50
+    rounds = 3
+    if "--runs" in sys.argv:
+        runs = int(sys.argv[sys.argv.index("--runs") + 1])
+    if "--rounds" in sys.argv:
+        rounds = int(sys.argv[sys.argv.index("--rounds") + 1])
+    asyncio.run(main(runs, rounds))
@@ -0,0 +1,102 @@
+"""
+按阶段路由 LLM 的对比矩阵: 在 data/qa.json 上以多组 llm_stages 配置运行 ReActAgent，统计端到端延迟与答案准确率。
+对比时关闭答案缓存与 PlanCache，保证每题都经过完整的 LLM 流程。
+
+默认矩阵（需指定 --small 小模型）:
+    single            所有阶段使用 openai_model
+    small_classify    rewrite / intent / understand / evaluate 使用小模型，think / answer 使用 openai_model
+    small_but_think   仅 think 使用 openai_model
+    small_all         所有阶段使用小模型
+也可用 --configs 指定 JSON 文件: {"配置名": {阶段: {model, base_url, max_tokens, temperature, stop, thinking, thinking_budget}}}
+
+用法: python scripts/bench_llm_routing.py --small qwen3-4b [--small-base-url URL] [--configs routing.json]
+                                          [--qa data/qa.json] [--type type1] [--limit 30]
+"""
+import sys
+import json
+import time
+import asyncio
+import statistics
+from typing import Dict, Any, List, Optional
+
+from railmind.agent.react_agent import ReActAgent
+from railmind.config import get_settings
+from railmind.function_call.kg_tools import kg_system, async_kg_system
+
+
+def default_matrix(small_model: str, small_base_url: Optional[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    small = {"model": small_model, "thinking": False}
+    if small_base_url:
+        small["base_url"] = small_base_url
+    classify = ("rewrite", "intent", "understand", "evaluate")
+    return {
+        "single": {},
+        "small_classify": {stage: small for stage in classify},
+        "small_but_think": {stage: small for stage in classify + ("answer",)},
+        "small_all": {stage: small for stage in classify + ("think", "answer")},
+    }
+
+
+def answer_matches(expected: str, answer: str) -> bool:
+    return bool(expected) and all(part in answer for part in expected.replace("和", "，").split("，"))
+
+
+async def run(name: str, llm_stages: Dict[str, Dict[str, Any]], questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    settings = get_settings()
+    settings.llm_stages = llm_stages
+    settings.answer_cache_enabled = False
+    settings.plan_cache_enabled = False
+    agent = ReActAgent()
+    latencies, matched, errors = [], 0, 0
+    for idx, item in enumerate(questions, 1):
+        start = time.perf_counter()
+        final_state = await agent.run(item["question"], user_id="routing_eval", session_id=f"{name}_{idx}")
+        latencies.append(time.perf_counter() - start)
+        answer = final_state.get("final_answer", "")
+        matched += answer_matches(item.get("answer", ""), answer)
+        errors += bool(final_state.get("error"))
+        print(f"   [{name}] [{idx}/{len(questions)}] {latencies[-1]:.2f}s | {item['question']} -> {answer}")
+    return {
+        "p50_s": statistics.median(latencies),
+        "mean_s": statistics.mean(latencies),
+        "accuracy": matched / len(questions),
+        "errors": errors,
+    }
+
+
+async def main(matrix: Dict[str, Dict[str, Any]], qa_path: str, question_type: Optional[str], limit: Optional[int]):
+    with open(qa_path, "r", encoding="utf-8") as f:
+        questions = [q for q in json.load(f) if question_type is None or q.get("question_type") == question_type][:limit]
+    print(f"📦 问题 {len(questions)} 条, 配置 {len(matrix)} 组: {', '.join(matrix)}")
+    results = {name: await run(name, stages, questions) for name, stages in matrix.items()}
+    print("=" * 70)
+    print(f"{'config':18s} {'p50(s)':>8s} {'mean(s)':>8s} {'accuracy':>9s} {'errors':>7s}")
+    for name, r in results.items():
+        print(f"{name:18s} {r['p50_s']:8.2f} {r['mean_s']:8.2f} {r['accuracy']:9.2%} {r['errors']:7d}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    qa_path = "data/qa.json"
+    question_type = None
+    limit = None
+    if "--qa" in sys.argv:
+        qa_path = sys.argv[sys.argv.index("--qa") + 1]
+    if "--type" in sys.argv:
+        question_type = sys.argv[sys.argv.index("--type") + 1]
+    if "--limit" in sys.argv:
+        limit = int(sys.argv[sys.argv.index("--limit") + 1])
+    if "--configs" in sys.argv:
+        with open(sys.argv[sys.argv.index("--configs") + 1], "r", encoding="utf-8") as f:
+            matrix = json.load(f)
+    elif "--small" in sys.argv:
+        small_base_url = sys.argv[sys.argv.index("--small-base-url") + 1] if "--small-base-url" in sys.argv else None
+        matrix = default_matrix(sys.argv[sys.argv.index("--small") + 1], small_base_url)
+    else:
+        print("❌ 请指定 --small <模型名> 或 --configs <配置文件>")
+        sys.exit(1)
+    try:
+        asyncio.run(main(matrix, qa_path, question_type, limit))
+    finally:
+        kg_system.close()
+        asyncio.run(async_kg_system.close())
@@ -0,0 +1,95 @@
+"""
+车站模型基准: 逐行 Station 节点 vs 规范 Station 节点
+对以车站为中心的工具执行 PROFILE 与多次计时，报告 db hits、p50/p99 延迟与车站节点数。
+
+用法:
+    python scripts/bench_station_model.py                # 仅报告当前图谱
+    python scripts/bench_station_model.py --migrate      # 报告 -> 迁移为规范车站 -> 报告（会修改图谱！）
+    python scripts/bench_station_model.py --iters 100
+"""
+import sys
+import time
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+from railmind.function_call.kg_tools import TOOLS, kg_system
+from railmind.operators.build_kg.kg_builder import station_migration_queries
+
+STATION_PARAMS: Dict[str, Dict[str, Any]] = {
+    "search_trains_by_station": {"station_name": "成都"},
+    "get_station_info": {"station_name": "成都西"},
+    "get_all_stations": {},
+    "find_trains_between_stations": {"departure_station": "成都西", "arrival_station": "佳木斯"},
+    "search_trains_by_multiple_conditions": {"departure_station": "成都西", "train_type": "K"},
+}
+TOOL_MAP = {tool.name: tool for tool in TOOLS}
+
+
+def db_hits(plan: Dict[str, Any]) -> int:
+    return plan.get("dbHits", 0) + sum(db_hits(child) for child in plan.get("children", []))
+
+
+def measure(iters: int) -> Dict[str, Tuple[int, int, float, float]]:
+    """工具名 -> (db hits, 返回行数, p50 ms, p99 ms)"""
+    report = {}
+    for name, params in STATION_PARAMS.items():
+        query, parameters = TOOL_MAP[name].func.__wrapped__(**params)
+        with kg_system.driver.session() as session:
+            summary = session.run("PROFILE " + query, parameters).consume()
+        rows = len(kg_system.run_query(query, parameters))
+        latencies = []
+        for _ in range(iters):
+            start = time.perf_counter()
+            kg_system.run_query(query, parameters)
+            latencies.append((time.perf_counter() - start) * 1000)
+        report[name] = (db_hits(summary.profile), rows, np.percentile(latencies, 50), np.percentile(latencies, 99))
+    return report
+
+
+def station_stats() -> str:
+    record = kg_system.run_query("""
+    MATCH (s:Station)
+    RETURN count(s) AS nodes, count(DISTINCT s.station_name) AS names
+    """)[0]
+    return f"Station 节点 {record['nodes']} 个 / 车站名称 {record['names']} 个"
+
+
+def print_report(title: str, report: Dict[str, Tuple[int, int, float, float]]):
+    print("=" * 100)
+    print(f"📊 {title} | {station_stats()}")
+    print("=" * 100)
+    print(f"{'tool':40s} {'db hits':>10s} {'rows':>6s} {'p50 ms':>8s} {'p99 ms':>8s}")
+    for name, (hits, rows, p50, p99) in report.items():
+        print(f"{name:40s} {hits:10d} {rows:6d} {p50:8.2f} {p99:8.2f}")
+
+
+def main(iters: int):
+    before = measure(iters)
+    print_report("当前图谱", before)
+    if "--migrate" not in sys.argv:
+        return
+
+    print("🔧 迁移为规范车站节点...")
+    start = time.perf_counter()
+    for query in station_migration_queries():
+        kg_system.run_query(query)
+    print(f"✅ 迁移完成，耗时 {time.perf_counter() - start:.1f}s")
+
+    after = measure(iters)
+    print_report("迁移后", after)
+    print("=" * 100)
+    for name in STATION_PARAMS:
+        hits_before, hits_after = before[name][0], after[name][0]
+        ratio = hits_before / hits_after if hits_after else float("inf")
+        print(f"{name:40s} db hits {hits_before} -> {hits_after} ({ratio:.1f}x) | p50 {before[name][2]:.2f} -> {after[name][2]:.2f} ms")
+
+
+if __name__ == "__main__":
+    iters = 50
+    if "--iters" in sys.argv:
+        iters = int(sys.argv[sys.argv.index("--iters") + 1])
+    try:
+        main(iters)
+    finally:
+        kg_system.close()
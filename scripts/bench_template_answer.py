@@ -0,0 +1,68 @@
+"""
+模板答案对比: 在 data/qa.json 的 type1 子集上分别关闭/开启 AnswerComposer 运行 ReActAgent，
+统计端到端延迟 p50/均值、模板答案命中数，以及模板答案与标注答案的一致情况。
+
+用法: python scripts/bench_template_answer.py [--qa data/qa.json] [--type type1] [--limit 21]
+"""
+import sys
+import json
+import time
+import asyncio
+import statistics
+from typing import Dict, Any, List
+
+from railmind.agent.react_agent import ReActAgent
+from railmind.config import get_settings
+from railmind.function_call.kg_tools import kg_system, async_kg_system
+
+
+async def run(enabled: bool, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    get_settings().template_answer_enabled = enabled
+    agent = ReActAgent()
+    label = "template" if enabled else "llm"
+    latencies, template_hits, matched = [], 0, 0
+    for idx, item in enumerate(questions, 1):
+        start = time.perf_counter()
+        final_state = await agent.run(item["question"], user_id="template_eval", session_id=f"{label}_{idx}")
+        latencies.append(time.perf_counter() - start)
+        source = final_state.get("final_answer_metadata", {}).get("answer_source")
+        answer = final_state.get("final_answer", "")
+        template_hits += source == "template"
+        matched += bool(item["answer"]) and all(part in answer for part in item["answer"].replace("和", "，").split("，"))
+        print(f"   [{label}] [{idx}/{len(questions)}] {latencies[-1]:.2f}s | {source} | {item['question']} -> {answer}")
+    return {
+        "p50_s": statistics.median(latencies),
+        "mean_s": statistics.mean(latencies),
+        "template_hits": template_hits,
+        "answer_match": matched,
+    }
+
+
+async def main(qa_path: str, question_type: str, limit: int):
+    with open(qa_path, "r", encoding="utf-8") as f:
+        questions = [q for q in json.load(f) if q.get("question_type") == question_type][:limit]
+    print(f"📦 {question_type} 问题 {len(questions)} 条")
+    results = {"llm": await run(False, questions), "template": await run(True, questions)}
+    print("=" * 70)
+    print(f"{'mode':10s} {'p50(s)':>8s} {'mean(s)':>8s} {'template':>9s} {'match':>6s}")
+    for mode, r in results.items():
+        print(f"{mode:10s} {r['p50_s']:8.2f} {r['mean_s']:8.2f} {r['template_hits']:9d} {r['answer_match']:6d}")
+    print("=" * 70)
+    print(f"📉 p50 延迟节省: {results['llm']['p50_s'] - results['template']['p50_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    qa_path = "data/qa.json"
+    question_type = "type1"
+    limit = None
+    if "--qa" in sys.argv:
+        qa_path = sys.argv[sys.argv.index("--qa") + 1]
+    if "--type" in sys.argv:
+        question_type = sys.argv[sys.argv.index("--type") + 1]
+    if "--limit" in sys.argv:
+        limit = int(sys.argv[sys.argv.index("--limit") + 1])
+    try:
+        asyncio.run(main(qa_path, question_type, limit))
+    finally:
+        kg_system.close()
+        asyncio.run(async_kg_system.close())
@@ -0,0 +1,75 @@
+"""
+ReThink 模式对比: 在 data/qa.json 的子集上分别以 think_mode=json / tool_calling 运行 ReActAgent，
+统计 think 阶段平均 prompt token、解析失败率、每个查询的 ReThink 轮数、单轮多调用次数与端到端延迟 p50。
+对比时关闭 PlanCache 与答案缓存，保证每一轮都经过 ReThink 的 LLM 调用。
+
+用法: python scripts/bench_think_mode.py [--qa data/qa.json] [--type type1] [--limit 20]
+"""
+import sys
+import json
+import time
+import asyncio
+import statistics
+from typing import Dict, Any, List
+
+from railmind.agent.react_agent import ReActAgent
+from railmind.config import get_settings
+from railmind.function_call.kg_tools import kg_system, async_kg_system
+
+
+async def run(mode: str, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    settings = get_settings()
+    settings.think_mode = mode
+    settings.plan_cache_enabled = False
+    settings.answer_cache_enabled = False
+    agent = ReActAgent()
+    before = agent.prompt_budget.stats().get("think", {"calls": 0, "prompt_tokens": 0})
+    latencies, errors = [], 0
+    for idx, item in enumerate(questions, 1):
+        start = time.perf_counter()
+        final_state = await agent.run(item["question"], user_id="think_mode_eval", session_id=f"{mode}_{idx}")
+        latencies.append(time.perf_counter() - start)
+        errors += bool(final_state.get("error"))
+        print(f"   [{mode}] [{idx}/{len(questions)}] {latencies[-1]:.2f}s | {item['question']} -> {final_state.get('final_answer', '')}")
+    after = agent.prompt_budget.stats().get("think", {"calls": 0, "prompt_tokens": 0})
+    calls = after["calls"] - before["calls"]
+    stats = agent.think_mode_stats()
+    return {
+        "prompt_tokens": (after["prompt_tokens"] - before["prompt_tokens"]) / calls if calls else 0.0,
+        "parse_failure_rate": stats["parse_failure_rate"],
+        "iterations_per_query": stats["iterations_per_query"],
+        "multi_call_turns": stats["multi_call_turns"],
+        "errors": errors,
+        "p50_s": statistics.median(latencies),
+    }
+
+
+async def main(qa_path: str, question_type: str, limit: int):
+    with open(qa_path, "r", encoding="utf-8") as f:
+        questions = [q for q in json.load(f) if q.get("question_type") == question_type][:limit]
+    print(f"📦 {question_type} 问题 {len(questions)} 条")
+    results = {mode: await run(mode, questions) for mode in ("json", "tool_calling")}
+    print("=" * 80)
+    print(f"{'mode':14s} {'tokens':>8s} {'parse_fail':>10s} {'iter/q':>7s} {'multi':>6s} {'errors':>7s} {'p50(s)':>7s}")
+    for mode, r in results.items():
+        print(f"{mode:14s} {r['prompt_tokens']:8.1f} {r['parse_failure_rate']:10.2%} {r['iterations_per_query']:7.2f} "
+              f"{r['multi_call_turns']:6d} {r['errors']:7d} {r['p50_s']:7.2f}")
+    print("=" * 80)
+    print(f"📉 think prompt token 节省: {results['json']['prompt_tokens'] - results['tool_calling']['prompt_tokens']:.1f} / 轮")
+
+
+if __name__ == "__main__":
+    qa_path = "data/qa.json"
+    question_type = "type1"
+    limit = None
+    if "--qa" in sys.argv:
+        qa_path = sys.argv[sys.argv.index("--qa") + 1]
+    if "--type" in sys.argv:
+        question_type = sys.argv[sys.argv.index("--type") + 1]
+    if "--limit" in sys.argv:
+        limit = int(sys.argv[sys.argv.index("--limit") + 1])
+    try:
+        asyncio.run(main(qa_path, question_type, limit))
+    finally:
+        kg_system.close()
+        asyncio.run(async_kg_system.close())
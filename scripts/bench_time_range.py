@@ -0,0 +1,115 @@
+"""
+时间窗口查询基准: 字符串比较 vs 整数分钟 + 范围索引
+在 Neo4j 中写入 N 个带 synthetic 标记的列车节点（默认 10 万），分别执行:
+    - string : 改造前的 t.departure_time 字符串比较
+    - minute : search_trains_by_time_range 当前使用的 departure_minute 索引范围查找（含跨零点窗口）
+结束后删除合成节点。
+
+用法: python scripts/bench_time_range.py [--trains 100000] [--iters 50] [--keep]
+"""
+import sys
+import time
+import random
+from typing import Dict, Any, List
+
+import numpy as np
+
+from railmind.function_call.kg_tools import TOOLS, kg_system
+from railmind.function_call.kg_schema import KGSchemaManager
+
+STRING_QUERY = """
+MATCH (t:Train)
+WHERE t.departure_time >= $start_time AND t.departure_time <= $end_time
+RETURN t.train_number as 车次,
+       t.departure_time as 发车时间,
+       t.arrival_time as 到达时间
+ORDER BY t.departure_time
+"""
+
+WINDOWS = [("08:00", "08:30"), ("12:00", "14:00"), ("06:00", "18:00"), ("23:30", "00:30")]
+TOOL_MAP = {tool.name: tool for tool in TOOLS}
+
+
+def load_synthetic(n: int, batch_size: int = 10000):
+    rng = random.Random(42)
+    rows: List[Dict[str, Any]] = []
+    for i in range(n):
+        dep = rng.randrange(1440)
+        arr = (dep + rng.randrange(30, 1200)) % 1440
+        rows.append({
+            "train_id": f"synthetic_{i}",
+            "train_number": f"S{i}",
+            # 与原始数据一致: 不补零的小时，如 "0:12:00"
+            "departure_time": f"{dep // 60}:{dep % 60:02d}:00",
+            "arrival_time": f"{arr // 60}:{arr % 60:02d}:00",
+            "departure_minute": dep,
+            "arrival_minute": arr,
+        })
+    for start in range(0, n, batch_size):
+        kg_system.run_query(
+            "UNWIND $rows AS row CREATE (t:Train) SET t = row, t.synthetic = true",
+            {"rows": rows[start:start + batch_size]},
+        )
+
+
+def drop_synthetic():
+    kg_system.run_query("""
+    MATCH (t:Train) WHERE t.synthetic = true
+    CALL { WITH t DELETE t } IN TRANSACTIONS OF 10000 ROWS
+    """)
+
+
+def measure(query: str, parameters: Dict[str, Any], iters: int) -> List[float]:
+    kg_system.run_query(query, parameters)
+    latencies = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        kg_system.run_query(query, parameters)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main(n: int, iters: int, keep: bool):
+    schema_manager = KGSchemaManager(kg_system.run_query)
+    schema_manager.ensure()
+    print(f"📦 写入 {n} 个合成列车节点...")
+    load_synthetic(n)
+    schema_manager.await_online()
+
+    print("=" * 100)
+    print(f"{'window':16s} {'string p50':>11s} {'string p99':>11s} {'minute p50':>11s} {'minute p99':>11s} {'rows(str/min)':>16s}")
+    print("=" * 100)
+    try:
+        for start_time, end_time in WINDOWS:
+            string_params = {"start_time": start_time, "end_time": end_time}
+            string_rows = len(kg_system.run_query(STRING_QUERY, string_params))
+            string_lat = measure(STRING_QUERY, string_params, iters)
+
+            query, parameters = TOOL_MAP["search_trains_by_time_range"].func.__wrapped__(start_time, end_time)
+            minute_rows = len(kg_system.run_query(query, parameters))
+            minute_lat = measure(query, parameters, iters)
+
+            print(
+                f"{start_time + '-' + end_time:16s} "
+                f"{np.percentile(string_lat, 50):11.1f} {np.percentile(string_lat, 99):11.1f} "
+                f"{np.percentile(minute_lat, 50):11.1f} {np.percentile(minute_lat, 99):11.1f} "
+                f"{f'{string_rows}/{minute_rows}':>16s}"
+            )
+    finally:
+        if not keep:
+            drop_synthetic()
+    print("=" * 100)
+    print("注: 字符串比较下 \"9:00:00\" > \"10:00:00\"，且跨零点窗口返回 0 行，因此行数不同即为旧实现的错误结果。")
+
+
+if __name__ == "__main__":
+    n = 100000
+    iters = 50
+    if "--trains" in sys.argv:
+        n = int(sys.argv[sys.argv.index("--trains") + 1])
+    if "--iters" in sys.argv:
+        iters = int(sys.argv[sys.argv.index("--iters") + 1])
+    try:
+        main(n, iters, keep="--keep" in sys.argv)
+    finally:
+        kg_system.close()
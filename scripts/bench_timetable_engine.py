@@ -0,0 +1,71 @@
+"""
+TimetableEngine 与 Neo4j 单工具延迟对比（p50 / p99）
+直接调用数据层，绕过 kg_cache，衡量每次工具调用的非LLM耗时。
+
+用法:
+    python scripts/bench_timetable_engine.py               # Engine + Neo4j
+    python scripts/bench_timetable_engine.py --engine-only # 仅 Engine（无需 Neo4j）
+    python scripts/bench_timetable_engine.py --iters 500
+"""
+import sys
+import time
+from typing import Dict, Any, List, Callable
+
+import numpy as np
+
+from railmind.function_call.kg_tools import TOOLS, kg_system
+from railmind.function_call.timetable_engine import get_timetable_engine
+
+SAMPLE_PARAMS: Dict[str, Dict[str, Any]] = {
+    "search_trains_by_station": {"station_name": "成都"},
+    "get_train_details": {"train_number": "K4547/6"},
+    "find_trains_between_stations": {"departure_station": "成都西", "arrival_station": "佳木斯"},
+    "search_trains_by_time_range": {"start_time": "00:00", "end_time": "01:00"},
+    "search_trains_by_train_type": {"train_type": "K"},
+    "get_station_info": {"station_name": "成都西"},
+    "get_waiting_hall_info": {"hall_name": "综合候乘中心"},
+    "get_platform_info": {"platform_number": "2"},
+    "get_ticket_gate_info": {"gate_number": "1B"},
+    "get_all_stations": {},
+    "get_all_trains": {},
+    "search_trains_by_multiple_conditions": {"departure_station": "成都西", "train_type": "K"},
+}
+
+
+def measure(fn: Callable[[], Any], iters: int) -> List[float]:
+    fn()  # 预热
+    latencies = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main(iters: int, engine_only: bool):
+    engine = get_timetable_engine()
+    tool_map = {tool.name: tool for tool in TOOLS}
+
+    print("=" * 100)
+    print(f"⏱️  每个工具 {iters} 次调用 | 单位: ms")
+    print(f"{'tool':40s} {'engine p50':>11s} {'engine p99':>11s} {'neo4j p50':>11s} {'neo4j p99':>11s}")
+    print("=" * 100)
+    for name, params in SAMPLE_PARAMS.items():
+        engine_lat = measure(lambda: getattr(engine, name)(**params), iters)
+        line = f"{name:40s} {np.percentile(engine_lat, 50):11.3f} {np.percentile(engine_lat, 99):11.3f}"
+        if not engine_only:
+            query, parameters = tool_map[name].func.__wrapped__(**params)
+            neo4j_lat = measure(lambda: kg_system.run_query(query, parameters), iters)
+            line += f" {np.percentile(neo4j_lat, 50):11.3f} {np.percentile(neo4j_lat, 99):11.3f}"
+        print(line)
+    print("=" * 100)
+
+
+if __name__ == "__main__":
+    iters = 200
+    if "--iters" in sys.argv:
+        iters = int(sys.argv[sys.argv.index("--iters") + 1])
+    try:
+        main(iters, engine_only="--engine-only" in sys.argv)
+    finally:
+        kg_system.close()
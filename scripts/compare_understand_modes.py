@@ -0,0 +1,83 @@
+"""
+理解阶段两种模式对比: two_stage (rewrite_query -> recognize_intent) vs fused (understand_query)
+在进程内对 data/qa.json 逐题运行 ReActAgent，统计端到端延迟、LLM 调用次数与 token 用量。
+对比时关闭 RewriteGate，使两种模式都执行完整的理解阶段（--with-gate 保留门控）。
+
+用法: python scripts/compare_understand_modes.py [--qa data/qa.json] [--limit 25] [--with-gate]
+"""
+import sys
+import json
+import time
+import asyncio
+import statistics
+from typing import Dict, Any, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from railmind.agent.react_agent import ReActAgent
+from railmind.config import get_settings
+from railmind.function_call.kg_tools import kg_system, async_kg_system
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def on_llm_end(self, response, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self.calls += 1
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+
+
+async def run_mode(mode: str, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    get_settings().understand_mode = mode
+    agent = ReActAgent()
+    usage = TokenUsageCallback()
+    for llm in agent.llm_registry.instances():
+        llm.callbacks = [usage]
+    latencies = []
+    for idx, item in enumerate(questions, 1):
+        start = time.perf_counter()
+        final_state = await agent.run(item["question"], user_id="understand_eval", session_id=f"{mode}_{idx}")
+        latencies.append(time.perf_counter() - start)
+        print(f"   [{mode}] [{idx}/{len(questions)}] {latencies[-1]:.2f}s | 子查询 {len(final_state.get('sub_queries', []))} | {item['question']}")
+    return {
+        "p50_s": statistics.median(latencies),
+        "mean_s": statistics.mean(latencies),
+        "llm_calls": usage.calls,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+    }
+
+
+async def main(qa_path: str, limit: int, with_gate: bool):
+    with open(qa_path, "r", encoding="utf-8") as f:
+        questions = json.load(f)[:limit]
+    get_settings().rewrite_gate_enabled = with_gate
+
+    results = {mode: await run_mode(mode, questions) for mode in ("two_stage", "fused")}
+    print("=" * 90)
+    print(f"{'mode':12s} {'p50(s)':>8s} {'mean(s)':>8s} {'llm calls':>10s} {'prompt tok':>11s} {'compl tok':>10s}")
+    for mode, r in results.items():
+        print(f"{mode:12s} {r['p50_s']:8.2f} {r['mean_s']:8.2f} {r['llm_calls']:10d} {r['prompt_tokens']:11d} {r['completion_tokens']:10d}")
+    print("=" * 90)
+    two, fused = results["two_stage"], results["fused"]
+    print(f"📉 平均延迟节省: {two['mean_s'] - fused['mean_s']:.2f}s / 题, "
+          f"token 节省: {(two['prompt_tokens'] + two['completion_tokens']) - (fused['prompt_tokens'] + fused['completion_tokens'])}")
+
+
+if __name__ == "__main__":
+    qa_path = "data/qa.json"
+    limit = None
+    if "--qa" in sys.argv:
+        qa_path = sys.argv[sys.argv.index("--qa") + 1]
+    if "--limit" in sys.argv:
+        limit = int(sys.argv[sys.argv.index("--limit") + 1])
+    try:
+        asyncio.run(main(qa_path, limit, with_gate="--with-gate" in sys.argv))
+    finally:
+        kg_system.close()
+        asyncio.run(async_kg_system.close())
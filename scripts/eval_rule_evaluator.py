@@ -0,0 +1,66 @@
+"""
+RuleEvaluator 与 LLM 评估的一致率报告
+回放集为 ReActAgent 在 settings.rule_evaluator_log_path 中记录的 LLM 评估 JSONL (query, result, should_continue)。
+注意: 开启规则后只有规则不确定的样本才会调用 LLM，采集回放集时应设置 RULE_EVALUATOR_ENABLED=false。
+
+输出每条规则的命中数、与 LLM 判断一致的比例，以及规则覆盖率（可跳过的 LLM 调用占比）。
+不一致的样本写入 --diff 文件便于人工复核。
+
+用法: python scripts/eval_rule_evaluator.py --data data/eval_replay.jsonl [--diff data/eval_disagreements.jsonl]
+"""
+import sys
+import json
+from collections import defaultdict
+from typing import Dict, Any, List
+
+from railmind.operators.rule_evaluator import RuleEvaluator
+
+
+def load_replay(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(data_path: str, diff_path: str):
+    samples = load_replay(data_path)
+    evaluator = RuleEvaluator()
+    per_rule: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "agree": 0})
+    disagreements = []
+    for sample in samples:
+        decision = evaluator.decide(sample["query"], sample["result"])
+        if decision is None:
+            continue
+        counter = per_rule[decision["rule"]]
+        counter["hits"] += 1
+        if decision["should_continue"] == sample["should_continue"]:
+            counter["agree"] += 1
+        else:
+            disagreements.append({**sample, "rule": decision["rule"], "rule_reason": decision["reason"]})
+
+    decided = sum(c["hits"] for c in per_rule.values())
+    agreed = sum(c["agree"] for c in per_rule.values())
+    print(f"📦 回放样本 {len(samples)} 条")
+    print("=" * 70)
+    print(f"{'rule':28s} {'hits':>8s} {'agree':>8s} {'agreement':>10s}")
+    for rule, c in sorted(per_rule.items(), key=lambda x: -x[1]["hits"]):
+        print(f"{rule:28s} {c['hits']:8d} {c['agree']:8d} {c['agree'] / c['hits']:10.3f}")
+    print("=" * 70)
+    if samples:
+        print(f"✅ 规则覆盖率: {decided / len(samples):.3f}（可跳过的 LLM 评估调用）")
+    if decided:
+        print(f"✅ 总体一致率: {agreed / decided:.3f}，不一致 {len(disagreements)} 条")
+    if diff_path and disagreements:
+        with open(diff_path, "w", encoding="utf-8") as f:
+            for item in disagreements:
+                f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+        print(f"💾 不一致样本已保存: {diff_path}")
+
+
+if __name__ == "__main__":
+    data_path = "data/eval_replay.jsonl"
+    diff_path = ""
+    if "--data" in sys.argv:
+        data_path = sys.argv[sys.argv.index("--data") + 1]
+    if "--diff" in sys.argv:
+        diff_path = sys.argv[sys.argv.index("--diff") + 1]
+    main(data_path, diff_path)
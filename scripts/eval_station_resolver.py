@@ -0,0 +1,76 @@
+"""
+车站名称解析收益评估
+在进程内对 data/qa.json 逐题运行 ReActAgent，分别关闭/开启 StationResolver，对比:
+    - 总 ReAct 迭代次数（total_iteration_count 之和）
+    - 返回空结果的工具调用次数
+开启时同时输出解析器的命中分布（exact / normalized / city / prefix / fuzzy / unresolved）。
+
+用法: python scripts/eval_station_resolver.py [--qa data/qa.json] [--limit 25]
+"""
+import sys
+import json
+import asyncio
+from typing import Dict, Any, List
+
+from railmind.agent.react_agent import ReActAgent
+from railmind.config import get_settings
+from railmind.function_call.kg_tools import kg_system, async_kg_system
+from railmind.function_call.station_resolver import get_station_resolver
+
+
+def count_empty_calls(final_state: Dict[str, Any]) -> int:
+    empty = 0
+    for sub_query in final_state.get("sub_queries", []):
+        process = sub_query.get("exe_process_data") or {}
+        for func in process.get("exec_func_info", []):
+            if func.get("result_summary") == "无结果":
+                empty += 1
+    return empty
+
+
+async def run_all(agent: ReActAgent, questions: List[Dict[str, Any]]) -> Dict[str, int]:
+    totals = {"iterations": 0, "empty_calls": 0, "errors": 0}
+    for idx, item in enumerate(questions, 1):
+        final_state = await agent.run(item["question"], user_id="station_resolver_eval", session_id=f"eval_{idx}")
+        totals["iterations"] += final_state.get("total_iteration_count", 0)
+        totals["empty_calls"] += count_empty_calls(final_state)
+        totals["errors"] += 1 if final_state.get("error") else 0
+        print(f"   [{idx}/{len(questions)}] 迭代 {final_state.get('total_iteration_count', 0)} | {item['question']}")
+    return totals
+
+
+async def main(qa_path: str, limit: int):
+    with open(qa_path, "r", encoding="utf-8") as f:
+        questions = json.load(f)[:limit]
+    settings = get_settings()
+    agent = ReActAgent()
+
+    results = {}
+    for enabled in (False, True):
+        settings.station_resolver_enabled = enabled
+        label = "resolver on" if enabled else "resolver off"
+        print(f"🚀 {label}: {len(questions)} 个问题")
+        results[label] = await run_all(agent, questions)
+
+    off, on = results["resolver off"], results["resolver on"]
+    print("=" * 60)
+    print(f"{'':14s} {'iterations':>12s} {'empty calls':>12s} {'errors':>8s}")
+    for label, totals in results.items():
+        print(f"{label:14s} {totals['iterations']:12d} {totals['empty_calls']:12d} {totals['errors']:8d}")
+    print("=" * 60)
+    print(f"📉 节省 ReAct 迭代: {off['iterations'] - on['iterations']}（{len(questions)} 题）")
+    print(f"📊 解析命中分布: {get_station_resolver().stats}")
+
+
+if __name__ == "__main__":
+    qa_path = "data/qa.json"
+    limit = None
+    if "--qa" in sys.argv:
+        qa_path = sys.argv[sys.argv.index("--qa") + 1]
+    if "--limit" in sys.argv:
+        limit = int(sys.argv[sys.argv.index("--limit") + 1])
+    try:
+        asyncio.run(main(qa_path, limit))
+    finally:
+        kg_system.close()
+        asyncio.run(async_kg_system.close())
@@ -0,0 +1,100 @@
+"""
+KG Schema PROFILE 报告脚本
+对 kg_tools 中每个 Cypher 执行 PROFILE，汇总执行计划中的 db hits 与算子，对比建索引前后的差异。
+
+用法:
+    python scripts/profile_kg_schema.py            # 仅报告当前数据库的 db hits
+    python scripts/profile_kg_schema.py --compare  # 删除索引 -> 报告 -> 重建索引 -> 报告（会短暂影响线上查询！）
+"""
+import sys
+from typing import Dict, Any, List, Tuple
+
+from railmind.function_call.kg_tools import TOOLS, kg_system
+from railmind.function_call.kg_schema import KGSchemaManager
+
+# 每个工具的样例参数（取自 data/raw_data.xlsx）
+SAMPLE_PARAMS: Dict[str, Dict[str, Any]] = {
+    "search_trains_by_station": {"station_name": "成都"},
+    "get_train_details": {"train_number": "K4547/6"},
+    "find_trains_between_stations": {"departure_station": "成都西", "arrival_station": "佳木斯"},
+    "search_trains_by_time_range": {"start_time": "00:00", "end_time": "01:00"},
+    "search_trains_by_train_type": {"train_type": "K"},
+    "get_station_info": {"station_name": "成都西"},
+    "get_waiting_hall_info": {"hall_name": "综合候乘中心"},
+    "get_platform_info": {"platform_number": "2"},
+    "get_ticket_gate_info": {"gate_number": "1B"},
+    "get_all_stations": {},
+    "get_all_trains": {},
+    "search_trains_by_multiple_conditions": {"departure_station": "成都西", "train_type": "K"},
+}
+
+
+def collect_plan(plan: Dict[str, Any]) -> Tuple[int, List[str]]:
+    """递归累加执行计划的 dbHits，并收集算子名称"""
+    db_hits = plan.get("dbHits", 0)
+    operators = [plan.get("operatorType", "")]
+    for child in plan.get("children", []):
+        child_hits, child_ops = collect_plan(child)
+        db_hits += child_hits
+        operators.extend(child_ops)
+    return db_hits, operators
+
+
+def profile_tools(baseline: bool = False) -> Dict[str, Tuple[int, List[str]]]:
+    """
+    对每个工具执行 PROFILE
+    baseline=True 时 search_trains_by_station 使用单字参数构造的 CONTAINS 扫描语句（即改造前的写法），
+    因为没有全文索引时 db.index.fulltext.queryNodes 无法执行。
+    """
+    report = {}
+    for tool in TOOLS:
+        if tool.name not in SAMPLE_PARAMS:
+            continue
+        parameters = SAMPLE_PARAMS[tool.name]
+        if baseline and tool.name == "search_trains_by_station":
+            query, _ = tool.func.__wrapped__(station_name="成")
+        else:
+            query, parameters = tool.func.__wrapped__(**parameters)
+        with kg_system.driver.session() as session:
+            summary = session.run("PROFILE " + query, parameters).consume()
+        report[tool.name] = collect_plan(summary.profile)
+    return report
+
+
+def print_report(title: str, report: Dict[str, Tuple[int, List[str]]]):
+    print("=" * 100)
+    print(f"📊 {title}")
+    print("=" * 100)
+    for name, (db_hits, operators) in report.items():
+        seeks = sorted({op.split("@")[0] for op in operators if "Seek" in op or "Scan" in op or "Procedure" in op})
+        print(f"{name:40s} db hits: {db_hits:>10d} | {', '.join(seeks)}")
+    print(f"{'TOTAL':40s} db hits: {sum(r[0] for r in report.values()):>10d}")
+
+
+def main():
+    schema_manager = KGSchemaManager(kg_system.run_query)
+    if "--compare" not in sys.argv:
+        print_report("当前数据库", profile_tools())
+        return
+
+    schema_manager.drop()
+    before = profile_tools(baseline=True)
+    print_report("建索引前", before)
+
+    schema_manager.ensure()
+    schema_manager.await_online()
+    after = profile_tools()
+    print_report("建索引后", after)
+
+    print("=" * 100)
+    for name in after:
+        b, a = before[name][0], after[name][0]
+        ratio = b / a if a else float("inf")
+        print(f"{name:40s} {b:>10d} -> {a:>10d}  ({ratio:.1f}x)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        kg_system.close()
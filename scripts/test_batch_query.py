@@ -2,6 +2,7 @@
 从 JSON 文件批量测试查询脚本
 支持从外部 JSON 文件加载测试数据
 支持并发执行
+支持流式接口（--stream），统计首字节时间 (TTFB) 与首个答案 token 时间 (TTFT)
 """
 import requests
 import json
@@ -12,9 +13,11 @@ from pathlib import Path
 from typing import List, Dict, Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
+import statistics
 
 API_BASE_URL = "http://172.16.107.15:8000"
 USER_ID = "test_user"
+PRIORITY = "interactive" # 准入优先级通道，--batch 时为 batch
 
 
 def load_test_data(file_path: str) -> List[Dict]:
@@ -63,7 +66,8 @@ def query_api(question: str, session_id: str) -> Dict[str, Any]:
         json={
             "query": question,
             "user_id": USER_ID,
-            "session_id": session_id
+            "session_id": session_id,
+            "priority": PRIORITY
         },
         timeout=120
     )
@@ -71,7 +75,35 @@ def query_api(question: str, session_id: str) -> Dict[str, Any]:
     return response.json()
 
 
-def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_dir: str = ".", max_workers: int = 1):
+def query_stream_api(question: str, session_id: str) -> Dict[str, Any]:
+    """发送流式查询请求，返回 complete 事件的摘要并附带 ttfb / ttft（秒）"""
+    start = time.time()
+    ttfb, ttft, event, summary = None, None, None, {}
+    with requests.get(
+        f"{API_BASE_URL}/api/query_stream",
+        params={"query": question, "user_id": USER_ID, "session_id": session_id, "priority": PRIORITY},
+        stream=True,
+        timeout=120
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if ttfb is None:
+                ttfb = time.time() - start
+            if not line:
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                if event in ("answer_token", "answer") and ttft is None:
+                    ttft = time.time() - start
+                elif event == "complete":
+                    summary = json.loads(line[len("data:"):])
+                elif event == "error":
+                    summary = {"success": False, "answer": "", "metadata": {"error": json.loads(line[len("data:"):]).get("error")}}
+    return {**summary, "ttfb": ttfb, "ttft": ttft}
+
+
+def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_dir: str = ".", max_workers: int = 1, stream: bool = False):
     """
     批量运行测试
     
@@ -80,6 +112,7 @@ def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_
         use_same_session: 是否使用同一个会话
         output_dir: 输出目录
         max_workers: 最大并发数（1为串行，>1为并发）
+        stream: 是否使用流式接口
     """
     results = []
     start_time = datetime.now()
@@ -90,6 +123,7 @@ def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_
     print(f"🕐 开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"🔄 会话模式: {'同一会话' if use_same_session else '独立会话'}")
     print(f"⚡ 并发数: {max_workers} {'(串行)' if max_workers == 1 else '(并发)'}")
+    print(f"📡 接口: {'/api/query_stream' if stream else '/api/query'}")
     print("=" * 80)
     print()
     
@@ -125,7 +159,7 @@ def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_
                 current_session_id = create_session()
             
             query_start = time.time()
-            response = query_api(question, current_session_id)
+            response = query_stream_api(question, current_session_id) if stream else query_api(question, current_session_id)
             query_time = time.time() - query_start
             
             actual_answer = response.get("answer", "")
@@ -146,6 +180,8 @@ def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_
                 "iterations": iterations,
                 "functions_used": functions_used,
                 "query_time": round(query_time, 2),
+                "ttfb": response.get("ttfb"),
+                "ttft": response.get("ttft"),
                 "session_id": current_session_id,
                 "timestamp": datetime.now().isoformat(),
                 "full_response": response
@@ -161,6 +197,22 @@ def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_
             
             return result
             
+        except requests.exceptions.HTTPError as e:
+            # 准入控制拒绝 (429/503)
+            status = e.response.status_code
+            retry_after = e.response.headers.get("Retry-After")
+            with print_lock:
+                print(f"   🚫 被拒绝 | HTTP {status} | Retry-After: {retry_after}")
+                print()
+            return {
+                "id": question_id,
+                "question": question,
+                "error": f"HTTP {status}",
+                "rejected": status in (429, 503),
+                "retry_after": retry_after,
+                "success": False,
+                "timestamp": datetime.now().isoformat()
+            }
         except requests.exceptions.Timeout:
             with print_lock:
                 print(f"   ⏰ 超时")
@@ -217,6 +269,9 @@ def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_
     print(f"⏱️  总耗时: {total_time:.2f}秒")
     print(f"📈 成功: {success_count}/{len(results)} ({success_count/len(results)*100:.1f}%)")
     print(f"📉 失败: {len(results)-success_count}/{len(results)}")
+    rejected = [r for r in results if r.get("rejected")]
+    if rejected:
+        print(f"🚫 准入拒绝: {len(rejected)} (429: {sum(r['error'] == 'HTTP 429' for r in rejected)}, 503: {sum(r['error'] == 'HTTP 503' for r in rejected)})")
     
     if results:
         query_times = [r.get('query_time', 0) for r in results if 'query_time' in r]
@@ -228,6 +283,13 @@ def run_batch_test(test_data: List[Dict], use_same_session: bool = True, output_
         
         if iterations:
             print(f"🔄 平均迭代: {sum(iterations)/len(iterations):.1f}")
+        
+        ttfbs = [r["ttfb"] for r in results if r.get("ttfb") is not None]
+        ttfts = [r["ttft"] for r in results if r.get("ttft") is not None]
+        if ttfbs:
+            print(f"📡 TTFB p50: {statistics.median(ttfbs) * 1000:.0f}ms | 最慢: {max(ttfbs) * 1000:.0f}ms")
+        if ttfts:
+            print(f"💬 首个答案 token p50: {statistics.median(ttfts):.2f}s")
     
     # 保存结果
     output_path = Path(output_dir)
@@ -263,6 +325,8 @@ def main():
         print("选项:")
         print("  --new-session    每个问题使用独立会话")
         print("  --workers N      并发数（默认1为串行）")
+        print("  --stream         使用流式接口，统计 TTFB / 首个答案 token 时间")
+        print("  --batch          以 batch 优先级通道提交请求")
         print("")
         print("示例:")
         print("  python test_batch_query_from_file.py test_data.json")
@@ -270,7 +334,10 @@ def main():
         print("  python test_batch_query_from_file.py test_data.json --new-session --workers 3")
         sys.exit(1)
     
+    global PRIORITY
     json_file = sys.argv[1]
+    if "--batch" in sys.argv:
+        PRIORITY = "batch"
     use_same_session = "--new-session" not in sys.argv
     
     # 解析并发数
@@ -289,7 +356,7 @@ def main():
     print(f"📂 加载测试数据: {json_file}")
     test_data = load_test_data(json_file)
     
-    run_batch_test(test_data, use_same_session=use_same_session, max_workers=max_workers)
+    run_batch_test(test_data, use_same_session=use_same_session, max_workers=max_workers, stream="--stream" in sys.argv)
 
 
 if __name__ == "__main__":
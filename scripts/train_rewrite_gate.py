@@ -0,0 +1,64 @@
+"""
+RewriteGate 分类器训练脚本
+训练数据为 ReActAgent 在 settings.rewrite_gate_log_path 中记录的 (原查询, 改写结果) JSONL:
+    - 改写结果与原查询（去除空白与标点后）一致 --> label=1，无需改写
+    - 否则 --> label=0
+训练 CharNGramClassifier，输出留出集上的准确率与按阈值的跳过率/误跳过率，并保存为 JSON 模型，
+部署时将 REWRITE_GATE_MODEL_PATH 指向该文件。
+
+用法: python scripts/train_rewrite_gate.py --data data/rewrite_pairs.jsonl --output data/rewrite_gate.json [--threshold 0.8]
+"""
+import sys
+import json
+import random
+from typing import List, Tuple
+
+from railmind.operators.rewrite_gate import CharNGramClassifier, normalize_query
+
+
+def load_pairs(path: str) -> List[Tuple[str, int]]:
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            label = int(normalize_query(item["query"]) == normalize_query(item["rewritten_query"]))
+            samples.append((item["query"], label))
+    return samples
+
+
+def main(data_path: str, output_path: str, threshold: float):
+    samples = load_pairs(data_path)
+    random.Random(42).shuffle(samples)
+    split = int(len(samples) * 0.8)
+    train, holdout = samples[:split], samples[split:]
+    print(f"📦 样本 {len(samples)} 条（无需改写 {sum(l for _, l in samples)} 条），训练 {len(train)} / 留出 {len(holdout)}")
+
+    model = CharNGramClassifier().fit(*zip(*train)) if train else CharNGramClassifier()
+    if holdout:
+        scores = [(model.predict_proba(q), label) for q, label in holdout]
+        accuracy = sum((s >= 0.5) == bool(label) for s, label in scores) / len(scores)
+        skipped = [label for s, label in scores if s >= threshold]
+        wrong_skips = sum(1 for label in skipped if label == 0)
+        print(f"✅ 留出集准确率: {accuracy:.3f}")
+        print(f"📊 阈值 {threshold}: 跳过率 {len(skipped) / len(scores):.3f}, 误跳过 {wrong_skips} 条（需要改写却被跳过）")
+
+    # 全量数据重新训练后保存
+    final = CharNGramClassifier().fit(*zip(*samples)) if samples else model
+    final.save(output_path)
+    print(f"💾 模型已保存: {output_path}")
+
+
+if __name__ == "__main__":
+    data_path = "data/rewrite_pairs.jsonl"
+    output_path = "data/rewrite_gate.json"
+    threshold = 0.8
+    if "--data" in sys.argv:
+        data_path = sys.argv[sys.argv.index("--data") + 1]
+    if "--output" in sys.argv:
+        output_path = sys.argv[sys.argv.index("--output") + 1]
+    if "--threshold" in sys.argv:
+        threshold = float(sys.argv[sys.argv.index("--threshold") + 1])
+    main(data_path, output_path, threshold)
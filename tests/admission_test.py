@@ -0,0 +1,112 @@
+"""AdmissionController 离线测试: 并发上限、优先级排队、429/503 快速拒绝与名额归还"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from railmind.api import admission, routes
+from railmind.api.admission import AdmissionController, AdmissionRejected
+from railmind.config import Settings, get_settings
+
+
+def test_concurrency_limit_and_queue_full():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, queue_sizes={"interactive": 1, "batch": 1})
+        ticket = await controller.acquire()
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 429
+        assert controller.stats()["queue_depth"] == 1
+        ticket.release()
+        second = await queued
+        assert controller.stats()["active"] == 1
+        second.release()
+        second.release()
+        assert controller.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_returns_503():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, queue_timeout=0.01)
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 503
+        assert controller.stats()["lanes"]["interactive"]["rejected_timeout"] == 1
+        assert controller.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_interactive_has_priority_over_batch():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, batch_share=0.5)
+        order = []
+        ticket = await controller.acquire("interactive")
+        await controller.acquire("batch")
+
+        async def wait(lane):
+            granted = await controller.acquire(lane)
+            order.append(lane)
+            return granted
+
+        batch = asyncio.ensure_future(wait("batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(wait("interactive"))
+        await asyncio.sleep(0)
+        ticket.release()
+        await interactive
+        assert order == ["interactive"] and not batch.done()
+        batch.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_releases_slot():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        ticket = await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        ticket.release()
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert controller.stats()["active"] == 0
+        assert controller.stats()["queue_depth"] == 0
+        (await controller.acquire()).release()
+
+    asyncio.run(scenario())
+
+
+def test_loop_lag_rejects_with_503():
+    async def scenario():
+        controller = AdmissionController(max_loop_lag=0.1)
+        controller._lag_samples.append(1.0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 503
+
+    asyncio.run(scenario())
+
+
+def test_route_maps_rejection_to_http_error(monkeypatch):
+    controller = AdmissionController(max_concurrency=1, queue_sizes={"interactive": 0, "batch": 0}, retry_after=7)
+    monkeypatch.setattr(admission, "_admission_controller", controller)
+    monkeypatch.setattr(get_settings(), "admission_enabled", True)
+
+    async def scenario():
+        await routes._admit("interactive")
+        with pytest.raises(HTTPException) as rejected:
+            await routes._admit("interactive")
+        assert rejected.value.status_code == 429
+        assert rejected.value.headers == {"Retry-After": "7"}
+
+    asyncio.run(scenario())
+
+
+def test_disabled_by_default():
+    assert Settings.model_fields["admission_enabled"].default is False
@@ -0,0 +1,75 @@
+"""AnswerCache 离线测试: 精确匹配、近似匹配的实体约束（车站顺序/否定词）与失效"""
+from railmind.config import Settings
+from railmind.operators.answer_cache import AnswerCache
+
+STATIONS = ["北京西", "西安北", "郑州"]
+
+
+def stations(text):
+    return [name for name in STATIONS if name in text]
+
+
+def final_state(answer):
+    return {"final_answer": answer, "sub_queries": [], "error": None}
+
+
+def test_exact_match_and_kg_version():
+    cache = AnswerCache()
+    assert cache.put("K178的检票口是哪个？", "v1", final_state("A1"))
+    assert cache.get("k178 的检票口是哪个", "v1")["final_answer"] == "A1"
+    assert cache.get("K178的检票口是哪个？", "v2") is None
+    assert cache.get("K178的检票口是哪个？", "v1") is None
+
+
+def test_near_duplicates_off_by_default():
+    cache = AnswerCache(station_finder=stations)
+    cache.put("从北京西到西安北的车次有哪些", "v1", final_state("T41"))
+    assert cache.get("从北京西到西安北的车次都有哪些", "v1") is None
+    assert Settings.model_fields["answer_cache_enabled"].default is False
+    assert Settings.model_fields["answer_cache_similarity"].default == 0
+
+
+def test_near_duplicate_requires_same_entities():
+    cache = AnswerCache(station_finder=stations, similarity=0.5)
+    cache.put("从北京西到西安北的车次有哪些", "v1", final_state("T41"))
+    assert cache.get("从北京西到西安北的车次都有哪些", "v1")["final_answer"] == "T41"
+    assert cache.get("从北京西到郑州的车次有哪些", "v1") is None
+
+
+def test_reversed_route_does_not_match():
+    cache = AnswerCache(station_finder=stations, similarity=0.1)
+    cache.put("从北京西到西安北的车次有哪些", "v1", final_state("T41"))
+    assert cache.get("从西安北到北京西的车次有哪些", "v1") is None
+
+
+def test_negation_does_not_match_affirmative():
+    cache = AnswerCache(station_finder=stations, similarity=0.1)
+    cache.put("可以乘坐哪些从北京西到西安北的车次", "v1", final_state("T41"))
+    cache.put("有哪些从北京西到西安北的车次", "v1", final_state("T41"))
+    assert cache.get("不可以乘坐哪些从北京西到西安北的车次", "v1") is None
+    assert cache.get("没有哪些从北京西到西安北的车次", "v1") is None
+
+
+def test_exact_only_without_station_lookup():
+    def unavailable(text):
+        raise RuntimeError("Station resolver is not built yet")
+
+    for finder in (None, unavailable):
+        cache = AnswerCache(station_finder=finder, similarity=0.1)
+        cache.put("K178的检票口是哪个", "v1", final_state("A1"))
+        assert cache.get("K178的检票口是哪个呢", "v1") is None
+        assert cache.get("K178的检票口是哪个", "v1")["final_answer"] == "A1"
+
+
+def test_uncacheable_queries():
+    cache = AnswerCache()
+    assert not cache.put("今天K178几点发车", "v1", final_state("8:00"))
+    assert not cache.put("它几点发车", "v1", final_state("8:00"))
+    clock = {"final_answer": "8:00", "sub_queries": [{"exe_process_data": {"exec_func_info": [{"name": "get_current_date"}]}}]}
+    assert not cache.put("K178几点发车", "v1", clock)
+
+
+def test_station_names_with_negation_characters_still_match():
+    cache = AnswerCache(station_finder=lambda text: [name for name in ("无锡", "上海") if name in text], similarity=0.5)
+    cache.put("从无锡到上海的车次有哪些", "v1", final_state("G7001"))
+    assert cache.get("从无锡到上海的车次都有哪些", "v1")["final_answer"] == "G7001"
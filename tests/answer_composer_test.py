@@ -0,0 +1,47 @@
+"""AnswerComposer 离线测试: 单属性模板答案，否定句与多属性查询交给 LLM"""
+from railmind.config import Settings
+from railmind.operators.answer_composer import AnswerComposer
+
+RECORD = {"车次": "K178", "始发站": "西安", "终到站": "郑州", "发车时间": "08:05:00", "候车厅": "候车一厅", "检票口": "A1", "站台": 3}
+
+
+def sub_queries(result=None):
+    return [{"sub_query": "q", "exe_process_data": {"observations": [{"result": [RECORD] if result is None else result}]}}]
+
+
+def test_single_attribute_template():
+    composer = AnswerComposer()
+    assert composer.compose("K178的检票口是哪个？", sub_queries()) == "K178次列车的检票口是A1。"
+    assert composer.compose("K178几点发车？", sub_queries()) == "K178次列车的开点是8:05。"
+    assert composer.stats()["template"] == 2
+
+
+def test_waiting_location_is_not_answered_as_terminal():
+    answer = AnswerComposer().compose("K178去哪里候车？", sub_queries())
+    assert answer == "K178次列车的候车厅是候车一厅。"
+    assert "郑州" not in answer
+
+
+def test_negation_falls_back_to_llm():
+    composer = AnswerComposer()
+    assert composer.compose("K178不在几号站台吗", sub_queries()) is None
+    assert composer.compose("K178没有检票口吗", sub_queries()) is None
+    assert composer.stats()["llm"] == 2
+
+
+def test_multiple_or_missing_attributes_fall_back_to_llm():
+    composer = AnswerComposer()
+    assert composer.compose("K178的始发站和终到站", sub_queries()) is None
+    assert composer.compose("K178的详情", sub_queries()) is None
+    assert composer.compose("K178的检票口是哪个？", sub_queries([RECORD, RECORD])) is None
+    assert composer.compose("K178的检票口是哪个？", sub_queries([{"车次": "K178"}])) is None
+
+
+def test_disabled_by_default():
+    assert Settings.model_fields["template_answer_enabled"].default is False
+
+
+def test_station_names_with_negation_characters_use_template():
+    record = {**RECORD, "始发站": "无锡", "检票口": "B3"}
+    answer = AnswerComposer().compose("从无锡开的K178检票口是哪个？", sub_queries([record]))
+    assert answer == "K178次列车的检票口是B3。"
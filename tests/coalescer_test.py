@@ -0,0 +1,63 @@
+"""RequestCoalescer 离线测试: 相同在途查询只执行一次，指代查询在有会话记忆时不合并"""
+import asyncio
+
+from railmind.agent.coalescer import RequestCoalescer
+from railmind.config import Settings
+
+
+def test_key_normalizes_query():
+    assert RequestCoalescer.key("K178 的检票口？") == RequestCoalescer.key("k178的检票口")
+
+
+def test_referential_query_with_memory_is_not_coalescable():
+    memory = {"short_term": [{"query": "K178的检票口"}], "long_term": []}
+    assert RequestCoalescer.coalescable("K178几点发车", memory)
+    assert RequestCoalescer.coalescable("这趟车几点发车", None)
+    assert RequestCoalescer.coalescable("这趟车几点发车", {"short_term": [], "long_term": []})
+    assert not RequestCoalescer.coalescable("这趟车几点发车", memory)
+
+
+def test_concurrent_identical_queries_share_one_execution():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"final_answer": "A1"}
+
+    async def scenario():
+        return await asyncio.gather(
+            coalescer.run("K178的检票口", execute),
+            coalescer.run("k178 的检票口", execute),
+            coalescer.run("K178的检票口？", execute),
+        )
+
+    results = asyncio.run(scenario())
+    assert calls == [1]
+    assert [shared for _, shared in results] == [False, True, True]
+    assert all(result == {"final_answer": "A1"} for result, _ in results)
+    stats = coalescer.stats()
+    assert (stats["requests"], stats["executions"], stats["coalesced"], stats["inflight"]) == (3, 1, 2, 0)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_execution():
+    coalescer = RequestCoalescer()
+
+    async def execute():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(coalescer.run("K178的检票口", execute))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(coalescer.run("K178的检票口", execute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_disabled_by_default():
+    assert Settings.model_fields["request_coalescing_enabled"].default is False
@@ -0,0 +1,23 @@
+"""
+pytest 公共配置
+
+- kg_test.py / tool_test.py 是导入即连接 Neo4j 的手动脚本，直接用 python 运行，不参与收集
+- 未配置 OPENAI_API_KEY / NEO4J_PASSWORD（环境变量或 .env）时填入占位值，保证离线单元测试可以导入 railmind；
+  此时 LIVE_CREDENTIALS 为 False，需要在线服务的测试据此跳过
+"""
+import os
+
+from pydantic import ValidationError
+
+from railmind.config import get_settings
+
+collect_ignore = ["kg_test.py", "tool_test.py"]
+
+try:
+    get_settings()
+    LIVE_CREDENTIALS = True
+except ValidationError:
+    os.environ.setdefault("OPENAI_API_KEY", "offline-test")
+    os.environ.setdefault("NEO4J_PASSWORD", "offline-test")
+    get_settings.cache_clear()
+    LIVE_CREDENTIALS = False
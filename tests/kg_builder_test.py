@@ -0,0 +1,64 @@
+"""kg_builder 离线测试: 车站迁移语句与旧版逐行建图的关系 MERGE"""
+import pandas as pd
+
+from railmind.operators.build_kg.kg_builder import TrainKnowledgeGraph, station_migration_queries
+
+COLUMNS = ["车次", "始发站", "终到站", "开点", "到点", "候车厅", "检票口", "站台"]
+
+
+class FakeGraph:
+    def __init__(self):
+        self.created = []
+        self.runs = []
+
+    def create(self, subgraph):
+        self.created.append(subgraph)
+
+    def run(self, query, parameters=None, **kwparameters):
+        self.runs.append((query, {**(parameters or {}), **kwparameters}))
+        return self
+
+    def data(self):
+        return [{"stations": 3}]
+
+
+def offline_builder() -> TrainKnowledgeGraph:
+    kg = TrainKnowledgeGraph.__new__(TrainKnowledgeGraph)
+    kg.graph = FakeGraph()
+    return kg
+
+
+def test_station_migration_statements():
+    create_canonical, relink, delete_legacy = station_migration_queries(batch_size=500)
+    assert "MERGE (c:Station {station_id: 'station_' + name})" in create_canonical
+    assert "MERGE (t)-[n:DEPARTS_FROM]->(c)" in relink and "MERGE (t)-[n:ARRIVES_AT]->(c)" in relink
+    assert "SET n.departure_time = t.departure_time, n.gate_number = gate_number, n.platform_number = platform_number" in relink
+    assert "DELETE r" in relink
+    assert "DETACH DELETE s" in delete_legacy
+    # 只处理尚未规范化的节点，重复执行是空操作
+    for query in (relink, delete_legacy):
+        assert "WHERE s.station_id <> 'station_' + s.station_name" in query
+        assert "IN TRANSACTIONS OF 500 ROWS" in query
+    assert all("CREATE (" not in query for query in (create_canonical, relink, delete_legacy))
+
+
+def test_migrate_runs_statements_in_order():
+    kg = offline_builder()
+    kg.migrate_canonical_stations(batch_size=500)
+    assert [query for query, _ in kg.graph.runs[:3]] == station_migration_queries(batch_size=500)
+
+
+def test_legacy_builder_merges_relationships_for_duplicate_rows():
+    row = ["K178", "西安", "郑州", "08:05", "12:30", "候车一厅", "A1", "1"]
+    kg = offline_builder()
+    kg.create_nodes_and_relationships(pd.DataFrame([row, row], columns=COLUMNS))
+
+    assert len(kg.graph.created) == 6
+    assert all(type(node).__name__ == "Node" for node in kg.graph.created)
+    departs = [params["rows"] for query, params in kg.graph.runs if "MERGE (a)-[r:DEPARTS_FROM]->(b)" in query]
+    assert departs == [[{
+        "src": "train_K178_08:05", "dst": "station_西安",
+        "props": {"departure_time": "08:05", "gate_number": "A1", "platform_number": "1"},
+    }]] * 2
+    rel_types = {query.split("[r:")[1].split("]")[0] for query, _ in kg.graph.runs}
+    assert rel_types == {"WAITS_AT", "DEPARTS_FROM", "ARRIVES_AT", "CHECKS_AT", "STOPS_AT"}
@@ -0,0 +1,88 @@
+"""BulkKGLoader 离线测试: 重复行去重、车站按规范名唯一、关系属性与分钟数字段"""
+import pandas as pd
+
+from railmind.operators.build_kg.kg_bulk_loader import BulkKGLoader, build_graph_batches
+
+COLUMNS = ["车次", "始发站", "终到站", "开点", "到点", "候车厅", "检票口", "站台"]
+
+
+def timetable(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+ROWS = [
+    ["K178", "西安", "郑州", "08:05", "12:30", "候车一厅，候车二厅", "A1", "1"],
+    ["K178", "西安", "郑州", "08:05", "12:30", "候车一厅，候车二厅", "A1", "1"],
+    ["T308", " 西安 ", "北京西", "0:12", "23:59:00", "候车二厅", "B2", "2"],
+]
+
+
+def test_duplicate_rows_merge_into_one_graph():
+    batches = build_graph_batches(timetable(ROWS))
+    assert batches.rows == 3
+    assert sorted(batches.nodes["Station"]) == ["station_北京西", "station_西安", "station_郑州"]
+    assert batches.nodes["Station"]["station_西安"] == {"station_id": "station_西安", "station_name": "西安"}
+    assert len(batches.nodes["Train"]) == 2
+    assert sorted(batches.nodes["WaitingHall"]) == ["hall_候车一厅", "hall_候车二厅"]
+
+    departs = batches.relationships["DEPARTS_FROM"]
+    assert sorted(departs) == [("train_K178_08:05", "station_西安"), ("train_T308_0:12", "station_西安")]
+    assert len(batches.relationships["WAITS_AT"]) == 3
+    assert len(batches.relationships["CHECKS_AT"]) == len(batches.relationships["STOPS_AT"]) == 2
+
+
+def test_relationship_properties_and_minutes():
+    batches = build_graph_batches(timetable(ROWS))
+    assert batches.relationships["DEPARTS_FROM"][("train_K178_08:05", "station_西安")] == {
+        "departure_time": "08:05", "gate_number": "A1", "platform_number": "1",
+    }
+    assert batches.relationships["ARRIVES_AT"][("train_T308_0:12", "station_北京西")] == {"arrival_time": "23:59:00"}
+    t308 = batches.nodes["Train"]["train_T308_0:12"]
+    assert (t308["departure_minute"], t308["arrival_minute"]) == (12, 1439)
+    k178 = batches.nodes["Train"]["train_K178_08:05"]
+    assert (k178["departure_minute"], k178["arrival_minute"]) == (485, 750)
+
+
+class FakeTx:
+    def __init__(self, log):
+        self.log = log
+
+    def run(self, query, **parameters):
+        self.log.append((query, parameters))
+        return self
+
+    def consume(self):
+        return None
+
+
+class FakeSession:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work):
+        return work(FakeTx(self.log))
+
+
+class FakeDriver:
+    def __init__(self):
+        self.log = []
+
+    def session(self):
+        return FakeSession(self.log)
+
+
+def test_load_writes_one_merge_row_per_relationship():
+    loader = BulkKGLoader("bolt://localhost:7687", "neo4j", "offline-test", batch_size=1)
+    loader.driver = FakeDriver()
+    summary = loader.load(build_graph_batches(timetable(ROWS)))
+    assert (summary["Station"], summary["Train"], summary["DEPARTS_FROM"], summary["rows"]) == (3, 2, 2, 3)
+
+    departs = [params["rows"] for query, params in loader.driver.log if "MERGE (a)-[r:DEPARTS_FROM]->(b)" in query]
+    assert len(departs) == 2 and all(len(rows) == 1 for rows in departs)
+    assert departs[0][0]["props"]["gate_number"] == "A1"
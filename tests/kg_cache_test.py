@@ -0,0 +1,87 @@
+"""ToolResultCache 离线测试: LRU/TTL 与按实体标签的增量失效"""
+import json
+
+from railmind.function_call.kg_cache import ToolResultCache
+
+
+def _store(cache: ToolResultCache, tool_name: str, parameters, rows) -> tuple:
+    key = cache.make_key(tool_name, parameters)
+    cache.set(key, json.dumps(rows, ensure_ascii=False))
+    return key
+
+
+def test_key_normalizes_parameters():
+    cache = ToolResultCache()
+    assert cache.make_key("t", {"b": " K178 ", "a": 1}) == cache.make_key("t", {"a": 1, "b": "K178"})
+
+
+def test_lru_eviction_by_bytes():
+    cache = ToolResultCache(max_bytes=10)
+    first = cache.make_key("t", {"train_number": "A"})
+    second = cache.make_key("t", {"train_number": "B"})
+    cache.set(first, "123456")
+    cache.set(second, "123456")
+    assert cache.get(first) is None
+    assert cache.get(second) == "123456"
+
+
+def test_negative_results_use_negative_ttl():
+    cache = ToolResultCache(negative_ttl=0)
+    key = cache.make_key("get_train_details", {"train_number": "X1"})
+    cache.set(key, "[]")
+    assert cache.get(key) is None
+
+
+def test_change_to_train_does_not_evict_prefix_matches():
+    cache = ToolResultCache()
+    k17 = _store(cache, "get_train_details", {"train_number": "K17"}, [{"车次": "K17"}])
+    k178 = _store(cache, "get_train_details", {"train_number": "K178"}, [{"车次": "K178"}])
+    k1788 = _store(cache, "get_train_details", {"train_number": "K1788"}, [{"车次": "K1788"}])
+
+    assert cache.apply_changes({"entities": {"train_number": ["K17"]}}) == 1
+    assert cache.get(k17) is None
+    assert cache.get(k178) is not None
+    assert cache.get(k1788) is not None
+
+
+def test_change_evicts_entries_whose_results_mention_entity():
+    cache = ToolResultCache()
+    by_station = _store(
+        cache, "search_trains_by_station", {"station_name": "北京"},
+        [{"车次": "K178", "关联车站": "北京西"}, {"车次": "T308", "关联车站": "北京"}],
+    )
+    other = _store(cache, "search_trains_by_station", {"station_name": "郑州"}, [{"车次": "Z1", "关联车站": "郑州"}])
+
+    assert cache.apply_changes({"entities": {"station_name": ["北京西"]}}) == 1
+    assert cache.get(by_station) is None
+    assert cache.get(other) is not None
+
+    details = _store(cache, "get_train_details", {"train_number": "K178"}, [{"车次": "K178", "站台": 3}])
+    assert cache.apply_changes({"entities": {"platform_number": [3]}}) == 1
+    assert cache.get(details) is None
+
+
+def test_aggregate_entries_always_invalidated():
+    cache = ToolResultCache()
+    aggregate = _store(cache, "get_all_trains", {}, [{"车次": "K178"}])
+    assert cache.apply_changes({"entities": {"train_number": ["Z99"]}}) == 1
+    assert cache.get(aggregate) is None
+    assert cache.apply_changes({"entities": {}}) == 0
+
+
+def test_full_invalidation():
+    cache = ToolResultCache()
+    _store(cache, "get_train_details", {"train_number": "K178"}, [{"车次": "K178"}])
+    assert cache.apply_changes({"full_invalidation": True}) == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_contains_station_query_evicted_by_longer_station_name():
+    cache = ToolResultCache()
+    beijing = _store(cache, "search_trains_by_station", {"station_name": "北京"}, [{"车次": "K178", "关联车站": "北京西"}])
+    details = _store(cache, "get_station_info", {"station_name": "北京"}, [{"车站名称": "北京"}])
+
+    assert cache.apply_changes({"entities": {"station_name": ["北京丰台"]}}) == 1
+    assert cache.get(beijing) is None
+    assert cache.get(details) is not None
+    assert cache.apply_changes({"entities": {"train_number": ["北京丰台"]}}) == 0
@@ -0,0 +1,93 @@
+"""KGDeltaSync 离线测试: 变更检测与每批删除 + 重新写入在同一事务中提交"""
+import pandas as pd
+
+from railmind.operators.build_kg.kg_bulk_loader import BulkKGLoader
+from railmind.operators.build_kg.kg_delta_sync import KGDeltaSync, DELETE_TRAINS_QUERY, DELETE_ORPHANS_QUERY
+
+
+class FakeResult:
+    def single(self):
+        return {"neighbours": []}
+
+    def consume(self):
+        return None
+
+
+class FakeTx:
+    def __init__(self, log):
+        self.log = log
+
+    def run(self, query, **parameters):
+        self.log.append((query, parameters))
+        return FakeResult()
+
+
+class FakeSession:
+    def __init__(self, transactions):
+        self.transactions = transactions
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work, *args):
+        log = []
+        work(FakeTx(log), *args)
+        self.transactions.append(log)
+
+
+class FakeDriver:
+    def __init__(self):
+        self.transactions = []
+
+    def session(self):
+        return FakeSession(self.transactions)
+
+
+def timetable(rows):
+    columns = ["车次", "始发站", "终到站", "开点", "到点", "候车厅", "检票口", "站台"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def make_sync(tmp_path) -> KGDeltaSync:
+    loader = BulkKGLoader("bolt://localhost:7687", "neo4j", "offline-test")
+    loader.driver = FakeDriver()
+    return KGDeltaSync(loader, str(tmp_path / "manifest.json"))
+
+
+def test_update_deletes_and_remerges_in_one_transaction(tmp_path):
+    sync = make_sync(tmp_path)
+    sync.save_manifest({})
+    base = [
+        ["K178", "西安", "郑州", "08:00", "12:00", "候车一厅", "A1", "1"],
+        ["T308", "北京西", "西安", "09:00", "18:00", "候车二厅", "B2", "2"],
+    ]
+    summary = sync.sync(timetable(base))
+    assert summary["inserted"] == 2 and not summary["full_invalidation"]
+
+    sync.loader.driver.transactions.clear()
+    changed = [base[0][:6] + ["A3", "3"], base[1]]
+    summary = sync.sync(timetable(changed))
+    assert (summary["inserted"], summary["updated"], summary["deleted"]) == (0, 1, 0)
+    assert "K178" in summary["entities"]["train_number"]
+    assert "T308" not in summary["entities"]["train_number"]
+
+    assert len(sync.loader.driver.transactions) == 1
+    queries = [query for query, _ in sync.loader.driver.transactions[0]]
+    assert queries[0] == DELETE_TRAINS_QUERY
+    assert queries[-1] == DELETE_ORPHANS_QUERY
+    merged = [params["rows"] for query, params in sync.loader.driver.transactions[0] if "MERGE (n:Train" in query]
+    assert [row["train_number"] for row in merged[0]] == ["K178"]
+
+
+def test_unchanged_timetable_writes_nothing(tmp_path):
+    sync = make_sync(tmp_path)
+    sync.save_manifest({})
+    rows = [["K178", "西安", "郑州", "08:00", "12:00", "候车一厅", "A1", "1"]]
+    sync.sync(timetable(rows))
+    sync.loader.driver.transactions.clear()
+    summary = sync.sync(timetable(rows))
+    assert summary["unchanged"] == 1
+    assert sync.loader.driver.transactions == []
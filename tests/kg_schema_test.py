@@ -0,0 +1,40 @@
+"""KGSchemaManager 离线测试: 约束与 CJK 全文索引语句，search_trains_by_station 在全文索引召回后保留 CONTAINS 过滤"""
+from railmind.function_call import kg_tools
+from railmind.function_call.kg_cache import ToolResultCache
+from railmind.function_call.kg_schema import KGSchemaManager, STATION_FULLTEXT_INDEX, fulltext_phrase
+
+
+def test_statements():
+    statements = KGSchemaManager(lambda query, parameters=None: []).statements()
+    assert statements["station_id_unique"] == "CREATE CONSTRAINT station_id_unique IF NOT EXISTS FOR (n:Station) REQUIRE n.station_id IS UNIQUE"
+    assert statements["train_departure_minute_index"] == "CREATE INDEX train_departure_minute_index IF NOT EXISTS FOR (n:Train) ON (n.departure_minute)"
+    assert statements[STATION_FULLTEXT_INDEX] == (
+        "CREATE FULLTEXT INDEX station_name_fulltext IF NOT EXISTS FOR (n:Station) ON EACH [n.station_name] "
+        "OPTIONS {indexConfig: {`fulltext.analyzer`: 'cjk'}}"
+    )
+    assert all("IF NOT EXISTS" in statement for statement in statements.values())
+
+
+def test_fulltext_phrase_escapes_quotes():
+    assert fulltext_phrase('北京"西\\') == '"北京\\"西\\\\"'
+
+
+def test_station_search_keeps_contains_filter(monkeypatch):
+    issued = []
+
+    def run_query(query, parameters):
+        issued.append((query, parameters))
+        return []
+
+    monkeypatch.setattr(kg_tools.kg_system, "run_query", run_query)
+    monkeypatch.setattr(kg_tools, "kg_cache", ToolResultCache())
+    monkeypatch.setattr(kg_tools.setting, "kg_backend", "neo4j")
+    kg_tools.search_trains_by_station.invoke({"station_name": "北京"})
+    kg_tools.search_trains_by_station.invoke({"station_name": "京"})
+
+    fulltext, scan = issued
+    assert f"db.index.fulltext.queryNodes('{STATION_FULLTEXT_INDEX}', $station_phrase)" in fulltext[0]
+    assert "WHERE s.station_name CONTAINS $station_name" in fulltext[0]
+    assert fulltext[1] == {"station_name": "北京", "station_phrase": '"北京"'}
+    # 单字无法命中 CJK 二元组索引，退回 CONTAINS 扫描
+    assert "fulltext" not in scan[0] and "WHERE s.station_name CONTAINS $station_name" in scan[0]
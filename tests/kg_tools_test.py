@@ -0,0 +1,99 @@
+"""kg_tool 离线测试: 缓存命中、memory 后端、Neo4j 与 ServiceUnavailable/SessionExpired 回退，同步/异步结果一致"""
+import asyncio
+import json
+
+import pytest
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
+
+from railmind.function_call import kg_tools
+from railmind.function_call.kg_cache import ToolResultCache
+
+NEO4J_ROWS = [{"车次": "K178", "始发站": "西安"}]
+ENGINE_ROWS = [{"车次": "K178", "始发站": "西安", "来源": "engine"}]
+
+
+class StubEngine:
+    def __init__(self):
+        self.calls = []
+
+    def get_train_details(self, train_number):
+        self.calls.append(train_number)
+        return ENGINE_ROWS
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    """替换 Neo4j 驱动、TimetableEngine 与缓存，返回各自的调用记录"""
+    calls = {"sync": [], "async": [], "error": None}
+    engine = StubEngine()
+
+    def run_query(query, parameters):
+        calls["sync"].append(parameters)
+        if calls["error"]:
+            raise calls["error"]
+        return NEO4J_ROWS
+
+    async def arun_query(query, parameters):
+        calls["async"].append(parameters)
+        if calls["error"]:
+            raise calls["error"]
+        return NEO4J_ROWS
+
+    monkeypatch.setattr(kg_tools.kg_system, "run_query", run_query)
+    monkeypatch.setattr(kg_tools.async_kg_system, "run_query", arun_query)
+    monkeypatch.setattr(kg_tools, "get_timetable_engine", lambda: engine)
+    monkeypatch.setattr(kg_tools, "kg_cache", ToolResultCache())
+    monkeypatch.setattr(kg_tools.setting, "kg_cache_enabled", True)
+    monkeypatch.setattr(kg_tools.setting, "kg_backend", "neo4j")
+    monkeypatch.setattr(kg_tools.setting, "kg_memory_fallback", False)
+    calls["engine"] = engine.calls
+    return calls
+
+
+def invoke_both(parameters):
+    tool = kg_tools.get_train_details
+    return tool.invoke(parameters), asyncio.run(tool.ainvoke(parameters))
+
+
+def test_neo4j_results_are_cached_and_shared_by_sync_and_async(backends):
+    sync_result, async_result = invoke_both({"train_number": "K178"})
+    assert json.loads(sync_result) == NEO4J_ROWS
+    assert async_result == sync_result
+    # 同步调用写入缓存，异步调用直接命中
+    assert backends["sync"] == [{"train_number": "K178"}]
+    assert backends["async"] == []
+
+
+def test_sync_and_async_agree_without_cache(backends, monkeypatch):
+    monkeypatch.setattr(kg_tools.setting, "kg_cache_enabled", False)
+    sync_result, async_result = invoke_both({"train_number": "K178"})
+    assert sync_result == async_result
+    assert backends["sync"] == backends["async"] == [{"train_number": "K178"}]
+
+
+def test_memory_backend_skips_neo4j(backends, monkeypatch):
+    monkeypatch.setattr(kg_tools.setting, "kg_backend", "memory")
+    monkeypatch.setattr(kg_tools.setting, "kg_cache_enabled", False)
+    sync_result, async_result = invoke_both({"train_number": "K178"})
+    assert json.loads(sync_result) == json.loads(async_result) == ENGINE_ROWS
+    assert backends["engine"] == ["K178", "K178"]
+    assert backends["sync"] == backends["async"] == []
+
+
+@pytest.mark.parametrize("error", [ServiceUnavailable("down"), SessionExpired("expired")])
+def test_unavailable_neo4j_falls_back_to_engine(backends, monkeypatch, error):
+    backends["error"] = error
+    monkeypatch.setattr(kg_tools.setting, "kg_memory_fallback", True)
+    monkeypatch.setattr(kg_tools.setting, "kg_cache_enabled", False)
+    sync_result, async_result = invoke_both({"train_number": "K178"})
+    assert json.loads(sync_result) == json.loads(async_result) == ENGINE_ROWS
+    assert len(backends["sync"]) == len(backends["async"]) == 1
+
+
+def test_unavailable_neo4j_raises_without_fallback(backends):
+    backends["error"] = ServiceUnavailable("down")
+    with pytest.raises(ServiceUnavailable):
+        kg_tools.get_train_details.invoke({"train_number": "K178"})
+    with pytest.raises(ServiceUnavailable):
+        asyncio.run(kg_tools.get_train_details.ainvoke({"train_number": "K178"}))
+    assert backends["engine"] == []
@@ -0,0 +1,52 @@
+"""LLMRegistry 离线测试: 阶段覆盖、相同配置共享实例、thinking_budget=0 关闭思考（只构造 ChatOpenAI，不发请求）"""
+from railmind.config import get_settings
+from railmind.operators.llm.llm_registry import LLMRegistry, DEFAULT_TEMPERATURE
+
+
+def make_registry(llm_stages) -> LLMRegistry:
+    settings = get_settings().model_copy(update={
+        "openai_model": "base-model", "openai_api_base": "http://base/v1", "openai_api_key": "base-key", "llm_stages": llm_stages,
+    })
+    return LLMRegistry(settings)
+
+
+def test_stage_overrides_and_defaults():
+    registry = make_registry({"answer": {"model": "answer-model", "base_url": "http://answer/v1", "max_tokens": 512, "temperature": 0.7}})
+    answer = registry.config("answer")
+    assert (answer["model"], answer["base_url"], answer["api_key"], answer["max_tokens"], answer["temperature"]) == (
+        "answer-model", "http://answer/v1", "base-key", 512, 0.7,
+    )
+    think = registry.config("think")
+    assert (think["model"], think["base_url"], think["temperature"], think["thinking"]) == ("base-model", "http://base/v1", DEFAULT_TEMPERATURE, None)
+
+    llm = registry.get("answer")
+    assert (llm.model_name, llm.max_tokens, llm.temperature) == ("answer-model", 512, 0.7)
+    assert str(llm.openai_api_base) == "http://answer/v1"
+
+
+def test_identical_stages_share_one_instance():
+    registry = make_registry({"rewrite": {"temperature": 0.0}, "intent": {"temperature": 0.0}, "answer": {"thinking_budget": 256}})
+    assert registry.get("rewrite") is registry.get("intent")
+    assert registry.get("think") is registry.get("evaluate")
+    assert registry.get("rewrite") is not registry.get("think")
+    # thinking_budget 只影响 ThinkingBudget，不产生新的实例
+    assert registry.get("answer") is registry.get("think")
+    assert len(registry.instances()) == 2
+
+
+def test_zero_thinking_budget_disables_thinking():
+    registry = make_registry({"rewrite": {"thinking_budget": 0, "thinking": True}, "think": {"thinking": True, "stop": ["</answer>"]}})
+    rewrite = registry.get("rewrite")
+    assert rewrite.model_kwargs["extra_body"] == {"chat_template_kwargs": {"enable_thinking": False}}
+    assert registry.thinking("rewrite") is False
+    assert registry.thinking_budget("rewrite").mode == "disabled"
+
+    think = registry.get("think")
+    assert think.model_kwargs == {"stop": ["</answer>"], "extra_body": {"chat_template_kwargs": {"enable_thinking": True}}}
+    assert registry.thinking("think") is True
+    assert "extra_body" not in registry.get("answer").model_kwargs
+
+
+def test_describe_hides_api_key():
+    registry = make_registry({"think": {"api_key": "secret"}})
+    assert all("api_key" not in config for config in registry.describe().values())
@@ -0,0 +1,46 @@
+"""PlanCache 离线测试: 槽位化存储与回放"""
+from railmind.config import Settings
+from railmind.agent.plan_cache import PlanCache, query_signature
+
+
+def sub_query(*entities, type_="车次详情"):
+    return {"type": type_, "entities": [{"type": t, "text": v} for t, v in entities]}
+
+
+def observation(function, result=None, **parameters):
+    return {"function": function, "parameters": parameters, "result": result if result is not None else [{"车次": "K178"}]}
+
+
+def test_replays_plan_with_new_entities():
+    cache = PlanCache()
+    stored = cache.put(sub_query(("Train", "K178")), [observation("get_train_details", train_number="K178")])
+    assert stored
+    assert cache.get(sub_query(("Train", "T308"))) == [{"function_name": "get_train_details", "parameters": {"train_number": "T308"}}]
+    assert cache.get(sub_query(("Station", "西安"))) is None
+
+
+def test_station_suffix_is_stripped_on_replay():
+    cache = PlanCache()
+    original = sub_query(("Station", "北京西站"), ("Station", "西安站"), type_="站间车次")
+    cache.put(original, [observation("find_trains_between_stations", departure_station="北京西", arrival_station="西安")])
+    replay = cache.get(sub_query(("Station", "郑州站"), ("Station", "成都东站"), type_="站间车次"))
+    assert replay[0]["parameters"] == {"departure_station": "郑州", "arrival_station": "成都东"}
+
+
+def test_unslottable_and_failed_calls_are_not_cached():
+    cache = PlanCache()
+    assert not cache.put(sub_query(("Train", "K178")), [observation("search_trains_by_station", station_name="西安")])
+    assert not cache.put(sub_query(("Train", "K178")), [observation("get_train_details", result=[], train_number="K178")])
+    assert cache.stats()["plans"] == 0
+
+
+def test_lru_bound_and_signature():
+    cache = PlanCache(max_size=1)
+    cache.put(sub_query(("Train", "K178")), [observation("get_train_details", train_number="K178")])
+    cache.put(sub_query(("Station", "西安"), type_="车站车次"), [observation("search_trains_by_station", station_name="西安")])
+    assert cache.stats()["plans"] == 1
+    assert query_signature(sub_query(("Station", "西安"), ("Station", "郑州"), type_="站间车次")) == "站间车次(Station,Station)"
+
+
+def test_disabled_by_default():
+    assert Settings.model_fields["plan_cache_enabled"].default is False
@@ -0,0 +1,63 @@
+"""PromptBudget 离线测试: 记录前缀裁剪、文本截断与 tokenizer 不可用时的估算"""
+import json
+import sys
+
+from railmind.config import Settings, get_settings
+from railmind.operators import prompt_budget as module
+from railmind.operators.prompt_budget import PromptBudget, TRUNCATED_MARK
+
+
+def test_estimate_counts_cjk_and_ascii():
+    budget = PromptBudget()
+    assert budget.count("北京西") == 3
+    assert budget.count("abcdefgh") == 2
+    assert budget.count("K178次") == 2
+
+
+def test_unbudgeted_section_is_serialized_unchanged():
+    budget = PromptBudget()
+    records = [{"车次": "K178"}]
+    assert budget.fit("think", "current_results", records) == json.dumps(records, ensure_ascii=False, indent=2)
+    assert budget.fit("think", "current_results", "原样返回") == "原样返回"
+
+
+def test_records_keep_longest_prefix_with_summary():
+    records = [{"车次": f"K{i}", "始发站": "北京西", "终到站": "西安北"} for i in range(100)]
+    budget = PromptBudget(budgets={"think.current_results": 300})
+    text = budget.fit("think", "current_results", records)
+    fitted = json.loads(text)
+    kept, note = fitted[:-1], fitted[-1]
+    assert 0 < len(kept) < 100
+    assert kept == records[:len(kept)]
+    assert note["_summary"] == f"共 100 条记录，仅展示前 {len(kept)} 条"
+    assert note["columns"] == ["始发站", "终到站", "车次"]
+    assert budget.count(text) <= 300
+    assert budget.fit("think", "current_results", records) == text
+    assert budget.stats()["think"]["truncations"] == 2
+
+
+def test_text_truncation_is_marked_and_within_budget():
+    budget = PromptBudget()
+    text = "候车厅" * 100
+    truncated = budget.truncate_text(text, 50)
+    assert truncated.endswith(TRUNCATED_MARK)
+    assert text.startswith(truncated[:-len(TRUNCATED_MARK)])
+    assert budget.count(truncated) <= 50
+    assert budget.truncate_text("短文本", 50) == "短文本"
+
+
+def test_tokenizer_failure_falls_back_to_estimate(monkeypatch):
+    monkeypatch.setitem(sys.modules, "railmind.operators.llm.llm_cli", None)
+    assert module._load_tokenizer("") is None
+
+
+def test_disabled_budget_does_not_load_tokenizer(monkeypatch):
+    def unexpected_load(model_name):
+        raise AssertionError("prompt_budget_enabled=False 时不应加载 tokenizer")
+
+    monkeypatch.setattr(get_settings(), "prompt_budget_enabled", False)
+    monkeypatch.setattr(module, "_prompt_budget", None)
+    monkeypatch.setattr(module, "_load_tokenizer", unexpected_load)
+    budget = module.get_prompt_budget()
+    assert budget.tokenizer is None and budget.budgets == {}
+    assert Settings.model_fields["prompt_budget_enabled"].default is False
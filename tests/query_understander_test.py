@@ -0,0 +1,27 @@
+"""QueryUnderstander 离线测试: 单次调用的结构化输出解析"""
+import asyncio
+import json
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from railmind.operators.query_understander import QueryUnderstander
+
+
+def understand(response: str, thinking: bool = False, context=None):
+    understander = QueryUnderstander(FakeListChatModel(responses=[response]), thinking=thinking)
+    return asyncio.run(understander.understand("k178检票口", context=context))
+
+
+def test_parses_structured_response():
+    payload = {"rewritten_query": "K178的检票口是哪个？", "intents": ["检票口查询"], "queries": [{"sub_query": "K178的检票口"}]}
+    assert understand(json.dumps(payload, ensure_ascii=False)) == payload
+
+
+def test_think_output_is_stripped():
+    payload = {"intents": [], "queries": []}
+    result = understand("<think>先改写</think>" + json.dumps(payload), thinking=True)
+    assert result == {**payload, "rewritten_query": "k178检票口"}
+
+
+def test_invalid_json_falls_back_to_original_query():
+    assert understand("不是JSON") == {"rewritten_query": "k178检票口", "intents": [], "queries": []}
@@ -0,0 +1,51 @@
+"""RewriteGate / CharNGramClassifier 离线测试"""
+from railmind.config import Settings
+from railmind.operators.rewrite_gate import RewriteGate, CharNGramClassifier, TRAIN_NUMBER_PATTERN
+
+
+def stations(text):
+    return [name for name in ("北京西", "西安") if name in text]
+
+
+def test_canonical_query_skips_rewrite():
+    gate = RewriteGate(station_finder=stations)
+    assert gate.decide("K178的检票口是哪个？") == (True, "canonical")
+    assert gate.decide("从北京西到西安的车次有哪些") == (True, "canonical")
+
+
+def test_non_canonical_queries_are_rewritten():
+    gate = RewriteGate(station_finder=stations)
+    assert gate.decide("K1") == (False, "length")
+    assert gate.decide("这趟车几点发车？") == (False, "referential")
+    assert gate.decide("那西安呢？") == (False, "referential")
+    assert gate.decide("明天有什么车可以坐") == (False, "no_entity")
+
+
+def test_station_lookup_failure_falls_back_to_rewrite():
+    def unavailable(text):
+        raise RuntimeError("Station resolver is not built yet")
+
+    assert RewriteGate(station_finder=unavailable).decide("从北京西到西安的车次") == (False, "no_entity")
+    assert RewriteGate().decide("从北京西到西安的车次") == (False, "no_entity")
+
+
+def test_classifier_threshold(tmp_path):
+    classifier = CharNGramClassifier().fit(
+        ["K178的检票口", "T308几点发车", "k178检票口呢在哪啊啊", "t308那个几点啊啊"],
+        [1, 1, 0, 0],
+    )
+    path = tmp_path / "gate.json"
+    classifier.save(str(path))
+    loaded = CharNGramClassifier.load(str(path))
+    assert abs(loaded.predict_proba("K178的检票口") - classifier.predict_proba("K178的检票口")) < 1e-9
+    gate = RewriteGate(classifier=loaded, threshold=0.99)
+    assert gate.decide("t308啊啊啊啊") == (False, "classifier")
+
+
+def test_train_number_pattern():
+    assert TRAIN_NUMBER_PATTERN.findall("K4547/6和G1234") == ["K4547/6", "G1234"]
+    assert TRAIN_NUMBER_PATTERN.findall("ABK178") == []
+
+
+def test_disabled_by_default():
+    assert Settings.model_fields["rewrite_gate_enabled"].default is False
@@ -0,0 +1,60 @@
+"""RuleEvaluator 离线测试"""
+from railmind.config import Settings
+from railmind.operators.rule_evaluator import RuleEvaluator, ATTRIBUTES, NEGATION_PATTERN, requested_attributes
+
+DETAILS = {"车次": "K178", "始发站": "西安", "终到站": "佳木斯", "候车厅": ["候车一厅"], "检票口": "A1", "站台": "1"}
+
+
+def names(query):
+    return [name for name, _ in requested_attributes(query)]
+
+
+def test_keywords_do_not_collide_across_attributes():
+    for name, keywords, _ in ATTRIBUTES:
+        for other, other_keywords, _ in ATTRIBUTES:
+            if other != name:
+                assert not any(k in o for k in keywords for o in other_keywords), (name, other)
+
+
+def test_waiting_location_is_not_destination():
+    assert names("K178去哪里候车？") == ["候车厅"]
+    assert names("K178去哪") == []
+    assert names("K178几点检票") == []
+    assert names("K178开往哪里") == ["终到站"]
+
+
+def test_single_attribute_single_record_completes():
+    decision = RuleEvaluator().decide("K178去哪里候车？", [DETAILS])
+    assert decision["rule"] == "single_record_attribute" and not decision["should_continue"]
+    decision = RuleEvaluator().decide("这些车的检票口", [DETAILS, {**DETAILS, "车次": "T308"}])
+    assert decision["rule"] == "records_attribute"
+
+
+def test_multiple_attributes_fall_back_to_llm():
+    assert RuleEvaluator().decide("K178的终到站和检票口", [DETAILS]) is None
+
+
+def test_missing_attribute_and_tool_error_continue():
+    decision = RuleEvaluator().decide("K178的站台", [{"车次": "K178", "发车时间": "08:00"}])
+    assert decision["rule"] == "missing_attribute" and decision["should_continue"]
+    assert RuleEvaluator().decide("K178的站台", {"error": "timeout"})["rule"] == "tool_error"
+    assert RuleEvaluator().decide("K178的情况", [DETAILS]) is None
+
+
+def test_stats_count_llm_fallbacks():
+    evaluator = RuleEvaluator()
+    evaluator.evaluate("K178的站台", [DETAILS])
+    evaluator.evaluate("K178的情况", [DETAILS])
+    stats = evaluator.stats()
+    assert stats["llm_calls"] == 1 and stats["rule_hits"] == {"single_record_attribute": 1}
+
+
+def test_disabled_by_default():
+    assert Settings.model_fields["rule_evaluator_enabled"].default is False
+
+
+def test_negation_matches_words_not_station_names():
+    for query in ("K178不在几号站台吗", "不可以乘坐哪些车次", "没有哪些车次", "K178无法检票吗", "检票口不是A1吗"):
+        assert NEGATION_PATTERN.search(query), query
+    for query in ("无锡到上海的车次", "K178在无锡东的检票口", "无为站几点发车"):
+        assert not NEGATION_PATTERN.search(query), query
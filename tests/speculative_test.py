@@ -0,0 +1,74 @@
+"""SpeculativeExecutor 离线测试: 参数推导、命中复用与未使用任务的取消"""
+import asyncio
+from types import SimpleNamespace
+
+from railmind.config import Settings
+from railmind.agent.speculative import SpeculativeExecutor, params_from_entities
+
+ENTITIES = [{"type": "Train", "text": "K178"}, {"type": "Station", "text": "西安"}, {"type": "Location", "text": "郑州"}]
+
+
+def test_params_from_entities():
+    assert params_from_entities(["train_number"], ENTITIES) == {"train_number": "K178"}
+    assert params_from_entities(["departure_station", "arrival_station"], ENTITIES) == {"departure_station": "西安", "arrival_station": "郑州"}
+    assert params_from_entities(["gate_number"], ENTITIES) is None
+    assert params_from_entities(["train_number"], [{"type": "Train", "text": "明天那趟"}]) is None
+
+
+def make_executor(calls, delay=0.0):
+    tools = {
+        "get_train_details": SimpleNamespace(name="get_train_details", args={"train_number": {}}),
+        "search_trains_by_station": SimpleNamespace(name="search_trains_by_station", args={"station_name": {}}),
+    }
+
+    async def invoke(tool, params):
+        calls.append((tool.name, params))
+        await asyncio.sleep(delay)
+        return [{"tool": tool.name, **params}]
+
+    return SpeculativeExecutor(tools, invoke, top_k=1, resolve_stations=False)
+
+
+def state_for(functions):
+    return {
+        "current_sub_query_index": 0,
+        "sub_queries": [{"entities": ENTITIES, "relevant_functions": [{"function_name": f, "priority": i} for i, f in enumerate(functions)]}],
+        "executed_functions": [],
+    }
+
+
+def test_claim_reuses_matching_speculation():
+    async def scenario():
+        calls = []
+        executor = make_executor(calls)
+        state = state_for(["get_train_details", "search_trains_by_station"])
+        executor.launch(state)
+        hit, result = await executor.claim(state, "get_train_details", {"train_number": " K178 "})
+        return calls, hit, result, state, executor.stats()
+
+    calls, hit, result, state, stats = asyncio.run(scenario())
+    assert calls == [("get_train_details", {"train_number": "K178"})]
+    assert hit and result == [{"tool": "get_train_details", "train_number": "K178"}]
+    assert state["speculations"] == {}
+    assert stats["hits"] == 1 and stats["wasted"] == 0
+
+
+def test_settle_cancels_unused_speculation():
+    async def scenario():
+        executor = make_executor([], delay=10)
+        state = state_for(["get_train_details"])
+        executor.launch(state)
+        task = next(iter(state["speculations"].values()))["task"]
+        hit, _ = await executor.claim(state, "search_trains_by_station", {"station_name": "西安"})
+        await asyncio.sleep(0)
+        return hit, task, state, executor.stats()
+
+    hit, task, state, stats = asyncio.run(scenario())
+    assert not hit
+    assert task.cancelled()
+    assert state["speculations"] == {}
+    assert stats["wasted"] == 1
+
+
+def test_disabled_by_default():
+    assert Settings.model_fields["speculative_execution_enabled"].default is False
@@ -0,0 +1,77 @@
+"""应用启动离线测试: Schema 检查发出的语句，Neo4j 不可用或使用内存后端时启动不失败"""
+import asyncio
+
+from neo4j.exceptions import ServiceUnavailable
+
+from railmind import main
+from railmind.config import get_settings
+from railmind.function_call.kg_schema import KGSchemaManager, CONSTRAINTS, RANGE_INDEXES, FULLTEXT_INDEXES
+
+
+class FakeNeo4j:
+    """SHOW 查询返回已存在的对象，其余语句记录下来"""
+
+    def __init__(self, existing):
+        self.existing = existing
+        self.issued = []
+
+    def run_query(self, query, parameters=None):
+        if query.startswith("SHOW INDEXES"):
+            return [{"name": name, "state": "ONLINE"} for name in self.existing]
+        if query.startswith("SHOW CONSTRAINTS"):
+            return []
+        self.issued.append(query)
+        return []
+
+
+def test_schema_check_creates_missing_objects(monkeypatch):
+    neo4j = FakeNeo4j(existing=["train_id_unique", "train_number_index"])
+    monkeypatch.setattr(main.kg_system, "run_query", neo4j.run_query)
+    monkeypatch.setattr(get_settings(), "neo4j_auto_schema", True)
+    main.check_kg_schema(get_settings())
+
+    statements = KGSchemaManager(neo4j.run_query).statements()
+    expected = [name for name in [*CONSTRAINTS, *RANGE_INDEXES, *FULLTEXT_INDEXES] if name not in neo4j.existing]
+    assert neo4j.issued == [statements[name] for name in expected]
+    assert any("CREATE FULLTEXT INDEX station_name_fulltext" in q and "'cjk'" in q for q in neo4j.issued)
+    assert "CREATE CONSTRAINT station_id_unique IF NOT EXISTS FOR (n:Station) REQUIRE n.station_id IS UNIQUE" in neo4j.issued
+
+
+def test_schema_check_only_warns_without_auto_schema(monkeypatch):
+    neo4j = FakeNeo4j(existing=[])
+    monkeypatch.setattr(main.kg_system, "run_query", neo4j.run_query)
+    monkeypatch.setattr(get_settings(), "neo4j_auto_schema", False)
+    main.check_kg_schema(get_settings())
+    assert neo4j.issued == []
+
+
+def test_schema_check_tolerates_unavailable_neo4j(monkeypatch):
+    def unavailable(query, parameters=None):
+        raise ServiceUnavailable("connection refused")
+
+    monkeypatch.setattr(main.kg_system, "run_query", unavailable)
+    main.check_kg_schema(get_settings())
+
+
+async def _noop():
+    return None
+
+
+def _fail_schema_check(settings):
+    raise AssertionError("memory 后端不应检查 Neo4j Schema")
+
+
+def test_memory_backend_skips_schema_check(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "kg_backend", "memory")
+    monkeypatch.setattr(settings, "admission_enabled", False)
+    # 共享的驱动供其他测试继续使用
+    monkeypatch.setattr(main.kg_system, "close", lambda: None)
+    monkeypatch.setattr(main.async_kg_system, "close", _noop)
+    monkeypatch.setattr(main, "check_kg_schema", _fail_schema_check)
+
+    async def start():
+        async with main.lifespan(main.app):
+            assert main.agent is not None
+
+    asyncio.run(start())
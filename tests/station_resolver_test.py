@@ -0,0 +1,120 @@
+"""StationResolver 离线测试: 精确 / 去后缀 / 城市分组 / 前缀 / 编辑距离 与参数展开"""
+import json
+import asyncio
+
+import pytest
+
+from railmind.function_call import station_resolver as module
+from railmind.function_call.station_resolver import StationResolver
+
+STATIONS = ["北京", "北京西", "北京南", "西安", "西安北", "成都东", "成都西", "乌鲁木齐", "乌鲁木齐南", "郑州"]
+
+
+@pytest.fixture
+def resolver() -> StationResolver:
+    return StationResolver(STATIONS)
+
+
+def test_exact_station_is_not_expanded(resolver):
+    assert resolver.resolve("北京").names == ["北京"]
+    assert resolver.resolve("北京西").names == ["北京西"]
+
+
+def test_suffix_normalizes_to_existing_station(resolver):
+    for query, expected in [("北京站", "北京"), ("西安站", "西安"), ("北京西站", "北京西"), ("郑州火车站", "郑州")]:
+        resolution = resolver.resolve(query)
+        assert resolution.names == [expected]
+        assert resolution.method == "normalized"
+
+
+def test_city_without_same_name_station_expands(resolver):
+    for query in ("成都", "成都站"):
+        resolution = resolver.resolve(query)
+        assert resolution.method == "city"
+        assert sorted(resolution.names) == ["成都东", "成都西"]
+
+
+def test_prefix_and_fuzzy(resolver):
+    assert resolver.resolve("乌鲁").names == ["乌鲁木齐", "乌鲁木齐南"]
+    assert resolver.resolve("郑洲").names == ["郑州"]
+    assert resolver.resolve("上海").method == "unresolved"
+
+
+def test_expand_cartesian_product(resolver):
+    variants = resolver.expand({"departure_station": "成都", "arrival_station": "北京站"})
+    assert sorted(v["departure_station"] for v in variants) == ["成都东", "成都西"]
+    assert {v["arrival_station"] for v in variants} == {"北京"}
+    assert resolver.expand({"train_number": "K178"}) == [{"train_number": "K178"}]
+
+
+def test_find_in_text(resolver):
+    assert set(resolver.find_in_text("从北京西到西安北的车次")) >= {"北京西", "西安北"}
+
+
+def test_async_build_runs_off_loop(monkeypatch):
+    built = []
+
+    def build():
+        built.append(True)
+        module._station_resolver = StationResolver(STATIONS)
+        return module._station_resolver
+
+    monkeypatch.setattr(module, "_station_resolver", None)
+    monkeypatch.setattr(module, "get_station_resolver", build)
+    with pytest.raises(RuntimeError):
+        module.find_stations_in_text("北京西")
+
+    resolver = asyncio.run(module.aget_station_resolver())
+    assert built == [True]
+    assert asyncio.run(module.aget_station_resolver()) is resolver
+    assert "北京西" in module.find_stations_in_text("北京西")
+
+
+def test_agent_skips_resolver_when_disabled(monkeypatch):
+    from railmind.agent.react_agent import ReActAgent
+    from railmind.config import get_settings
+
+    def unexpected_build():
+        raise AssertionError("station_resolver_enabled=False 时不应构建解析器")
+
+    monkeypatch.setattr(get_settings(), "station_resolver_enabled", False)
+    monkeypatch.setattr(module, "_station_resolver", None)
+    monkeypatch.setattr(module, "get_station_resolver", unexpected_build)
+    agent = ReActAgent()
+    assert agent.rewrite_gate.station_finder is None
+    assert agent.answer_cache is None or agent.answer_cache.station_finder is None
+    assert asyncio.run(agent._station_resolver()) is None
+
+
+def test_failed_build_backs_off_until_reset(monkeypatch):
+    from neo4j.exceptions import ServiceUnavailable
+    from railmind.function_call import kg_tools
+
+    calls = []
+
+    class Unavailable:
+        def invoke(self, parameters):
+            calls.append(parameters)
+            raise ServiceUnavailable("Neo4j is down")
+
+    class Available:
+        def invoke(self, parameters):
+            calls.append(parameters)
+            return json.dumps([{"车站名称": name} for name in STATIONS], ensure_ascii=False)
+
+    monkeypatch.setattr(module, "_station_resolver", None)
+    monkeypatch.setattr(module, "_failures", 0)
+    monkeypatch.setattr(module, "_retry_at", 0.0)
+    monkeypatch.setattr(kg_tools, "get_all_stations", Unavailable())
+
+    with pytest.raises(ServiceUnavailable):
+        asyncio.run(module.aget_station_resolver())
+    for _ in range(3):
+        with pytest.raises(module.StationResolverUnavailable):
+            asyncio.run(module.aget_station_resolver())
+    assert len(calls) == 1
+
+    monkeypatch.setattr(kg_tools, "get_all_stations", Available())
+    module._on_kg_change({"entities": {"station_name": ["北京丰台"]}})
+    assert "北京西" in asyncio.run(module.aget_station_resolver()).names
+    assert len(calls) == 2
@@ -0,0 +1,106 @@
+"""流式接口离线测试: astream 的事件顺序、answer_token 经 ANSWER_TOKEN_SINK 转发、失败时的 complete 摘要与 SSE error 事件"""
+import asyncio
+import json
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from railmind.agent.react_agent import ReActAgent
+from railmind.api import routes
+from railmind.operators.llm.thinking_budget import ThinkingBudget
+
+ANSWER = "K178次列车8:05发车。"
+
+
+def sub_query_state():
+    action = {"function_name": "get_train_details", "parameters": {"train_number": "K178"}}
+    observation = {"function": "get_train_details", "parameters": action["parameters"], "result": [{"车次": "K178", "发车时间": "08:05"}]}
+    return {
+        "rewritten_query": "K178几点发车",
+        "sub_queries": [{
+            "sub_query": "K178几点发车", "type": "车次详情", "results": observation["result"],
+            "relevant_functions": [{"function_name": "get_train_details"}],
+            "exe_process_data": {"thoughts": [{"thought": "查询详情"}], "actions": [action], "observations": [observation]},
+        }],
+        "thoughts": [{"content": {"thought": "查询详情", "next_action": action}}],
+        "actions": [{"action": action}],
+        "observations": [observation],
+        "executed_functions": [{"name": "get_train_details"}],
+    }
+
+
+class StubGraph:
+    """按节点顺序产出状态更新；generate_answer 节点调用真实的 _llm_answer"""
+
+    def __init__(self, agent, fail: bool = False):
+        self.agent = agent
+        self.fail = fail
+
+    async def astream(self, initial_state, config=None):
+        state = {**initial_state, **sub_query_state()}
+        yield {"rewrite_query": state}
+        yield {"understand_query": state}
+        yield {"react_think": state}
+        yield {"execute_action": state}
+        if self.fail:
+            raise RuntimeError("Neo4j is down")
+        answer = await self.agent._llm_answer(state)
+        yield {"generate_answer": {**state, "final_answer": answer, "final_answer_metadata": {"answer_source": "llm"}}}
+
+
+def make_agent(tmp_path, fail=False) -> ReActAgent:
+    agent = ReActAgent(error_backtracking_log_path=str(tmp_path))
+    agent.answer_cache = agent.coalescer = None
+    agent.answer_llm = FakeListChatModel(responses=[ANSWER])
+    agent.answer_budget = ThinkingBudget("answer", thinking=False)
+    agent.llm_registry.thinking = lambda stage: False
+    agent.graph = StubGraph(agent, fail=fail)
+    return agent
+
+
+async def collect(agent):
+    return [event async for event in agent.astream("K178几点发车", "user", "session")]
+
+
+def test_event_order_and_token_forwarding(tmp_path):
+    events = asyncio.run(collect(make_agent(tmp_path)))
+    kinds = [kind for kind, _ in events]
+    first_token = kinds.index("answer_token")
+    assert [k for k in kinds[:first_token] if k != "node"] == ["rewrite", "intent", "thought", "action", "observation"]
+    assert "".join(data["token"] for kind, data in events if kind == "answer_token") == ANSWER
+    assert kinds[-2:] == ["node", "complete"]
+    assert "answer" not in kinds
+
+    complete = events[-1][1]
+    assert complete["success"] is True and complete["answer"] == ANSWER
+    assert complete["sub_queries"] == ["K178几点发车"]
+    assert set(complete["metadata"]) == {"session_id", "user_id", "iterations", "functions_used", "answer_source", "timestamp", "error"}
+    json.dumps(complete, ensure_ascii=False)
+
+
+def test_workflow_error_completes_with_fallback_answer(tmp_path):
+    events = asyncio.run(collect(make_agent(tmp_path, fail=True)))
+    kinds = [kind for kind, _ in events]
+    assert kinds[-2:] == ["answer", "complete"]
+    complete = events[-1][1]
+    assert complete["success"] is False
+    assert complete["metadata"]["error"] == "Neo4j is down"
+    assert complete["answer"] == events[-2][1]["answer"] == "系统繁忙 请您稍后再试"
+
+
+def test_route_emits_sse_events_and_error_event(monkeypatch):
+    class StubAgent:
+        async def astream(self, query, user_id, session_id, bypass_cache=False):
+            yield "answer_token", {"token": "8:05"}
+            raise RuntimeError("stream broke")
+
+    monkeypatch.setattr(routes, "agent", StubAgent())
+
+    async def scenario():
+        response = await routes.query_stream(query="K178几点发车", user_id="user", session_id="session")
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    body = asyncio.run(scenario())
+    assert body == (
+        'event: answer_token\ndata: {"token": "8:05"}\n\n'
+        'event: error\ndata: {"error": "stream broke"}\n\n'
+    )
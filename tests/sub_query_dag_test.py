@@ -0,0 +1,39 @@
+"""子查询依存推断离线测试"""
+from railmind.agent.sub_query_dag import infer_dependencies, dependency_levels
+
+
+def sub_query(text, *entities, **extra):
+    return {"sub_query": text, "entities": [{"type": t, "text": v} for t, v in entities], **extra}
+
+
+def test_independent_sub_queries_share_a_level():
+    sub_queries = [
+        sub_query("K178的检票口", ("Train", "K178")),
+        sub_query("T308几点发车", ("Train", "T308")),
+    ]
+    dependencies = infer_dependencies(sub_queries)
+    assert dependencies == [[], []]
+    assert dependency_levels(dependencies) == [[0, 1]]
+
+
+def test_reference_and_shared_entities_create_dependencies():
+    sub_queries = [
+        sub_query("从北京西到西安的车次", ("Station", "北京西"), ("Station", "西安")),
+        sub_query("这些车次的检票口"),
+        sub_query("西安的候车厅", ("Station", "西安")),
+        sub_query("明天的天气", ("Date", "明天")),
+    ]
+    dependencies = infer_dependencies(sub_queries)
+    assert dependencies == [[], [0], [0], []]
+    assert dependency_levels(dependencies) == [[0, 3], [1, 2]]
+
+
+def test_explicit_depends_on_only_points_backwards():
+    sub_queries = [sub_query("A"), sub_query("B", depends_on=[0, 1, 5]), sub_query("C", depends_on=[1])]
+    assert infer_dependencies(sub_queries) == [[], [0], [1]]
+    assert dependency_levels(infer_dependencies(sub_queries)) == [[0], [1], [2]]
+
+
+def test_shared_generic_entities_do_not_link():
+    sub_queries = [sub_query("8点以后的车", ("Time", "8点")), sub_query("8点以前的车", ("Time", "8点"))]
+    assert infer_dependencies(sub_queries) == [[], []]
@@ -0,0 +1,68 @@
+"""流式 ReThink 离线测试: ActionStreamParser 与提前调用在非执行出口的清理"""
+import asyncio
+import json
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from railmind.agent.react_agent import ReActAgent
+from railmind.config import get_settings
+from railmind.utils import ActionStreamParser
+
+ACTION = '{"thought": "查询详情", "next_action": {"function_name": "get_train_details", "parameters": {"train_number": "K178"}, "reason": "'
+
+
+def feed_chunks(parser, text, size=3):
+    action = None
+    for start in range(0, len(text), size):
+        action = parser.feed(text[start:start + size])
+    return action
+
+
+def test_parser_returns_action_before_json_completes():
+    parser = ActionStreamParser()
+    assert feed_chunks(parser, ACTION[:60]) is None
+    assert feed_chunks(parser, ACTION[60:]) == {"function_name": "get_train_details", "parameters": {"train_number": "K178"}}
+
+
+def test_parser_skips_think_section():
+    parser = ActionStreamParser(skip_think=True)
+    text = '<think>"function_name": "search_trains_by_station", "parameters": {}</think>' + ACTION
+    assert feed_chunks(parser, text)["function_name"] == "get_train_details"
+
+
+def think_state():
+    return {
+        "original_query": "K178的详情", "current_query": "K178的详情",
+        "sub_queries": [{
+            "sub_query": "K178的详情", "type": "车次详情", "description": "查询车次", "entities": [{"type": "Train", "text": "K178"}],
+            "relevant_functions": [{"function_name": "get_train_details", "priority": 1}],
+        }],
+        "current_sub_query_index": 0, "_previous_sub_query_index": -1,
+        "thoughts": [], "actions": [], "observations": [], "executed_functions": [], "current_result": [],
+        "iteration_count": 0, "speculations": {}, "early_action": None,
+    }
+
+
+def test_unparsable_think_cancels_early_action(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_settings(), "think_streaming", True)
+    agent = ReActAgent(error_backtracking_log_path=str(tmp_path))
+    agent.llm = FakeListChatModel(responses=[ACTION + "未闭合的输出"])
+    started = []
+
+    async def slow_call(func_name, params, state):
+        started.append(func_name)
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(agent, "_call_function", slow_call)
+
+    async def scenario():
+        state = await agent._react_think(think_state())
+        await asyncio.sleep(0)
+        return state
+
+    state = asyncio.run(scenario())
+    assert started == ["get_train_details"]
+    assert state["error"] is not None
+    assert state["early_action"] is None
+    json.dumps(state, ensure_ascii=False, default=str)
+    assert agent.stream_stats["early_dispatches"] == 1
@@ -0,0 +1,96 @@
+"""think_mode=tool_calling 离线测试: 用伪造的 tool-calling 模型覆盖 end_of_turn / 无法解析 / 多调用并发"""
+import asyncio
+from typing import Any, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from railmind.agent.react_agent import ReActAgent
+from railmind.agent.state import ErrorType
+from railmind.config import get_settings
+
+
+class FakeToolCallingModel(BaseChatModel):
+    """按顺序返回预设的 AIMessage，bind_tools 记录绑定的函数名"""
+    responses: List[AIMessage]
+    bound_tools: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools: List[Any], **kwargs):
+        self.bound_tools = [t["function"]["name"] for t in tools]
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self.responses.pop(0))])
+
+
+def think_state():
+    return {
+        "original_query": "K178和T308的详情", "current_query": "K178和T308的详情",
+        "sub_queries": [{
+            "sub_query": "K178和T308的详情", "type": "车次详情", "description": "查询车次",
+            "entities": [{"type": "Train", "text": "K178"}, {"type": "Train", "text": "T308"}],
+            "relevant_functions": [{"function_name": "get_train_details", "priority": 1}],
+        }],
+        "current_sub_query_index": 0, "_previous_sub_query_index": -1,
+        "thoughts": [], "actions": [], "observations": [], "executed_functions": [], "current_result": [],
+        "iteration_count": 0, "speculations": {}, "early_action": None,
+    }
+
+
+def make_agent(monkeypatch, tmp_path, response: AIMessage) -> ReActAgent:
+    monkeypatch.setattr(get_settings(), "think_mode", "tool_calling")
+    agent = ReActAgent(error_backtracking_log_path=str(tmp_path))
+    agent.llm = FakeToolCallingModel(responses=[response])
+    return agent
+
+
+def test_no_tool_calls_ends_turn(monkeypatch, tmp_path):
+    agent = make_agent(monkeypatch, tmp_path, AIMessage(content="已经得到全部结果"))
+    state = asyncio.run(agent._react_think(think_state()))
+    action = state["actions"][-1]["action"]
+    assert action["function_name"] == "end_of_turn"
+    assert action["reason"] == "已经得到全部结果"
+    assert agent.llm.bound_tools == ["get_train_details"]
+
+
+def test_only_invalid_calls_take_error_path(monkeypatch, tmp_path):
+    response = AIMessage(content="", invalid_tool_calls=[{"name": "get_train_details", "args": "{\"train_number\": ", "id": "call_1", "error": None}])
+    agent = make_agent(monkeypatch, tmp_path, response)
+    state = asyncio.run(agent._react_think(think_state()))
+    assert state["error"] == ErrorType.RTMODEL
+    assert state["actions"] == []
+    assert agent.think_stats["parse_failures"] == 1
+
+
+def test_multiple_calls_run_concurrently(monkeypatch, tmp_path):
+    response = AIMessage(content="", tool_calls=[
+        {"name": "get_train_details", "args": {"train_number": "K178"}, "id": "call_1"},
+        {"name": "get_train_details", "args": {"train_number": "T308"}, "id": "call_2"},
+    ])
+    agent = make_agent(monkeypatch, tmp_path, response)
+    running, peak = 0, 0
+
+    async def fake_call(func_name, params, state):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [{"车次": params["train_number"]}]
+
+    monkeypatch.setattr(agent, "_call_function", fake_call)
+
+    async def scenario():
+        state = await agent._react_think(think_state())
+        return await agent._execute_action(state)
+
+    state = asyncio.run(scenario())
+    assert peak == 2
+    assert [o["parameters"]["train_number"] for o in state["observations"]] == ["K178", "T308"]
+    assert [r["车次"] for r in state["current_result"]] == ["K178", "T308"]
+    assert agent.think_stats["multi_call_turns"] == 1
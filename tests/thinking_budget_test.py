@@ -0,0 +1,95 @@
+"""ThinkingBudget 离线测试: 关闭 / 完整 / 封顶三种模式，封顶时的续写请求与单次请求的用量记录"""
+import asyncio
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.prompts import ChatPromptTemplate
+
+from railmind.operators.llm.thinking_budget import ThinkingBudget, THINKING_USAGE, THINK_CUTOFF
+from railmind.utils import parse_think_content
+
+PROMPT = ChatPromptTemplate.from_messages([("user", "{query}")])
+
+
+class FakeStreamingLLM:
+    """ainvoke 返回完整回复；astream 第一次按块返回 chunks，之后返回 continuation，并记录每次请求"""
+
+    def __init__(self, chunks: List[str], continuation: List[str] = (), extra_body: Dict[str, Any] = None):
+        self.chunks = chunks
+        self.continuation = list(continuation)
+        self.model_kwargs = {"extra_body": extra_body or {}}
+        self.requests: List[Dict[str, Any]] = []
+
+    async def ainvoke(self, messages):
+        self.requests.append({"messages": messages, "stream": False})
+        return AIMessage(content="".join(self.chunks))
+
+    async def astream(self, messages, **kwargs):
+        self.requests.append({"messages": messages, "stream": True, **kwargs})
+        for chunk in self.chunks if len(self.requests) == 1 else self.continuation:
+            yield AIMessageChunk(content=chunk)
+
+
+def run(budget: ThinkingBudget, llm: FakeStreamingLLM, on_chunk=None):
+    async def scenario():
+        usage = {}
+        THINKING_USAGE.set(usage)
+        response = await budget.ainvoke(llm, PROMPT, {"query": "K178几点发车"}, on_chunk=on_chunk)
+        return response, usage
+
+    return asyncio.run(scenario())
+
+
+def test_disabled_mode_invokes_once_and_records_no_reasoning():
+    llm = FakeStreamingLLM(['{"answer": "8:05"}'])
+    budget = ThinkingBudget("answer", thinking=False, budget=100)
+    response, usage = run(budget, llm)
+    assert budget.mode == "disabled"
+    assert response.content == '{"answer": "8:05"}'
+    assert [r["stream"] for r in llm.requests] == [False]
+    assert usage["answer"]["calls"] == 1 and usage["answer"]["reasoning_tokens"] == 0
+
+
+def test_full_mode_counts_reasoning_without_cut():
+    llm = FakeStreamingLLM(["<think>", "先查询车次详情", "</think>", "8:05"])
+    budget = ThinkingBudget("think", thinking=True)
+    response, usage = run(budget, llm)
+    assert budget.mode == "full"
+    assert len(llm.requests) == 1
+    assert parse_think_content(response.content) == ("先查询车次详情", "8:05")
+    assert usage["think"]["reasoning_tokens"] == 7
+    assert usage["think"]["capped"] == 0
+
+
+def test_capped_mode_cuts_reasoning_and_continues_final_message():
+    llm = FakeStreamingLLM(
+        ["<think>", "思考思考", "思考思考", "思考思考", "</think>", "不应出现"],
+        continuation=['{"answer": ', '"8:05"}'],
+        extra_body={"chat_template_kwargs": {"enable_thinking": True}},
+    )
+    streamed = []
+    budget = ThinkingBudget("think", thinking=True, budget=5)
+    response, usage = run(budget, llm, on_chunk=streamed.append)
+
+    assert budget.mode == "capped:5"
+    assert len(llm.requests) == 2
+    prefix = "<think>思考思考思考思考" + THINK_CUTOFF
+    continued = llm.requests[1]
+    assert continued["messages"][-1].content == prefix
+    assert continued["extra_body"] == {
+        "chat_template_kwargs": {"enable_thinking": True}, "continue_final_message": True, "add_generation_prompt": False,
+    }
+    assert response.content == prefix + '{"answer": "8:05"}'
+    reasoning, result = parse_think_content(response.content)
+    assert result == '{"answer": "8:05"}'
+    assert "".join(streamed) == response.content
+    assert usage["think"] == {"calls": 1, "reasoning_tokens": 8, "seconds": usage["think"]["seconds"], "capped": 1}
+    assert budget.stats()["capped"] == 1
+
+
+def test_usage_is_not_recorded_outside_a_request():
+    budget = ThinkingBudget("think", thinking=True)
+    response = asyncio.run(budget.ainvoke(FakeStreamingLLM(["<think>x</think>ok"]), PROMPT, {"query": "q"}))
+    assert response.content == "<think>x</think>ok"
+    assert THINKING_USAGE.get() is None
+    assert budget.stats()["calls"] == 1
@@ -0,0 +1,106 @@
+"""
+TimetableEngine 与 Neo4j Cypher 结果一致性测试
+需要一个由 kg_builder 使用同一份 Excel（settings.timetable_path）建好的 Neo4j 图谱；
+未配置凭据或 Neo4j 不可连接时 pytest 跳过该测试。
+
+用法: python tests/timetable_parity_test.py
+"""
+import json
+from typing import Dict, Any, List, Tuple
+
+import pytest
+from neo4j.exceptions import Neo4jError, DriverError
+
+from railmind.function_call.kg_tools import TOOLS, kg_system
+from railmind.function_call.timetable_engine import get_timetable_engine
+
+TOOL_MAP = {tool.name: tool for tool in TOOLS}
+
+
+def normalize(rows: List[Dict[str, Any]]) -> List[str]:
+    """
+    ORDER BY 的并列项与 collect() 的元素顺序在 Cypher 中没有保证，
+    因此比较时对列表字段排序、对行整体排序（保留重复行）。
+    """
+    normalized = []
+    for row in rows:
+        row = {k: sorted(v) if isinstance(v, list) else v for k, v in row.items()}
+        normalized.append(json.dumps(row, ensure_ascii=False, sort_keys=True))
+    return sorted(normalized)
+
+
+def build_cases() -> List[Tuple[str, Dict[str, Any]]]:
+    """从时刻表本身生成覆盖所有工具的参数组合"""
+    engine = get_timetable_engine()
+    stations = sorted(set(engine.station_name.tolist()))
+    numbers = sorted(set(engine.train_number.tolist()))
+    cases: List[Tuple[str, Dict[str, Any]]] = [("get_all_stations", {}), ("get_all_trains", {})]
+
+    for number in numbers:
+        cases.append(("get_train_details", {"train_number": number}))
+    for station in stations:
+        cases.append(("search_trains_by_station", {"station_name": station}))
+        cases.append(("get_station_info", {"station_name": station}))
+    for station in {s[:1] for s in stations}:
+        cases.append(("search_trains_by_station", {"station_name": station}))
+    for hall in set(engine.hall_name.tolist()):
+        cases.append(("get_waiting_hall_info", {"hall_name": hall}))
+    for gate in set(engine.gate_number.tolist()):
+        cases.append(("get_ticket_gate_info", {"gate_number": gate}))
+    for platform in set(engine.platform_number.tolist()):
+        cases.append(("get_platform_info", {"platform_number": platform}))
+    for prefix in sorted({n[:1] for n in numbers}):
+        cases.append(("search_trains_by_train_type", {"train_type": prefix}))
+    for start, end in [("00:00", "01:00"), ("08:00", "12:00"), ("20:00", "23:59"), ("12:00", "08:00")]:
+        cases.append(("search_trains_by_time_range", {"start_time": start, "end_time": end}))
+
+    # 按列车组合其始发站与终到站
+    pairs = set()
+    for t in range(len(engine.train_number)):
+        for d in engine._neighbors(engine.out_adj["departs"], t).tolist():
+            for a in engine._neighbors(engine.out_adj["arrives"], t).tolist():
+                pairs.add((engine.station_name[d].item(), engine.station_name[a].item()))
+    for dep, arr in sorted(pairs):
+        cases.append(("find_trains_between_stations", {"departure_station": dep, "arrival_station": arr}))
+        cases.append(("search_trains_by_multiple_conditions", {"departure_station": dep, "arrival_station": arr}))
+    cases.append(("search_trains_by_multiple_conditions", {"train_type": "K", "start_time": "06:00", "end_time": "18:00"}))
+    cases.append(("search_trains_by_multiple_conditions", {}))
+    cases.append(("find_trains_between_stations", {"departure_station": "不存在", "arrival_station": "不存在"}))
+    cases.append(("get_train_details", {"train_number": "不存在"}))
+    return cases
+
+
+def neo4j_available() -> bool:
+    try:
+        kg_system.driver.verify_connectivity()
+        return True
+    except (Neo4jError, DriverError, OSError):
+        return False
+
+
+def test_parity():
+    if not neo4j_available():
+        pytest.skip("Neo4j 不可用或凭据未配置")
+    engine = get_timetable_engine()
+    failures = []
+    cases = build_cases()
+    for name, params in cases:
+        query, parameters = TOOL_MAP[name].func.__wrapped__(**params)
+        expected = kg_system.run_query(query, parameters)
+        actual = getattr(engine, name)(**params)
+        if normalize(expected) != normalize(actual):
+            failures.append((name, params, expected, actual))
+
+    print(f"一致性测试: {len(cases) - len(failures)}/{len(cases)} 通过")
+    for name, params, expected, actual in failures[:10]:
+        print(f"❌ {name}({params})")
+        print(f"   Neo4j : {json.dumps(expected, ensure_ascii=False)[:300]}")
+        print(f"   Engine: {json.dumps(actual, ensure_ascii=False)[:300]}")
+    assert not failures
+
+
+if __name__ == "__main__":
+    try:
+        test_parity()
+    finally:
+        kg_system.close()
@@ -0,0 +1,23 @@
+"""railmind.utils 离线测试: parse_minute_of_day 时刻解析"""
+from datetime import time, datetime
+
+from railmind.utils import parse_minute_of_day
+
+
+def test_parses_timetable_formats():
+    assert parse_minute_of_day("0:12") == 12
+    assert parse_minute_of_day("00:12") == 12
+    assert parse_minute_of_day("00:12:00") == 12
+    assert parse_minute_of_day("0：12") == 12
+    assert parse_minute_of_day(" 23:59 ") == 1439
+    assert parse_minute_of_day("24:00") == 0
+
+
+def test_parses_time_objects():
+    assert parse_minute_of_day(time(8, 5)) == 485
+    assert parse_minute_of_day(datetime(2024, 1, 1, 18, 30)) == 1110
+
+
+def test_invalid_values():
+    for value in (None, "", "8点", "25:00", "12:60", "1200", "-"):
+        assert parse_minute_of_day(value) is None